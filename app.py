@@ -6,8 +6,13 @@ from dotenv import load_dotenv
 
 # Import Key Modules
 from src.llm.generator import CorepGenerator
+from src.retrieval.registry import memory_stats
+from src.storage.run_store import get_default_store
+from src.ingestion.tabular import TabularScenarioReader
+from src.llm.batch import BatchReportGenerator
 from src.validation.validator import Validator
 from src.templates.ca1_template import CA1Template
+from src.observability import tracing
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +35,12 @@ def load_scenarios():
 
 SCENARIOS = load_scenarios()
 
+# Helper for formatting
+def fmt_millions(val):
+    if isinstance(val, (int, float)):
+        return f"£ {val / 1_000_000:,.2f} M"
+    return val
+
 # Sidebar Configuration
 with st.sidebar:
     st.title("PRA Regulatory Copilot")
@@ -61,15 +72,49 @@ with st.sidebar:
         model_name = st.text_input("Model Name", value="llama3")
         api_key = "ollama"
 
+    retrieval_mode = st.radio("Retrieval", ["dense", "hybrid"], horizontal=True,
+                              help="Hybrid fuses semantic search with BM25 keyword search (better for article numbers)")
+    vector_backend = st.selectbox("Vector store", ["chroma", "numpy", "numpy-int8"],
+                                  help="NumPy keeps the KB embeddings in a memory-mapped matrix with exact search")
+
     if st.button("Initialize / Update"):
         st.session_state.generator = CorepGenerator(
             provider=provider,
             api_key=api_key or os.getenv("LLM_API_KEY"),
             model_name=model_name,
-            base_url=base_url
+            base_url=base_url,
+            retrieval_mode=retrieval_mode,
+            vector_backend=vector_backend
         )
         st.success(f"Initialized {provider}")
 
+    st.markdown("### Response Cache")
+    bypass_cache = st.checkbox("Bypass cache (force a fresh LLM call)", value=False)
+    stream_output = st.checkbox("Stream output", value=True, help="Render template rows as the LLM produces them")
+    if "generator" in st.session_state and st.session_state.generator.cache is not None:
+        stats = st.session_state.generator.cache.stats()
+        st.caption(f"{stats['entries']} cached responses · {stats['hits']} hits / {stats['misses']} misses")
+
+    with st.expander("Shared resources"):
+        st.json(memory_stats())
+
+    st.markdown("### Saved Runs")
+    run_store = get_default_store()
+    past_runs = run_store.find_runs(limit=25)
+    if past_runs:
+        run_labels = {
+            f"#{r['run_id']} · {r['lei_code'] or r['scenario_id'] or 'custom'} · {r['reporting_date'] or '-'} · {r['model_name']}": r["run_id"]
+            for r in past_runs
+        }
+        selected_run = st.selectbox("Reopen a previous run", list(run_labels))
+        if st.button("Open Run"):
+            stored = run_store.get_run(run_labels[selected_run])
+            st.session_state.analysis_result = stored["report"]
+            st.session_state.run_id = stored["run_id"]
+            st.session_state.trace = stored.get("trace")
+    else:
+        st.caption("No saved runs yet")
+
 # Main Content
 st.title("LLM-Assisted COREP Reporting (Prototype)")
 st.markdown("Automated CA1 (Own Funds) Template Generation with RAG & Validation")
@@ -107,13 +152,80 @@ with col_action:
         else:
             with st.spinner("Analyzing Regulations & Generating Report..."):
                 # Run Generation
-                result = st.session_state.generator.generate_report(user_query)
+                context_ids = []
+                trace = None
+                if stream_output:
+                    result = {"error": "No response received"}
+                    live_rows = {}
+                    live_table = st.empty()
+                    for event in st.session_state.generator.stream_report(user_query, bypass_cache=bypass_cache):
+                        if event["type"] == "field":
+                            live_rows[event["field"]] = event["value"]
+                            live_table.dataframe(
+                                pd.DataFrame([{"Row ID": k, "Amount": fmt_millions(v)} for k, v in live_rows.items()]),
+                                use_container_width=True, hide_index=True
+                            )
+                        elif event["type"] == "done":
+                            result = event["report"]
+                            context_ids = event["context_ids"]
+                            trace = event.get("trace")
+                        elif event["type"] == "error":
+                            result = event
+                    live_table.empty()
+                else:
+                    run = st.session_state.generator.generate_run(user_query, bypass_cache=bypass_cache)
+                    result, context_ids, trace = run["report"], run["context_ids"], run.get("trace")
                 
                 if "error" in result:
                     st.error(result["error"])
                 else:
                     st.session_state.analysis_result = result
-                    st.success("Generation Complete!")
+                    st.session_state.trace = trace
+                    generator = st.session_state.generator
+                    scenario = s_data if selected_scenario != "Custom Query" else {}
+                    try:
+                        validation = Validator().validate(CA1Template(**result))
+                    except Exception:
+                        validation = None
+                    st.session_state.run_id = get_default_store().save_run(
+                        result,
+                        scenario_id=scenario.get("scenario_id"),
+                        lei_code=scenario.get("lei_code"),
+                        reporting_date=scenario.get("reporting_date"),
+                        provider=generator.provider,
+                        model_name=generator.model_name,
+                        prompt_hash=generator.prompt_hash,
+                        input_text=user_query,
+                        context_ids=context_ids,
+                        validation=validation,
+                        trace=trace
+                    )
+                    st.success(f"Generation Complete! Saved as run #{st.session_state.run_id}")
+
+# Bulk Input
+with st.expander("Bulk upload (CSV / Excel)"):
+    st.caption("One row per entity (wide) or trial-balance rows of entity, period, account and amount (long). "
+               "Files are read in chunks; results are saved to the run store.")
+    uploaded = st.file_uploader("Entity financials", type=["csv", "xlsx", "xlsm"])
+    if uploaded is not None and st.button("Generate Reports for File"):
+        reader = TabularScenarioReader(uploaded, file_type="excel" if uploaded.name.lower().endswith((".xlsx", ".xlsm")) else "csv")
+        batch = BatchReportGenerator(st.session_state.generator)
+        summary_rows = []
+        progress = st.empty()
+        for outcome in batch.run(reader):
+            if outcome["status"] == "ok":
+                get_default_store().save_run(outcome.pop("report"), **outcome)
+            summary_rows.append({
+                "Scenario": outcome["scenario_id"],
+                "LEI": outcome.get("lei_code"),
+                "Status": outcome["status"],
+                "Valid": outcome.get("validation", {}).get("is_valid"),
+                "Error": outcome.get("error"),
+            })
+            progress.caption(f"{len(summary_rows)} entities processed ({reader.rows_read} rows read)")
+        st.dataframe(pd.DataFrame(summary_rows), use_container_width=True, hide_index=True)
+        if reader.unmapped:
+            st.warning(f"Ignored unrecognised columns/accounts: {', '.join(sorted(reader.unmapped))}")
 
 # Output Section (4 Panels)
 if st.session_state.analysis_result:
@@ -129,14 +241,8 @@ if st.session_state.analysis_result:
         st.error(f"Validation Error: {e}")
 
     # Tabs
-    tab_viz, tab1, tab2, tab3, tab4 = st.tabs(["📊 Visuals", "📋 Template (CA1)", "✅ Validation", "🔍 Audit Trail", "📚 Context"])
+    tab_viz, tab1, tab2, tab3, tab4, tab_perf = st.tabs(["📊 Visuals", "📋 Template (CA1)", "✅ Validation", "🔍 Audit Trail", "📚 Context", "⏱️ Performance"])
     
-    # Helper for formatting
-    def fmt_millions(val):
-        if isinstance(val, (int, float)):
-            return f"£ {val / 1_000_000:,.2f} M"
-        return val
-
     with tab_viz:
         st.subheader("Capital Dashboard")
         
@@ -224,4 +330,21 @@ if st.session_state.analysis_result:
                     st.caption(doc['text'])
                     st.markdown("---")
 
+    with tab_perf:
+        st.subheader("Pipeline Timing")
+        trace = st.session_state.get("trace")
+        if trace:
+            rows = tracing.flatten(trace)
+            st.metric("Total", f"{trace['duration_ms'] / 1000:,.2f} s")
+            perf_df = pd.DataFrame(rows)
+            perf_df["span"] = ["\u00a0\u00a0" * r["depth"] + r["span"] for r in rows]
+            st.dataframe(perf_df.drop(columns=["depth"]), use_container_width=True, hide_index=True)
+
+            st.markdown("### Where the time went")
+            self_times = perf_df.assign(stage=[r["span"] for r in rows]).groupby("stage")["self_ms"].sum()
+            st.bar_chart(self_times[self_times > 0].sort_values(ascending=False))
+        else:
+            st.info("No timing trace was recorded for this run.")
 
+        with st.expander("Process metrics (Prometheus format)"):
+            st.code(tracing.get_default_tracer().metrics.render(), language="text")
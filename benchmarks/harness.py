@@ -0,0 +1,123 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+# name -> (setup function, description). setup(n) returns the zero-argument callable to time.
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup function when an optional dependency or service is unavailable."""
+
+
+def benchmark(name: str, description: str = ""):
+    def register(setup: Callable[[int], Callable[[], Any]]):
+        BENCHMARKS[name] = (setup, description or (setup.__doc__ or "").strip())
+        return setup
+    return register
+
+
+def time_callable(fn: Callable[[], Any], min_time: float = 0.2, max_repeats: int = 20, min_repeats: int = 3) -> List[float]:
+    """
+    Runs `fn` once to warm up, then repeatedly until `min_time` seconds have been
+    spent (bounded by `max_repeats`). Returns the wall time of each repeat.
+    """
+    fn()
+    timings = []
+    spent = 0.0
+    while len(timings) < min_repeats or (spent < min_time and len(timings) < max_repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+    return timings
+
+
+def result_key(name: str, n: int) -> str:
+    return f"{name}[n={n}]"
+
+
+def run_benchmarks(names: Optional[List[str]] = None, sizes: List[int] = (1, 1000),
+                   min_time: float = 0.2, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Runs the selected benchmarks at each size. Setup errors other than
+    SkipBenchmark / ImportError are recorded as failures rather than raised.
+    """
+    results = {}
+    for name in names or sorted(BENCHMARKS):
+        setup, _ = BENCHMARKS[name]
+        for n in sizes:
+            key = result_key(name, n)
+            try:
+                fn = setup(n)
+                timings = time_callable(fn, min_time=min_time)
+            except (SkipBenchmark, ImportError) as e:
+                results[key] = {"name": name, "n": n, "status": "skipped", "reason": str(e)}
+                log(f"{key:45s} skipped: {e}")
+                continue
+            except Exception as e:
+                results[key] = {"name": name, "n": n, "status": "error", "reason": f"{type(e).__name__}: {e}"}
+                log(f"{key:45s} ERROR: {e}")
+                continue
+
+            median = statistics.median(timings)
+            results[key] = {
+                "name": name,
+                "n": n,
+                "status": "ok",
+                "repeats": len(timings),
+                "min_s": min(timings),
+                "median_s": median,
+                "per_item_us": median / max(n, 1) * 1e6,
+            }
+            log(f"{key:45s} median {median * 1e3:10.3f} ms  ({results[key]['per_item_us']:.2f} us/item, {len(timings)} runs)")
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit or None,
+    }
+
+
+def save_results(path: str, results: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta or environment(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25,
+                     noise_floor_s: float = 0.001) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose median slowed down by more than `threshold` (0.25 = 25%)
+    relative to the baseline. Timings below `noise_floor_s` in both runs are
+    too noisy to compare and are ignored.
+    """
+    regressions = []
+    for key, result in current.items():
+        base = baseline.get(key)
+        if not base or result.get("status") != "ok" or base.get("status") != "ok":
+            continue
+        if max(result["median_s"], base["median_s"]) < noise_floor_s:
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append({"key": key, "baseline_s": base["median_s"], "current_s": result["median_s"], "ratio": ratio})
+    return sorted(regressions, key=lambda r: -r["ratio"])
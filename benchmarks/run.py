@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+
+from benchmarks import suite  # noqa: F401  (registers the benchmarks)
+from benchmarks.harness import BENCHMARKS, run_benchmarks, save_results, load_results, find_regressions, environment
+
+SCALES = {
+    "quick": [1, 1000],
+    "full": [1, 100, 10000, 100000],
+}
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the COREP hot-path benchmarks.")
+    parser.add_argument("--bench", action="append", choices=sorted(BENCHMARKS),
+                        help="Benchmark to run (repeatable; defaults to all)")
+    parser.add_argument("--scale", default="quick", choices=sorted(SCALES), help="Preset list of sizes")
+    parser.add_argument("--sizes", default=None, help="Comma-separated sizes, overriding --scale (e.g. 1,100,5000)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each case")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail when a benchmark is this much slower than the baseline (0.25 = 25%%)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in sorted(BENCHMARKS.items()):
+            print(f"{name:28s} {description}")
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")] if args.sizes else SCALES[args.scale]
+    results = run_benchmarks(args.bench, sizes=sizes, min_time=args.min_time)
+    meta = dict(environment(), sizes=sizes)
+    save_results(args.output, results, meta)
+    print(f"Results written to {args.output}")
+
+    failed = [key for key, r in results.items() if r["status"] == "error"]
+    if failed:
+        print(f"{len(failed)} benchmark(s) errored: {', '.join(failed)}", file=sys.stderr)
+
+    if args.baseline:
+        regressions = find_regressions(results, load_results(args.baseline), threshold=args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['key']}: {r['baseline_s'] * 1e3:.3f} ms -> {r['current_s'] * 1e3:.3f} ms "
+                  f"({r['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Benchmarks of the retrieval, generation and validation hot paths at synthetic scales.
+Everything runs offline: generation uses the Mock provider or the local stub LLM server,
+and benchmarks needing chromadb / sentence-transformers are skipped when those are missing.
+"""
+import atexit
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.harness import benchmark, SkipBenchmark
+
+SEED = 1234
+QUERY = "Deduction of goodwill and intangible assets under Article 36(1)(b) from CET1"
+VOCABULARY = (
+    "capital instruments share premium retained earnings accumulated other comprehensive income reserves "
+    "goodwill intangible assets deferred tax deduction tier common equity additional subordinated loans "
+    "institution competent authority eligible conditions paid up holdings own funds requirements prudential"
+).split()
+
+_temp_dirs = []
+
+
+def _temp_dir() -> str:
+    path = tempfile.mkdtemp(prefix="corep_bench_")
+    _temp_dirs.append(path)
+    return path
+
+
+@atexit.register
+def _cleanup():
+    for path in _temp_dirs:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def synthetic_paragraphs(n: int, words: int = 60):
+    rng = random.Random(SEED)
+    for i in range(n):
+        body = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+        yield f"Article {26 + i % 400}({1 + i % 5})({'abcde'[i % 5]}) {body}."
+
+
+def synthetic_reports(n: int):
+    rng = random.Random(SEED)
+    reports = []
+    for _ in range(n):
+        reports.append({
+            "row_010_own_funds": 0.0,
+            "row_015_tier1_capital": 0.0,
+            "row_020_cet1_capital": 0.0,
+            "row_040_paid_up_capital": rng.uniform(1e8, 1e9),
+            "row_060_share_premium": rng.uniform(0, 1e8),
+            "row_070_own_cet1_instruments": -rng.uniform(0, 1e7),
+            "row_140_previous_years_retained": rng.uniform(0, 1e9),
+            "row_150_profit_or_loss_eligible": rng.uniform(-1e8, 1e8),
+            "row_180_accumulated_oci": rng.uniform(-1e7, 1e7),
+            "row_300_goodwill": -rng.uniform(0, 5e7),
+            "row_340_intangible_assets": -rng.uniform(0, 2e7),
+            "row_540_at1_instruments": rng.uniform(0, 2e8),
+            "row_760_tier2_instruments": rng.uniform(0, 3e8),
+        })
+    return reports
+
+
+def _templates(n: int):
+    from src.templates.ca1_template import CA1Template
+
+    templates = [CA1Template(**r) for r in synthetic_reports(n)]
+    for template in templates:
+        template.calculate_totals()
+    return templates
+
+
+class HashingEmbeddings:
+    """Deterministic stand-in for EmbeddingGenerator, so retrieval can be timed without a model."""
+    model_name = "hashing-384"
+    dims = 384
+
+    def generate(self, text: str):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        rng = random.Random(digest)
+        return [rng.uniform(-1, 1) for _ in range(self.dims)]
+
+    def generate_batch(self, texts):
+        return [self.generate(t) for t in texts]
+
+
+# --- Startup ---
+
+@benchmark("import_entry_modules", "Cold import of the generator, batch CLI and LLM chain in a fresh interpreter")
+def bench_import(n: int):
+    if n != 1:
+        raise SkipBenchmark("size-independent; measured at n=1 only")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-c", "import src.llm.generator, src.llm.batch, core.llm_chain"]
+    return lambda: subprocess.run(command, cwd=root, check=True)
+
+
+# --- Retrieval ---
+
+@benchmark("rag_retrieve", "RAGPipeline.retrieve (BM25) over n synthetic articles")
+def bench_rag_retrieve(n: int):
+    from core.rag import RAGPipeline
+
+    data_dir = _temp_dir()
+    with open(os.path.join(data_dir, "rules.txt"), "w", encoding="utf-8") as f:
+        f.write("\n\n".join(synthetic_paragraphs(n)))
+    rag = RAGPipeline(data_dir=data_dir, chunk_cache_dir=os.path.join(data_dir, "chunks"), use_result_cache=False)
+    return lambda: rag.retrieve(QUERY, top_k=5)
+
+
+def _write_kb(n: int) -> str:
+    kb_path = os.path.join(_temp_dir(), "kb.json")
+    with open(kb_path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"article": f"Article {i}", "section": "Synthetic", "text": text, "tags": ["cet1"], "template_rows": ["020"]}
+            for i, text in enumerate(synthetic_paragraphs(n))
+        ], f)
+    return kb_path
+
+
+def _numpy_retriever(n_chunks: int = 500, use_result_cache: bool = False):
+    """Retriever over a NumPy store with hashing embeddings: no model download, no chromadb."""
+    from src.retrieval.numpy_store import NumpyVectorStore
+    from src.retrieval.retriever import Retriever
+
+    kb_path = _write_kb(n_chunks)
+    return Retriever(kb_path=kb_path, embedding_generator=HashingEmbeddings(),
+                     vector_store=NumpyVectorStore("bench", directory=os.path.dirname(kb_path)),
+                     use_result_cache=use_result_cache)
+
+
+@benchmark("retriever_retrieve", "Retriever.retrieve (NumPy store, hashing embeddings) over n KB chunks")
+def bench_retriever_retrieve(n: int):
+    retriever = _numpy_retriever(n)
+    return lambda: retriever.retrieve(QUERY, top_k=5)
+
+
+@benchmark("retriever_retrieve_chroma", "Retriever.retrieve (in-memory Chroma, hashing embeddings) over n KB chunks")
+def bench_retriever_retrieve_chroma(n: int):
+    try:
+        import chromadb
+    except ImportError:
+        raise SkipBenchmark("chromadb not installed")
+    from src.retrieval.retriever import Retriever
+    from src.retrieval.vector_store import VectorStore
+
+    class EphemeralStore(VectorStore):
+        def __init__(self, collection_name):
+            self.client = chromadb.EphemeralClient()
+            self.collection = self.client.get_or_create_collection(name=collection_name)
+
+    retriever = Retriever(kb_path=_write_kb(n), embedding_generator=HashingEmbeddings(),
+                          vector_store=EphemeralStore(f"bench_{n}"), use_result_cache=False)
+    return lambda: retriever.retrieve(QUERY, top_k=5)
+
+
+def _numpy_store_bench(n: int, dtype: str):
+    from src.retrieval.numpy_store import NumpyVectorStore
+
+    texts = list(synthetic_paragraphs(n))
+    embeddings = HashingEmbeddings()
+    store = NumpyVectorStore(f"bench_{n}", directory=_temp_dir(), dtype=dtype)
+    store.add_documents([{"id": f"doc{i}", "text": text, "metadata": {}} for i, text in enumerate(texts)],
+                        embeddings.generate_batch(texts))
+    query = embeddings.generate(QUERY)
+    return lambda: store.query(query, n_results=5)
+
+
+@benchmark("numpy_store_query", "NumpyVectorStore.query (float32, memory-mapped) over n vectors")
+def bench_numpy_store_query(n: int):
+    return _numpy_store_bench(n, "float32")
+
+
+@benchmark("numpy_store_query_int8", "NumpyVectorStore.query (int8 quantised) over n vectors")
+def bench_numpy_store_query_int8(n: int):
+    return _numpy_store_bench(n, "int8")
+
+
+@benchmark("retriever_retrieve_loop", "n queries through Retriever.retrieve one at a time (NumPy store, 500 chunks)")
+def bench_retriever_retrieve_loop(n: int):
+    retriever = _numpy_retriever()
+    queries = list(synthetic_paragraphs(n, words=12))
+    return lambda: [retriever.retrieve(query, top_k=5) for query in queries]
+
+
+@benchmark("retriever_retrieve_many", "n queries through one Retriever.retrieve_many call (NumPy store, 500 chunks)")
+def bench_retriever_retrieve_many(n: int):
+    retriever = _numpy_retriever()
+    queries = list(synthetic_paragraphs(n, words=12))
+    return lambda: retriever.retrieve_many(queries, top_k=5)
+
+
+@benchmark("retriever_retrieve_cached", "n repeated queries through Retriever.retrieve served from the result cache")
+def bench_retriever_retrieve_cached(n: int):
+    retriever = _numpy_retriever(use_result_cache=True)
+    queries = list(synthetic_paragraphs(n, words=12))
+    for query in queries:
+        retriever.retrieve(query, top_k=5)
+    return lambda: [retriever.retrieve(query, top_k=5) for query in queries]
+
+
+@benchmark("embeddings_generate_batch", "EmbeddingGenerator.generate_batch of n uncached texts")
+def bench_generate_batch(n: int):
+    from src.retrieval.embeddings import EmbeddingGenerator
+
+    try:
+        generator = EmbeddingGenerator()
+        generator.generate("warm up")
+    except Exception as e:
+        raise SkipBenchmark(f"embedding model unavailable: {type(e).__name__}")
+    texts = list(synthetic_paragraphs(n, words=30))
+
+    def run():
+        generator.cache.clear()
+        generator.generate_batch(texts)
+    return run
+
+
+# --- Templates & validation ---
+
+@benchmark("ca1_template_construct", "CA1Template(**report) for n reports")
+def bench_template_construct(n: int):
+    from src.templates.ca1_template import CA1Template
+
+    reports = synthetic_reports(n)
+    return lambda: [CA1Template(**r) for r in reports]
+
+
+@benchmark("calculate_totals", "CA1Template.calculate_totals on n reports")
+def bench_calculate_totals(n: int):
+    templates = _templates(n)
+
+    def run():
+        for template in templates:
+            template.calculate_totals()
+    return run
+
+
+@benchmark("calculate_totals_batch", "CA1Batch.calculate_totals on n reports")
+def bench_calculate_totals_batch(n: int):
+    from src.templates.ca1_batch import CA1Batch
+
+    batch = CA1Batch.from_records(synthetic_reports(n))
+    return batch.calculate_totals
+
+
+@benchmark("validator_validate", "Validator.validate on n reports, one at a time")
+def bench_validate(n: int):
+    from src.validation.validator import Validator
+
+    validator = Validator()
+    templates = _templates(n)
+    return lambda: [validator.validate(t) for t in templates]
+
+
+@benchmark("validator_validate_batch", "Validator.validate_batch on n reports in one pass")
+def bench_validate_batch(n: int):
+    from src.templates.ca1_batch import CA1Batch
+    from src.validation.validator import Validator
+
+    validator = Validator()
+    batch = CA1Batch.from_templates(_templates(n))
+    return lambda: validator.validate_batch(batch)
+
+
+# --- Generation ---
+
+def _mock_report_json() -> str:
+    report = synthetic_reports(1)[0]
+    report["audit_trail"] = {}
+    return json.dumps(report)
+
+
+@benchmark("generate_report_mock", "CorepGenerator.generate_report (Mock provider, retrieval + parsing) x n")
+def bench_generate_mock(n: int):
+    from src.llm.generator import CorepGenerator
+
+    # Offline: hashing embeddings over a NumPy store instead of the registry's model and Chroma
+    generator = CorepGenerator(provider="Mock", use_cache=False, retriever=_numpy_retriever(200))
+    scenarios = [f"Bank {i} with £{100 + i}M paid up capital and £{i % 30}M goodwill" for i in range(n)]
+    return lambda: [generator.generate_report(s) for s in scenarios]
+
+
+_stub_server = None
+
+
+def _get_stub_server():
+    global _stub_server
+    if _stub_server is None:
+        from benchmarks.llm_stub_server import StubLLMServer
+        _stub_server = StubLLMServer(_mock_report_json()).start()
+        atexit.register(_stub_server.stop)
+    return _stub_server
+
+
+@benchmark("provider_complete_http", "OllamaProvider.complete against the local stub server, n concurrent calls")
+def bench_provider_http(n: int):
+    if n > 1000:
+        raise SkipBenchmark("more than 1000 concurrent calls is not meaningful against the local stub")
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        raise SkipBenchmark("openai SDK not installed")
+    import asyncio
+    from src.llm.providers import get_provider, run_sync
+
+    provider = get_provider("Ollama", "stub", base_url=_get_stub_server().base_url)
+
+    async def run_all():
+        await asyncio.gather(*(provider.complete("system", f"scenario {i}") for i in range(n)))
+    return lambda: run_sync(run_all())
@@ -0,0 +1,146 @@
+import heapq
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+ARTICLE_REF_PATTERN = re.compile(r"\d+(?:\([0-9a-z]+\))+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercases and splits on non-alphanumerics, so terms match whole words only
+    ("tier" does not match "tiered").
+    Article references like "36(1)(b)" are also kept whole, with their prefixes
+    ("36(1)"), so a query for a specific point outranks other points of the same article.
+    """
+    lowered = text.lower()
+    tokens = TOKEN_PATTERN.findall(lowered)
+    for ref in ARTICLE_REF_PATTERN.findall(lowered):
+        parts = ref.split("(")
+        tokens.extend("(".join(parts[:i]) for i in range(2, len(parts) + 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+    Built from a list of texts; documents are referred to by their position in that list.
+    `reindex` moves to a new list, tokenising only the texts that were not indexed before.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(doc_idx, term_freq)]
+        self.idf: Dict[str, float] = {}
+        self.doc_lengths: List[int] = []
+        self.signature: Optional[str] = None  # Caller-defined fingerprint of the indexed corpus
+        self._length_norms: List[float] = []
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def build(self, texts: List[str], signature: str = None):
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = []
+
+        for doc_idx, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_idx, freq))
+
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.signature = signature
+        self._finalize()
+        return self
+
+    def reindex(self, texts: List[str], previous: List[Optional[int]], signature: str = None) -> "BM25Index":
+        """
+        New index over `texts`, equal to build(texts). `previous[i]` is the position
+        document i had in this index if its text is unchanged (its postings are reused),
+        or None for a new or edited text, which is tokenised.
+        """
+        moved = {old: new for new, old in enumerate(previous) if old is not None}
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for term, docs in self.postings.items():
+            kept = [(moved[doc_idx], freq) for doc_idx, freq in docs if doc_idx in moved]
+            if kept:
+                postings[term] = kept
+
+        doc_lengths = []
+        for doc_idx, (text, old) in enumerate(zip(texts, previous)):
+            if old is not None:
+                doc_lengths.append(self.doc_lengths[old])
+                continue
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_idx, freq))
+        # Same posting order as build(), so ties and saved indexes match a full rebuild
+        for docs in postings.values():
+            docs.sort()
+
+        index = BM25Index(k1=self.k1, b=self.b)
+        index.postings = postings
+        index.doc_lengths = doc_lengths
+        index.signature = signature
+        index._finalize()
+        return index
+
+    def _finalize(self):
+        """Precomputes IDF per term and the length normalisation per document."""
+        n_docs = len(self.doc_lengths)
+        avgdl = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self._length_norms = [
+            self.k1 * (1 - self.b + self.b * (dl / avgdl if avgdl else 0.0))
+            for dl in self.doc_lengths
+        ]
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Returns up to top_k (doc_idx, score) pairs, best first. Documents sharing
+        no term with the query are never returned.
+        """
+        scores: Dict[int, float] = {}
+        k1_plus_1 = self.k1 + 1
+
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_idx, freq in docs:
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * (freq * k1_plus_1) / (freq + self._length_norms[doc_idx])
+
+        # Heap selection; ties go to the earlier document
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return top
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "signature": self.signature,
+                "doc_lengths": self.doc_lengths,
+                "postings": self.postings,
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.signature = data.get("signature")
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {term: [tuple(p) for p in docs] for term, docs in data["postings"].items()}
+        index._finalize()
+        return index
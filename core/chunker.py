@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_CHUNK_CACHE_DIR = os.path.join("data", "cache", "chunks")
+
+_SOURCE_HEADER = re.compile(r"^Source:\s*(\S.*)$")
+_ARTICLE = re.compile(r"^(Article\s+\d+[a-z]?)\b[\s.:\-–]*(.*)$", re.IGNORECASE)
+_PARAGRAPH = re.compile(r"^(\d{1,3})\.\s+\S")
+_POINT = re.compile(r"^\(([a-z]{1,2}|[ivx]{1,5})\)\s+\S")
+# Sentence ends, but not the "2." of a paragraph number
+_SENTENCE_END = re.compile(r"(?<=[^\d\s][.;:])\s+")
+
+
+class _Segment:
+    __slots__ = ("text", "paragraph", "point")
+
+    def __init__(self, text: str, paragraph: Optional[str], point: Optional[str]):
+        self.text = text
+        self.paragraph = paragraph
+        self.point = point
+
+
+class RulebookChunker:
+    """
+    Splits rulebook text on its structure rather than on blank lines:
+      - "Article N" lines start a new article; chunks never span two articles;
+      - "1." paragraphs and "(a)" points start new segments, labelled with their position;
+      - other short fragments (dates, link text, sentence tails split by markup) are
+        merged into the segment they belong to;
+      - segments are packed into chunks of at most `max_chars`, repeating up to
+        `overlap_chars` of trailing segments at the start of the next chunk.
+    Chunks follow the pra_rulebook_kb.json schema (article, section, text, tags,
+    template_rows, hierarchy, effective_date) plus a stable "id", "source" and "chunk_index".
+    """
+    def __init__(self, max_chars: int = 1500, overlap_chars: int = 200, min_segment_chars: int = 80):
+        self.max_chars = max_chars
+        self.overlap_chars = overlap_chars
+        self.min_segment_chars = min_segment_chars
+
+    @property
+    def config_key(self) -> str:
+        """Changes whenever chunking would produce different output for the same file."""
+        return f"v1-{self.max_chars}-{self.overlap_chars}-{self.min_segment_chars}"
+
+    def chunk_text(self, text: str, source: str = "") -> List[Dict[str, Any]]:
+        source_url, blocks = split_articles(text)
+        chunks = []
+        for block in blocks:
+            chunks.extend(self.chunk_article(block, source, source_url))
+        self._assign_ids(chunks, source)
+        return chunks
+
+    def chunk_article(self, block: List[str], source: str = "", source_url: str = "") -> List[Dict[str, Any]]:
+        """
+        Chunks of one article block from split_articles, without "id" / "chunk_index"
+        (assigned per file). Articles are chunked independently of each other.
+        """
+        label, title, segments = "", "", []
+        paragraph = point = None
+        for line in block:
+            article = _ARTICLE.match(line)
+            if article and not segments:
+                label = "Article " + article.group(1).split()[-1]
+                title = article.group(2).strip()
+                segments = [_Segment(line, None, None)]
+                continue
+
+            if _PARAGRAPH.match(line):
+                paragraph, point = _PARAGRAPH.match(line).group(1), None
+            elif _POINT.match(line):
+                point = _POINT.match(line).group(1)
+            elif segments and self._continues(segments[-1].text, line):
+                segments[-1].text += " " + line
+                continue
+            segments.append(_Segment(line, paragraph, point))
+
+        return [self._make_chunk(group, label, title, source, source_url) for group in self._pack(segments)]
+
+    def _continues(self, previous: str, line: str) -> bool:
+        # Fragments split off by inline markup start lower case or with punctuation
+        return len(previous) < self.min_segment_chars or not (line[0].isupper() or line[0].isdigit() or line[0] == "(")
+
+    def _pack(self, segments: List[_Segment]) -> List[List[_Segment]]:
+        pieces = []
+        for segment in segments:
+            if len(segment.text) <= self.max_chars:
+                pieces.append(segment)
+            else:
+                pieces.extend(_Segment(text, segment.paragraph, segment.point) for text in self._split_long(segment.text))
+
+        groups, current, size = [], [], 0
+        for piece in pieces:
+            cost = len(piece.text) + 1
+            if current and size + cost > self.max_chars:
+                groups.append(current)
+                # Overlap: repeat the trailing segments of the previous chunk
+                carry, carried = [], 0
+                for previous in reversed(current):
+                    if carried + len(previous.text) + 1 > self.overlap_chars:
+                        break
+                    carry.insert(0, previous)
+                    carried += len(previous.text) + 1
+                if carried + cost > self.max_chars:
+                    carry, carried = [], 0
+                current, size = carry, carried
+            current.append(piece)
+            size += cost
+        if current:
+            groups.append(current)
+        return groups
+
+    def _split_long(self, text: str) -> List[str]:
+        """Sentence-packed pieces of an oversized segment; single huge sentences are cut on words."""
+        sentences = []
+        for sentence in _SENTENCE_END.split(text):
+            while len(sentence) > self.max_chars:
+                cut = sentence.rfind(" ", 0, self.max_chars)
+                cut = cut if cut > 0 else self.max_chars
+                sentences.append(sentence[:cut])
+                sentence = sentence[cut:].strip()
+            if sentence:
+                sentences.append(sentence)
+
+        pieces, current = [], ""
+        for sentence in sentences:
+            if current and len(current) + 1 + len(sentence) > self.max_chars:
+                pieces.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+        return pieces
+
+    @staticmethod
+    def _make_chunk(group: List[_Segment], label: str, title: str, source: str, source_url: str) -> Dict[str, Any]:
+        first = next((s for s in group if s.paragraph or s.point), group[0])
+        article = f"{label}({first.paragraph})" if label and first.paragraph else label
+        hierarchy = [part for part in (label, first.paragraph, f"({first.point})" if first.point else None) if part]
+        return {
+            "article": article,
+            "section": title,
+            "text": "\n".join(s.text for s in group),
+            "tags": [],
+            "template_rows": [],
+            "hierarchy": " > ".join(hierarchy),
+            "effective_date": "",
+            "source": source,
+            "source_url": source_url,
+        }
+
+    @staticmethod
+    def _assign_ids(chunks: List[Dict[str, Any]], source: str):
+        # Content-derived, so an unchanged chunk keeps its ID when other parts of the file change
+        stem = os.path.splitext(os.path.basename(source))[0] or "text"
+        seen: Dict[str, int] = {}
+        for i, chunk in enumerate(chunks):
+            digest = hashlib.sha256(f"{chunk['article']}\x00{chunk['text']}".encode("utf-8")).hexdigest()[:12]
+            slug = re.sub(r"[^a-z0-9]+", "-", chunk["article"].lower()).strip("-") or "text"
+            chunk_id = f"{stem}:{slug}:{digest}"
+            seen[chunk_id] = seen.get(chunk_id, 0) + 1
+            chunk["id"] = chunk_id if seen[chunk_id] == 1 else f"{chunk_id}-{seen[chunk_id]}"
+            chunk["chunk_index"] = i
+
+
+def split_articles(text: str) -> Tuple[str, List[List[str]]]:
+    """
+    (source URL, article blocks): the normalised non-empty lines of the text, split
+    before every "Article N" line. Text ahead of the first article is its own block.
+    """
+    source_url = ""
+    blocks: List[List[str]] = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        header = _SOURCE_HEADER.match(line)
+        if header and not source_url and not blocks:
+            source_url = header.group(1)
+            continue
+        if _ARTICLE.match(line) or not blocks:
+            blocks.append([])
+        blocks[-1].append(line)
+    return source_url, blocks
+
+
+class ChunkCache:
+    """
+    Chunked output on disk: whole files keyed on their content hash, and single
+    articles keyed on the article text, both with the chunker settings.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CHUNK_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, chunks: List[Dict[str, Any]]):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        os.replace(tmp_path, path)
+
+
+def file_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def chunk_file(path: str, chunker: RulebookChunker, cache: Optional[ChunkCache] = None):
+    """
+    Returns (chunks, content_hash, cached). Unchanged files are served from `cache`
+    without being decoded or chunked again. In a changed file only the articles
+    whose paragraphs changed are chunked; the others come from the article cache.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    content_hash = file_hash(content)
+    key = hashlib.sha256(f"{content_hash}:{chunker.config_key}".encode("utf-8")).hexdigest()[:32]
+    if cache is not None:
+        chunks = cache.get(key)
+        if chunks is not None:
+            return chunks, content_hash, True
+
+    source = os.path.basename(path)
+    if cache is None:
+        return chunker.chunk_text(content.decode("utf-8"), source=source), content_hash, False
+
+    source_url, blocks = split_articles(content.decode("utf-8"))
+    chunks = []
+    for block in blocks:
+        article_key = _cache_key("article", chunker.config_key, source, source_url, *block)
+        article_chunks = cache.get(article_key)
+        if article_chunks is None:
+            article_chunks = chunker.chunk_article(block, source, source_url)
+            cache.set(article_key, article_chunks)
+        chunks.extend(article_chunks)
+    chunker._assign_ids(chunks, source)
+    cache.set(key, chunks)
+    return chunks, content_hash, False
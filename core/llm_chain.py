@@ -1,76 +1,53 @@
+import asyncio
 import os
+import sys
 import json
 from typing import Dict, Any
 from .models import OwnFundsTemplate, AuditLogItem, RuleReference
 from .rag import RAGPipeline
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
-
-import sys
-# Attempt to handle environment mismatch where pip installs to User Roaming but python doesn't see it.
-# Check for common user site-package locations (Windows)
-import site
-try:
-    user_site_packages = site.getusersitepackages()
-    if user_site_packages not in sys.path:
-        sys.path.append(user_site_packages)
-    
-    # Explicit fallback based on user's pip output
-    fallback_path = os.path.expanduser("~\\AppData\\Roaming\\Python\\Python313\\site-packages")
-    if os.path.exists(fallback_path) and fallback_path not in sys.path:
-        sys.path.append(fallback_path)
-except Exception:
-    pass
-
-try:
-    from anthropic import Anthropic
-except ImportError as e:
-    print(f"DEBUG: Failed to import anthropic: {e}")
-    Anthropic = None
-
-try:
-    import google.generativeai as genai
-except ImportError as e:
-    print(f"DEBUG: Failed to import google.generativeai: {e}")
-    genai = None
+from src.llm.providers import get_provider, run_sync
+from src.llm.token_budget import ContextBudget, TokenCounter, DEFAULT_CONTEXT_BUDGET, log_usage
 
 class CorepLLMChain:
-    def __init__(self, api_key: str = None, provider: str = "OpenAI", base_url: str = None, model_name: str = "gpt-4o"):
-        self.rag = RAGPipeline()
+    def __init__(self, api_key: str = None, provider: str = "OpenAI", base_url: str = None, model_name: str = "gpt-4o",
+                 context_token_budget: int = DEFAULT_CONTEXT_BUDGET, rag: RAGPipeline = None):
+        self.rag = rag or RAGPipeline()
+        # Scraped paragraphs can be very long; context is compressed to a fixed token budget
+        self.token_counter = TokenCounter(model_name)
+        self.context_budget = ContextBudget(self.token_counter, budget=context_token_budget)
         self.provider = provider
         self.model_name = model_name
         self.api_key = api_key or os.getenv("LLM_API_KEY")
         
-        self.client = None
+        self.llm = None
         self.base_url = None
 
         if self.provider == "Ollama":
             sys.stderr.write(f"Initializing Ollama... Check if server is running at {base_url}\n")
             self.base_url = base_url or "http://localhost:11434/v1"
             self.api_key = "ollama" 
-            if OpenAI:
-                self.client = OpenAI(base_url=self.base_url, api_key=self.api_key)
+            self.llm = self._init_provider()
 
-        elif self.provider == "Anthropic":
-            if Anthropic and self.api_key:
-                self.client = Anthropic(api_key=self.api_key)
+        elif self.provider in ("OpenAI", "Anthropic", "Gemini"):
+            if self.api_key:
+                self.llm = self._init_provider()
         
-        elif self.provider == "Gemini":
-            if genai and self.api_key:
-                genai.configure(api_key=self.api_key)
-                self.client = "gemini_configured" # client is the module itself essentially
-            elif not genai:
-                print("Warning: google-generativeai library missing.")
+        # Mock mode doesn't need a provider
 
-        elif self.provider == "OpenAI":
-            if OpenAI and self.api_key:
-                self.client = OpenAI(api_key=self.api_key)
-        
-        # Mock mode doesn't need client
+    def _init_provider(self):
+        try:
+            return get_provider(self.provider, self.model_name, api_key=self.api_key, base_url=self.base_url)
+        except ImportError as e:
+            print(f"Warning: {e}")
+            return None
 
     def process_scenario(self, scenario: str) -> Dict[str, Any]:
+        """
+        Blocking wrapper around aprocess_scenario.
+        """
+        return run_sync(self.aprocess_scenario(scenario))
+
+    async def aprocess_scenario(self, scenario: str) -> Dict[str, Any]:
         """
         Main pipeline:
         1. Parse scenario.
@@ -80,7 +57,11 @@ class CorepLLMChain:
         """
         # 1. Retrieve Rules
         search_query = f"Own funds capital classification {scenario}"
-        retrieved_docs = self.rag.retrieve(search_query, top_k=5)
+        # Embedding + search are blocking, keep them off the event loop
+        retrieved_docs = await asyncio.to_thread(self.rag.retrieve, search_query, top_k=5)
+        retrieved_docs, stats = self.context_budget.select(retrieved_docs, scenario)
+        log_usage("Context", stats["tokens_in"], stats["tokens_out"],
+                  f"{stats['chunks_out']}/{stats['chunks_in']} chunks, budget {self.context_budget.budget}")
         context_str = "\n\n".join([f"source: {d['source']}\ncontent: {d['text']}" for d in retrieved_docs])
 
         # 2. Construct Prompt (System)
@@ -119,7 +100,7 @@ RELEVANT PRA RULEBOOK CONTEXT:
 Generate the Regulatory Report JSON:
 """
 
-        if not self.client and self.provider != "Mock":
+        if not self.llm and self.provider != "Mock":
              # If provider is not Mock but client failed, fall back to mock with warning
              print("Client not initialized. Falling back to mock.")
              return self._mock_response(scenario)
@@ -128,44 +109,10 @@ Generate the Regulatory Report JSON:
              return self._mock_response(scenario)
 
         try:
-            result_json = ""
-            
-            if self.provider == "Anthropic":
-                message = self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=4000,
-                    system=system_prompt,
-                    messages=[{"role": "user", "content": user_prompt}]
-                )
-                result_json = message.content[0].text
-            
-            elif self.provider == "Gemini":
-                try:
-                    # Only some models support system instructions, but we can pass it in user prompt for compatibility
-                    model = genai.GenerativeModel(self.model_name)
-                    # Combine system and user prompt for robustness
-                    full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                    response = model.generate_content(full_prompt, generation_config={"response_mime_type": "application/json"})
-                    result_json = response.text
-                except Exception as e:
-                    if "404" in str(e):
-                        print(f"Gemini Model '{self.model_name}' not found. Available models:")
-                        for m in genai.list_models():
-                            if 'generateContent' in m.supported_generation_methods:
-                                print(f"- {m.name}")
-                    raise e
-
-            else: # OpenAI / Ollama
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    response_format={"type": "json_object"},
-                    temperature=0.0
-                )
-                result_json = response.choices[0].message.content
+            result_json = await self.llm.complete(system_prompt, user_prompt)
+            log_usage(f"LLM {self.provider}/{self.model_name}",
+                      self.token_counter.count(system_prompt) + self.token_counter.count(user_prompt),
+                      self.token_counter.count(result_json))
             
             # Clean JSON
             if "{" in result_json:
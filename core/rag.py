@@ -1,61 +1,120 @@
+import hashlib
 import os
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .bm25 import BM25Index
+from .chunker import RulebookChunker, ChunkCache, DEFAULT_CHUNK_CACHE_DIR, chunk_file
+from src.retrieval.result_cache import RetrievalCache, create_retrieval_cache
 
 class RAGPipeline:
-    def __init__(self, data_dir="data/rules"):
+    def __init__(self, data_dir="data/rules", index_path=None, chunker: RulebookChunker = None,
+                 chunk_cache_dir=DEFAULT_CHUNK_CACHE_DIR, result_cache: RetrievalCache = None,
+                 use_result_cache: bool = True):
         self.data_dir = data_dir
+        # Optional on-disk copy of the BM25 index, reused while the rule files are unchanged
+        self.index_path = index_path
+        self.chunker = chunker or RulebookChunker()
+        # Chunked files keyed on their content hash; None disables the cache
+        self.chunk_cache = ChunkCache(chunk_cache_dir) if chunk_cache_dir else None
+        # Results keyed on the index signature, so re-ingesting changed files invalidates them
+        self.result_cache = (result_cache or create_retrieval_cache()) if use_result_cache else None
         self.documents = []
+        self.index = BM25Index()
+        # File name -> (content hash, chunks) of the files in the index
+        self._files: Dict[str, Tuple[str, List[dict]]] = {}
         self.ingest_rules()
 
-    def ingest_rules(self):
+    def ingest_rules(self, changed_files: Optional[Iterable[str]] = None):
         """
-        Loads all text files from the data directory.
+        Loads all text files from the data directory, chunks them by article /
+        paragraph structure and builds the BM25 index. Unchanged files are served
+        from the chunk cache, and in a changed file only the articles whose paragraphs
+        changed are chunked again. On re-ingest, chunks already indexed keep their
+        postings; only new or edited chunks are tokenised.
+        `changed_files` (file names, see apply_crawl) limits reading to those files;
+        other files already ingested are reused as they are.
         """
-        self.documents = []
         if not os.path.exists(self.data_dir):
+            self.documents, self.index, self._files = [], BM25Index(), {}
             return
 
-        for filename in os.listdir(self.data_dir):
-            if filename.endswith(".txt"):
+        changed = set(changed_files) if changed_files is not None else None
+        files: Dict[str, Tuple[str, List[dict]]] = {}
+        corpus_hash = hashlib.sha256(self.chunker.config_key.encode("utf-8"))
+        cached_files = 0
+        for filename in sorted(os.listdir(self.data_dir)):
+            if not filename.endswith(".txt"):
+                continue
+            if changed is not None and filename not in changed and filename in self._files:
+                files[filename] = self._files[filename]
+                cached_files += 1
+            else:
                 path = os.path.join(self.data_dir, filename)
                 try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        # Simple chunking by paragraph (split by double newline)
-                        chunks = [c.strip() for c in content.split("\n\n") if c.strip()]
-                        for chunk in chunks:
-                            self.documents.append({
-                                "source": filename,
-                                "text": chunk
-                            })
+                    chunks, content_hash, cached = chunk_file(path, self.chunker, self.chunk_cache)
                 except Exception as e:
                     print(f"Error reading {filename}: {e}")
-        
-        print(f"Ingested {len(self.documents)} text chunks.")
+                    continue
+                files[filename] = (content_hash, chunks)
+                cached_files += cached
+            corpus_hash.update(filename.encode("utf-8"))
+            corpus_hash.update(files[filename][0].encode("ascii"))
+
+        previous_documents, previous_index = self.documents, self.index
+        self._files = files
+        self.documents = [chunk for _, chunks in files.values() for chunk in chunks]
+        self.index = self._load_or_build_index(corpus_hash.hexdigest(), previous_documents, previous_index)
+        print(f"Ingested {len(self.documents)} text chunks ({cached_files} file(s) unchanged or from the chunk cache).")
+
+    def apply_crawl(self, results: List[Dict[str, Any]]):
+        """
+        Re-ingests after RulebookCrawler.crawl (writing into this data_dir): only the
+        files of "updated" pages are read again, and within them only the articles
+        holding added / removed paragraphs are chunked and indexed again.
+        """
+        self.ingest_rules(changed_files=[os.path.basename(r["path"]) for r in results if r.get("status") == "updated"])
+
+    def _load_or_build_index(self, signature: str, previous_documents: List[dict], previous_index: BM25Index) -> BM25Index:
+        if previous_index.signature == signature and len(previous_index) == len(self.documents):
+            return previous_index
+
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                index = BM25Index.load(self.index_path)
+                if index.signature == signature and len(index) == len(self.documents):
+                    return index
+            except Exception as e:
+                print(f"Ignoring unreadable BM25 index {self.index_path}: {e}")
+
+        texts = [doc["text"] for doc in self.documents]
+        if len(previous_index) == len(previous_documents) and previous_documents:
+            # Chunk IDs are content-derived: an ID still present is the same text
+            positions = {doc["id"]: i for i, doc in enumerate(previous_documents)}
+            previous = [positions.get(doc["id"]) for doc in self.documents]
+            previous = [old if old is not None and previous_documents[old]["text"] == doc["text"] else None
+                        for old, doc in zip(previous, self.documents)]
+            index = previous_index.reindex(texts, previous, signature=signature)
+            print(f"BM25 index updated: {previous.count(None)} chunk(s) tokenised, {len(texts) - previous.count(None)} reused.")
+        else:
+            index = BM25Index().build(texts, signature=signature)
+        if self.index_path:
+            index.save(self.index_path)
+        return index
 
     def retrieve(self, query: str, top_k: int = 5) -> List[dict]:
         """
-        Simple keyword-based retrieval for the prototype.
-        In production, this would use vector embeddings (e.g., FAISS/Chroma).
+        BM25 keyword retrieval over the inverted index built at ingest time.
         """
         if not self.documents:
             return []
 
-        # Simple scoring: count query word overlaps
-        query_words = set(query.lower().split())
-        scored_docs = []
-
-        for doc in self.documents:
-            score = 0
-            doc_text_lower = doc["text"].lower()
-            for word in query_words:
-                if word in doc_text_lower:
-                    score += 1
-            
-            if score > 0:
-                scored_docs.append((score, doc))
-
-        # Sort by score descending
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        
-        return [item[1] for item in scored_docs[:top_k]]
+        key = RetrievalCache.make_key(f"bm25:{self.index.signature}", query, top_k) if self.result_cache else None
+        if key is not None:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        results = [self.documents[doc_idx] for doc_idx, _ in self.index.search(query, top_k)]
+        if key is not None:
+            self.result_cache.set(key, results)
+        return results
@@ -1,64 +1,235 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
 import requests
 from bs4 import BeautifulSoup
-import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Target URL for Own Funds rules (Example)
 PRA_RULEBOOK_URL = "https://www.bankofengland.co.uk/prudential-regulation/regulatory-reporting/regulatory-reporting-banking-sector"
 
-def fetch_pra_rules(output_dir="data/rules"):
+# Pages crawled by default: {"name" (output file stem), "url", optional "selector" (CSS, defaults to main/body)}
+DEFAULT_SOURCES = [
+    {"name": "pra_own_funds_scraped", "url": PRA_RULEBOOK_URL, "selector": "main"},
+]
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+STATE_FILENAME = ".scrape_state.json"
+BLOCK_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "dt", "dd", "td", "th", "pre", "blockquote"]
+_WHITESPACE = re.compile(r"\s+")
+
+
+def paragraph_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def extract_paragraphs(html: bytes, selector: Optional[str] = None) -> List[str]:
+    """
+    Text of the block elements (headings, paragraphs, list items, cells) under
+    `selector`, one entry per block. Inline markup such as links stays inside its
+    paragraph instead of splitting it.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    root = (soup.select_one(selector) if selector else None) or soup.find("main") or soup.find("body") or soup
+
+    paragraphs = []
+    for element in root.find_all(BLOCK_TAGS):
+        # Containers of other blocks (e.g. an <li> holding a nested list) are covered by their children
+        if element.find(BLOCK_TAGS) is not None:
+            continue
+        text = _WHITESPACE.sub(" ", element.get_text(" ", strip=True)).strip()
+        if text:
+            paragraphs.append(text)
+    if not paragraphs:
+        paragraphs = [p.strip() for p in root.get_text("\n\n", strip=True).split("\n\n") if p.strip()]
+    return paragraphs
+
+
+def diff_paragraphs(old_hashes: List[str], paragraphs: List[str]) -> Dict[str, Any]:
+    """
+    Paragraph-level diff against the hashes stored for the previous version:
+    {"added": [new paragraph texts], "removed": [hashes], "unchanged": count}.
+    """
+    old = set(old_hashes)
+    new_hashes = [paragraph_hash(p) for p in paragraphs]
+    new = set(new_hashes)
+    return {
+        "added": [p for p, h in zip(paragraphs, new_hashes) if h not in old],
+        "removed": [h for h in old_hashes if h not in new],
+        "unchanged": sum(1 for h in new_hashes if h in old),
+    }
+
+
+def create_session(pool_size: int = 4, retries: int = 2) -> requests.Session:
+    """Session with a connection pool sized for the crawler's workers and retries on transient errors."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET", "HEAD"]))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class RulebookCrawler:
     """
-    Fetches text content from the PRA CRD IV/CRR page as a proxy for the Rulebook.
-    Saves it to a text file.
+    Crawls a set of PRA / EBA pages in parallel over a pooled session and keeps
+    data/rules/<name>.txt in sync. Pages are revalidated with ETag / Last-Modified,
+    so unchanged pages cost a 304, and a page file is only rewritten when its
+    paragraphs changed. Each result lists the added / removed paragraphs; pass the
+    results to RAGPipeline.apply_crawl so that only those paragraphs' articles are
+    chunked and indexed again.
     """
-    print(f"Fetching rules from {PRA_RULEBOOK_URL}...")
-    
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        
+    def __init__(self, output_dir: str = "data/rules", sources: Optional[List[Dict[str, Any]]] = None,
+                 max_workers: int = 4, timeout: float = 10.0, session: requests.Session = None):
+        self.output_dir = output_dir
+        self.sources = sources or DEFAULT_SOURCES
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = session or create_session(pool_size=max_workers)
+        self.state_path = os.path.join(output_dir, STATE_FILENAME)
+        self._state_lock = threading.Lock()
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ignoring unreadable scrape state {self.state_path}: {e}")
+        return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def crawl(self) -> List[Dict[str, Any]]:
+        """
+        Fetches every source; one result per source with "status" of "updated",
+        "unchanged" (200 with identical paragraphs), "not_modified" (304) or "error".
+        A failing page does not stop the others.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rulebook-crawler") as executor:
+            results = list(executor.map(self._crawl_source, self.sources))
+        with self._state_lock:
+            self._save_state()
+
+        for r in results:
+            detail = r.get("error") or f"{len(r.get('added', []))} added, {len(r.get('removed', []))} removed"
+            print(f"{r['url']}: {r['status']} ({detail})")
+        return results
+
+    def _crawl_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
+        url = source["url"]
+        with self._state_lock:
+            previous = dict(self.state.get(url, {}))
+        result = {"name": source["name"], "url": url}
+
+        headers = {}
+        if not os.path.exists(previous.get("file", "")):
+            previous = {}  # Output removed locally: fetch the full page again
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                return dict(result, status="not_modified", added=[], removed=[],
+                            elapsed_s=round(time.perf_counter() - start, 4))
+            response.raise_for_status()
+            paragraphs = extract_paragraphs(response.content, source.get("selector"))
+        except Exception as e:
+            return dict(result, status="error", error=str(e), elapsed_s=round(time.perf_counter() - start, 4))
+
+        diff = diff_paragraphs(previous.get("paragraphs", []), paragraphs)
+        path = os.path.join(self.output_dir, f"{source['name']}.txt")
+        changed = bool(diff["added"] or diff["removed"]) or not os.path.exists(path)
+        if changed:
+            # One block per paragraph; RAGPipeline regroups them into article-level chunks
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"Source: {url}\n\n")
+                f.write("\n\n".join(paragraphs))
+
+        with self._state_lock:
+            self.state[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "paragraphs": [paragraph_hash(p) for p in paragraphs],
+                "file": path,
+                "fetched_at": time.time(),
+            }
+        return dict(result, status="updated" if changed else "unchanged", path=path,
+                    elapsed_s=round(time.perf_counter() - start, 4), **diff)
+
+    def close(self):
+        self.session.close()
+
+
+def load_sources(path: str) -> List[Dict[str, Any]]:
+    """JSON list of {"name", "url", "selector"?} page definitions."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_fallback(output_dir: str):
+    # Fallback: Create a dummy file if scraping fails so the app doesn't break
+    fallback_file = os.path.join(output_dir, "pra_own_funds_fallback.txt")
+    if not os.path.exists(fallback_file):
+        with open(fallback_file, "w", encoding="utf-8") as f:
+            f.write("Source: Fallback / Mock Data\n\n")
+            f.write("Article 26 Common Equity Tier 1 items\n")
+            f.write("1. Common Equity Tier 1 items of institutions consist of the following:\n")
+            f.write("(a) capital instruments, provided that the conditions laid down in Article 28 or, where applicable, Article 29 are met;\n")
+            f.write("(b) share premium accounts related to the instruments referred to in point (a);\n")
+            f.write("(c) retained earnings;\n")
+            f.write("(d) accumulated other comprehensive income;\n")
+            f.write("(e) other reserves;\n")
+            f.write("(f) funds for general banking risk.\n")
+        print("Created fallback rule file.")
+
+
+def fetch_pra_rules(output_dir="data/rules", sources=None, max_workers=4, rag=None):
+    """
+    Crawls the rulebook pages into `output_dir`. Returns True if at least one page
+    was fetched (or revalidated); if all fail, a fallback rule file is created.
+    A RAGPipeline over `output_dir` passed as `rag` is updated with the changes.
+    """
+    print(f"Fetching rules from {len(sources or DEFAULT_SOURCES)} page(s)...")
+    crawler = RulebookCrawler(output_dir, sources=sources, max_workers=max_workers)
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(PRA_RULEBOOK_URL, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract main content text
-        # This is a heuristic; actual structure depends on the specific page
-        main_content = soup.find('main') or soup.find('body')
-        
-        if main_content:
-            text = main_content.get_text(separator="\n\n", strip=True)
-            
-            filename = os.path.join(output_dir, "pra_own_funds_scraped.txt")
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(f"Source: {PRA_RULEBOOK_URL}\n\n")
-                f.write(text)
-            
-            print(f"Successfully saved rules to {filename}")
-            return True
-        else:
-            print("Could not find main content.")
-            return False
-            
-    except Exception as e:
-        print(f"Error scraping rules: {e}")
-        # Fallback: Create a dummy file if scraping fails so the app doesn't break
-        fallback_file = os.path.join(output_dir, "pra_own_funds_fallback.txt")
-        if not os.path.exists(fallback_file):
-            with open(fallback_file, "w", encoding="utf-8") as f:
-                f.write("Source: Fallback / Mock Data\n\n")
-                f.write("Article 26 Common Equity Tier 1 items\n")
-                f.write("1. Common Equity Tier 1 items of institutions consist of the following:\n")
-                f.write("(a) capital instruments, provided that the conditions laid down in Article 28 or, where applicable, Article 29 are met;\n")
-                f.write("(b) share premium accounts related to the instruments referred to in point (a);\n")
-                f.write("(c) retained earnings;\n")
-                f.write("(d) accumulated other comprehensive income;\n")
-                f.write("(e) other reserves;\n")
-                f.write("(f) funds for general banking risk.\n")
-            print("Created fallback rule file.")
-        return False
+        results = crawler.crawl()
+    finally:
+        crawler.close()
+    if rag is not None:
+        rag.apply_crawl(results)
+    if any(r["status"] != "error" for r in results):
+        return True
+    _write_fallback(output_dir)
+    return False
+
 
 if __name__ == "__main__":
-    fetch_pra_rules()
+    parser = argparse.ArgumentParser(description="Crawl PRA / EBA rulebook pages into data/rules.")
+    parser.add_argument("--sources", default=None, help="JSON list of {name, url, selector} pages (defaults to the PRA page)")
+    parser.add_argument("--output-dir", default="data/rules")
+    parser.add_argument("--workers", type=int, default=4, help="Pages fetched in parallel")
+    args = parser.parse_args()
+    fetch_pra_rules(args.output_dir, sources=load_sources(args.sources) if args.sources else None, max_workers=args.workers)
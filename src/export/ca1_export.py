@@ -0,0 +1,249 @@
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.templates.ca1_batch import CA1Batch, CA1_COLUMNS, CA1_FIELDS
+from src.templates.ca1_template import CA1Template
+from src.templates.mapping import STRUCTURE_PATH
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+XBRL_CSV_DOCUMENT_TYPE = "https://xbrl.org/2021/xbrl-csv"
+REPORT_PACKAGE_DOCUMENT_TYPE = "https://xbrl.org/report-package/2023"
+# EBA COREP own funds module; set to the taxonomy release being filed
+DEFAULT_ENTRY_POINT = "http://www.eba.europa.eu/eu/fr/xbrl/crr/fws/corep/4.0/mod/corep_of.json"
+
+
+def dpm_coordinates(structure_path: str = STRUCTURE_PATH) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Returns (template code, [(row code, column code)]) from ca1_template_structure.json,
+    aligned with CA1_COLUMNS: row '010' in the template's amount column -> ('r0010', 'c0010').
+    A row may name its own "column"; otherwise the template's single column is used.
+    """
+    with open(structure_path, "r", encoding="utf-8") as f:
+        structure = json.load(f)
+    rows = {field["row"]: field for field in structure["fields"]}
+    columns = [column["column"] for column in structure.get("columns", [])]
+
+    missing = [row for row in CA1_COLUMNS if row not in rows]
+    if missing:
+        raise ValueError(f"Rows {missing} are not defined in {structure_path}")
+    coordinates = []
+    for row in CA1_COLUMNS:
+        column = rows[row].get("column") or (columns[0] if len(columns) == 1 else None)
+        if column is None:
+            raise ValueError(f"Row {row} in {structure_path} has no column and the template does not define exactly one")
+        coordinates.append((f"r{row.zfill(4)}", f"c{column.zfill(4)}"))
+    return structure["template_code"], coordinates
+
+
+def load_datapoints(structure_path: str = STRUCTURE_PATH) -> Dict[str, str]:
+    """Row ID -> taxonomy datapoint ID, for the rows of ca1_template_structure.json that carry one."""
+    with open(structure_path, "r", encoding="utf-8") as f:
+        structure = json.load(f)
+    return {field["row"]: field["datapoint"] for field in structure["fields"] if field.get("datapoint")}
+
+
+class _ChunkedExporter:
+    """
+    Buffers reports into CA1Batch row groups of `row_group_size` and writes each
+    group in one columnar operation, so memory is bounded by the group size.
+    """
+    def __init__(self, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be >= 1")
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._records: List[Dict[str, Any]] = []
+        self._entity_ids: List[str] = []
+        self._dates: List[Optional[str]] = []
+
+    def add(self, report: Union[CA1Template, Dict[str, Any]], entity_id: str, reporting_date: Optional[str] = None):
+        """Queues one report (a CA1Template or a generate_report dict)."""
+        if isinstance(report, CA1Template):
+            report = {field: getattr(report, field) for field in CA1_FIELDS}
+        self._records.append(report)
+        self._entity_ids.append(str(entity_id))
+        self._dates.append(reporting_date)
+        if len(self._records) >= self.row_group_size:
+            self.flush()
+
+    def write_batch(self, batch: CA1Batch, reporting_dates: Optional[List[Optional[str]]] = None):
+        """Writes an existing CA1Batch directly (pending single reports are flushed first)."""
+        self.flush()
+        dates = reporting_dates or [None] * len(batch)
+        for start in range(0, len(batch), self.row_group_size):
+            end = start + self.row_group_size
+            group = CA1Batch(batch.values[start:end], batch.entity_ids[start:end])
+            self._write_group(group, dates[start:end])
+
+    def flush(self):
+        if not self._records:
+            return
+        group = CA1Batch.from_records(self._records, self._entity_ids)
+        dates = self._dates
+        self._records, self._entity_ids, self._dates = [], [], []
+        self._write_group(group, dates)
+
+    def _write_group(self, batch: CA1Batch, reporting_dates: List[Optional[str]]):
+        self._write(batch, reporting_dates)
+        self.rows_written += len(batch)
+
+    def _write(self, batch: CA1Batch, reporting_dates: List[Optional[str]]):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetExporter(_ChunkedExporter):
+    """
+    Writes reports to a Parquet file (one column per CA1 field plus entity_id and
+    reporting_date), one row group per `row_group_size` reports. Requires pyarrow.
+    """
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, compression: str = "zstd"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+        super().__init__(row_group_size)
+        self.path = path
+        self.compression = compression
+        self._writer = None
+
+    def _write(self, batch: CA1Batch, reporting_dates: List[Optional[str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = batch.to_arrow()
+        table = table.add_column(1, "reporting_date", pa.array(reporting_dates, type=pa.string()))
+        if self._writer is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self._writer.write_table(table, row_group_size=len(batch))
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class DPMFactsCSVExporter(_ChunkedExporter):
+    """
+    Writes reports as a flat table of C 01.00 facts addressed by DPM coordinates:
+      <directory>/c_01.00.csv - one fact per line: entity, period, template, row, column, value
+    Row/column codes are read from ca1_template_structure.json (r0010 / c0010).
+
+    This is not a submittable EBA xBRL-CSV report package: it carries no taxonomy
+    entry point, datapoint IDs, parameters.csv or FilingIndicators.csv, and all
+    entities share one file. It is meant as input for a filing tool that maps DPM
+    coordinates to the taxonomy's datapoints and builds one package per entity and period.
+    """
+    HEADER = ["entity_id", "reporting_date", "template", "row", "column", "value"]
+
+    def __init__(self, directory: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 structure_path: str = STRUCTURE_PATH):
+        super().__init__(row_group_size)
+        self.directory = directory
+        self.template_code, coordinates = dpm_coordinates(structure_path)
+        self.row_codes = [row for row, _ in coordinates]
+        self.column_codes = [column for _, column in coordinates]
+        os.makedirs(directory, exist_ok=True)
+        self.table_path = os.path.join(directory, f"{self.template_code.lower()}.csv")
+        self._file = open(self.table_path, "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(self.HEADER)
+
+    def _write(self, batch: CA1Batch, reporting_dates: List[Optional[str]]):
+        n, k = batch.values.shape
+        # Facts in entity-major order: each entity's rows are contiguous
+        entity_ids = np.repeat(np.array(batch.entity_ids, dtype=object), k)
+        dates = np.repeat(np.array([d or "" for d in reporting_dates], dtype=object), k)
+        rows = self.row_codes * n
+        columns = self.column_codes * n
+        values = batch.values.ravel(order="C").tolist()
+        self._csv.writerows(zip(entity_ids, dates, [self.template_code] * (n * k), rows, columns, values))
+
+    def close(self):
+        super().close()
+        if not self._file.closed:
+            self._file.close()
+
+
+
+class XBRLCSVExporter(_ChunkedExporter):
+    """
+    Writes one xBRL-CSV report package per report (entity and period):
+      <directory>/<entity>_<date>_C_01.00.zip
+        <stem>/META-INF/reportPackage.json
+        <stem>/reports/report.json           metadata: xBRL-CSV document extending `entry_point`
+        <stem>/reports/parameters.csv        entityID, refPeriod, baseCurrency, decimalsMonetary
+        <stem>/reports/FilingIndicators.csv  C_01.00 reported
+        <stem>/reports/c_01.00.csv           datapoint,factValue
+    Datapoints are the "datapoint" IDs of the rows in ca1_template_structure.json.
+    Rows without one are keyed by their DPM cell code (r0010c0010), which the
+    taxonomy does not resolve: fill in the IDs of the release being filed before
+    submitting. Every report needs a reporting date (refPeriod).
+    """
+    def __init__(self, directory: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 structure_path: str = STRUCTURE_PATH, entry_point: str = DEFAULT_ENTRY_POINT,
+                 entity_scheme: str = "lei", currency: str = "GBP", decimals: int = 0):
+        super().__init__(row_group_size)
+        self.directory = directory
+        self.entry_point = entry_point
+        self.entity_scheme = entity_scheme
+        self.currency = currency
+        self.decimals = decimals
+        self.template_code, coordinates = dpm_coordinates(structure_path)
+        datapoints = load_datapoints(structure_path)
+        self.datapoints = [datapoints.get(row) or f"{row_code}{column_code}"
+                           for row, (row_code, column_code) in zip(CA1_COLUMNS, coordinates)]
+        self.paths: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, batch: CA1Batch, reporting_dates: List[Optional[str]]):
+        for entity_id, reporting_date, values in zip(batch.entity_ids, reporting_dates, batch.values.tolist()):
+            if not reporting_date:
+                raise ValueError(f"xBRL-CSV package for {entity_id} needs a reporting_date (refPeriod)")
+            self.paths.append(self._write_package(entity_id, reporting_date, values))
+
+    def _write_package(self, entity_id: str, reporting_date: str, values: List[float]) -> str:
+        stem = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{entity_id}_{reporting_date}_{self.template_code}")
+        table = f"{self.template_code.lower()}.csv"
+        entity = entity_id if ":" in entity_id else f"{self.entity_scheme}:{entity_id}"
+        files = {
+            "META-INF/reportPackage.json": json.dumps({"documentInfo": {"documentType": REPORT_PACKAGE_DOCUMENT_TYPE}}, indent=2),
+            "reports/report.json": json.dumps({"documentInfo": {"documentType": XBRL_CSV_DOCUMENT_TYPE,
+                                                                "extends": [self.entry_point]}}, indent=2),
+            "reports/parameters.csv": self._csv([["name", "value"], ["entityID", entity], ["refPeriod", reporting_date],
+                                                 ["baseCurrency", f"iso4217:{self.currency}"],
+                                                 ["decimalsMonetary", self.decimals]]),
+            "reports/FilingIndicators.csv": self._csv([["templateID", "reported"], [self.template_code, "true"]]),
+            f"reports/{table}": self._csv([["datapoint", "factValue"]] + [
+                [datapoint, f"{value:.{max(self.decimals, 0)}f}"] for datapoint, value in zip(self.datapoints, values)
+            ]),
+        }
+        path = os.path.join(self.directory, f"{stem}.zip")
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+            for name, content in files.items():
+                package.writestr(f"{stem}/{name}", content)
+        return path
+
+    @staticmethod
+    def _csv(rows: List[list]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
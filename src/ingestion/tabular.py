@@ -0,0 +1,270 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, Any, Iterator, Optional, Union, IO
+
+from src.templates.mapping import INPUT_FIELD_MAP
+
+DEFAULT_CHUNK_SIZE = 5000
+# Unsorted long files hold one running total per entity until EOF; warn past this many
+LONG_ENTITY_WARNING_THRESHOLD = 10000
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+# Normalised header / account name -> canonical key. Canonical input_data keys
+# (INPUT_FIELD_MAP) and identifier keys always map to themselves.
+HEADER_ALIASES = {
+    # Identifiers
+    "id": "scenario_id",
+    "entity_id": "scenario_id",
+    "lei": "lei_code",
+    "entity_lei": "lei_code",
+    "legal_entity_identifier": "lei_code",
+    "period": "reporting_date",
+    "reporting_period": "reporting_date",
+    "period_end": "reporting_date",
+    "date": "reporting_date",
+    "entity": "bank_name",
+    "entity_name": "bank_name",
+    "bank": "bank_name",
+    "institution": "bank_name",
+    "currency": "reporting_currency",
+    # Long (trial balance) layout
+    "account": "account",
+    "account_name": "account",
+    "gl_account": "account",
+    "line_item": "account",
+    "item": "account",
+    "amount": "amount",
+    "balance": "amount",
+    "value": "amount",
+    "closing_balance": "amount",
+    # Financial lines
+    "paid_up_capital": "paid_up_capital_instruments",
+    "share_capital": "paid_up_capital_instruments",
+    "ordinary_share_capital": "paid_up_capital_instruments",
+    "cet1_share_premium": "share_premium",
+    "own_shares": "own_cet1_instruments",
+    "treasury_shares": "own_cet1_instruments",
+    "retained_earnings": "retained_earnings_previous",
+    "retained_earnings_brought_forward": "retained_earnings_previous",
+    "profit_for_the_year": "current_year_profit",
+    "current_year_earnings": "current_year_profit",
+    "interim_dividends": "interim_dividends_paid",
+    "oci": "accumulated_oci",
+    "aoci": "accumulated_oci",
+    "intangible_assets": "other_intangible_assets",
+    "intangibles": "other_intangible_assets",
+    "dta": "deferred_tax_assets",
+    "at1_instruments": "at1_capital_instruments",
+    "additional_tier_1_instruments": "at1_capital_instruments",
+    "tier_2_subordinated_loans": "t2_subordinated_loans",
+    "subordinated_loans": "t2_subordinated_loans",
+    "tier_2_share_premium": "t2_share_premium",
+}
+
+ID_KEYS = ("scenario_id", "lei_code", "reporting_date", "bank_name", "reporting_currency")
+LONG_LAYOUT_KEYS = ("account", "amount")
+
+
+def normalize_header(name: Any) -> str:
+    """'Paid-up Capital (GBP)' -> 'paid_up_capital_gbp'"""
+    return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_")
+
+
+def canonical_key(name: Any) -> Optional[str]:
+    """Canonical key for a header or account name, or None if it is not recognised."""
+    key = normalize_header(name)
+    if key in INPUT_FIELD_MAP or key in ID_KEYS:
+        return key
+    return HEADER_ALIASES.get(key)
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Numbers, '1,234.5', '(500)' (accounting negative) -> float; blanks -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)  # NaN
+    text = str(value).strip().replace(",", "").replace("£", "")
+    if not text:
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    try:
+        number = float(text.strip("()"))
+    except ValueError:
+        return None
+    return -number if negative else number
+
+
+def _iter_csv_rows(source, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    import pandas as pd
+
+    for chunk in pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False):
+        columns = list(chunk.columns)
+        for values in chunk.itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
+
+
+def _iter_excel_rows(source, sheet_name: Optional[str]) -> Iterator[Dict[str, Any]]:
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the XML instead of loading the whole workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else "" for c in header]
+        for values in rows:
+            if values and any(v not in (None, "") for v in values):
+                yield dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+class TabularScenarioReader:
+    """
+    Streams entity financials from CSV / Excel into scenarios shaped like
+    sample_scenarios.json ({"scenario_id", "lei_code", "reporting_date", ..., "input_data"}).
+
+    Two layouts are detected from the headers:
+      wide - one row per entity, one column per financial line
+      long - trial-balance rows of (entity, reporting date, account, amount), summed per entity
+    Files are read in chunks (CSV) or in read-only mode (Excel), so memory stays
+    flat in the number of rows. Long files grouped by entity (`sorted_by_entity`)
+    yield each entity as soon as its rows end, so memory is also flat in the number
+    of entities (only the keys of finished entities are kept); an entity whose rows
+    resume after another entity's raises ValueError naming the row. Otherwise an entity's rows may appear anywhere in the file, so one
+    running total per entity is kept and everything is yielded at EOF: memory grows
+    with the number of entities, and a warning is printed once it passes
+    LONG_ENTITY_WARNING_THRESHOLD. Unrecognised columns / accounts are counted in
+    `unmapped` rather than sent to the LLM.
+    """
+    def __init__(self, source: Union[str, IO], file_type: Optional[str] = None, sheet_name: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, sorted_by_entity: bool = False,
+                 defaults: Optional[Dict[str, Any]] = None):
+        self.source = source
+        self.file_type = file_type or self._detect_type(source)
+        self.sheet_name = sheet_name
+        self.chunk_size = chunk_size
+        self.sorted_by_entity = sorted_by_entity
+        self.defaults = defaults or {}
+        self.unmapped: Counter = Counter()
+        self.rows_read = 0
+
+    @staticmethod
+    def _detect_type(source) -> str:
+        name = source if isinstance(source, str) else getattr(source, "name", "")
+        return "excel" if str(name).lower().endswith(EXCEL_EXTENSIONS) else "csv"
+
+    def _rows(self) -> Iterator[Dict[str, Any]]:
+        if self.file_type == "excel":
+            rows = _iter_excel_rows(self.source, self.sheet_name)
+        else:
+            rows = _iter_csv_rows(self.source, self.chunk_size)
+        for row in rows:
+            self.rows_read += 1
+            yield row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows = self._rows()
+        first = next(rows, None)
+        if first is None:
+            return
+        columns = {column: canonical_key(column) for column in first}
+
+        def all_rows():
+            yield first
+            yield from rows
+
+        if all(key in columns.values() for key in LONG_LAYOUT_KEYS):
+            yield from self._read_long(all_rows(), columns)
+        else:
+            yield from self._read_wide(all_rows(), columns)
+
+    def _new_scenario(self, ids: Dict[str, Any], index: int) -> Dict[str, Any]:
+        scenario = dict(self.defaults)
+        scenario.update({k: v for k, v in ids.items() if v not in (None, "")})
+        if "reporting_date" in scenario:
+            scenario["reporting_date"] = str(scenario["reporting_date"])[:10]
+        if "scenario_id" not in scenario:
+            parts = [str(scenario[k]) for k in ("lei_code", "reporting_date") if k in scenario]
+            scenario["scenario_id"] = "_".join(parts) if parts else f"ROW_{index:06d}"
+        scenario["input_data"] = {}
+        return scenario
+
+    def _read_wide(self, rows, columns) -> Iterator[Dict[str, Any]]:
+        for index, row in enumerate(rows, start=1):
+            ids = {}
+            input_data = {}
+            for column, value in row.items():
+                key = columns.get(column)
+                if key in ID_KEYS:
+                    ids[key] = value
+                elif key in INPUT_FIELD_MAP:
+                    number = parse_amount(value)
+                    if number is not None:
+                        input_data[key] = input_data.get(key, 0.0) + number
+                elif parse_amount(value):
+                    self.unmapped[str(column)] += 1
+            scenario = self._new_scenario(ids, index)
+            scenario["input_data"] = input_data
+            yield scenario
+
+    def _read_long(self, rows, columns) -> Iterator[Dict[str, Any]]:
+        by_key = {key: column for column, key in columns.items() if key}
+        id_columns = {key: by_key[key] for key in ID_KEYS if key in by_key}
+        entities: Dict[tuple, Dict[str, Any]] = {}
+        current = None
+        closed = set()  # Entities already yielded in sorted mode
+        # Running count: finished entities are popped in sorted mode, so len(entities) repeats
+        entity_count = 0
+        grouped = True  # No entity's rows have resumed after another entity's
+
+        for row in rows:
+            ids = {key: row.get(column) for key, column in id_columns.items()}
+            entity_key = tuple(str(v) for v in ids.values())
+            if current is not None and entity_key != current:
+                if self.sorted_by_entity:
+                    if entity_key in closed:
+                        raise ValueError(
+                            f"Data row {self.rows_read}: entity {', '.join(entity_key)} appears again after other "
+                            "entities, but the file was read as sorted by entity; sort it or drop sorted_by_entity")
+                    closed.add(current)
+                    yield entities.pop(current)
+                elif entity_key in entities:
+                    grouped = False
+            current = entity_key
+
+            scenario = entities.get(entity_key)
+            if scenario is None:
+                entity_count += 1
+                scenario = entities[entity_key] = self._new_scenario(ids, entity_count)
+                if not self.sorted_by_entity and len(entities) == LONG_ENTITY_WARNING_THRESHOLD:
+                    hint = ("the rows so far are grouped by entity; pass sorted_by_entity=True "
+                            "(--sorted-by-entity) to stream them" if grouped else "sort the file by entity to stream it")
+                    print(f"Warning: holding running totals for {len(entities)} entities until the end of the file; {hint}.")
+
+            account = row.get(by_key["account"])
+            key = canonical_key(account)
+            amount = parse_amount(row.get(by_key["amount"]))
+            if key not in INPUT_FIELD_MAP:
+                if amount:
+                    self.unmapped[str(account)] += 1
+                continue
+            if amount is not None:
+                input_data = scenario["input_data"]
+                input_data[key] = input_data.get(key, 0.0) + amount
+
+        yield from entities.values()
+
+
+def read_scenarios(path: str, **kwargs) -> Iterator[Dict[str, Any]]:
+    """Lazily yields scenarios from a CSV / Excel file (see TabularScenarioReader)."""
+    return iter(TabularScenarioReader(path, **kwargs))
+
+
+def is_tabular(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in (".csv",) + EXCEL_EXTENSIONS
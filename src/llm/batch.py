@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from src.ingestion.tabular import is_tabular, read_scenarios
+from src.llm.providers import submit, run_sync
+from src.observability import tracing
+from src.templates.ca1_template import CA1Template
+from src.validation.validator import Validator
+
+# Successful results are written to the RunStore in transactions of this many runs
+STORE_BATCH_SIZE = 200
+
+
+def scenario_to_text(scenario: Dict[str, Any]) -> str:
+    """
+    Renders a scenario (sample_scenarios.json shape) into the text passed to the generator.
+    Structured input is sent as JSON, matching what the Streamlit app puts in the text area.
+    """
+    if "input_data" in scenario:
+        return json.dumps(scenario["input_data"], indent=2)
+    return scenario.get("description", "")
+
+
+class BatchReportGenerator:
+    """
+    Runs CorepGenerator.agenerate_report + CA1 validation over many scenarios as
+    coroutines on the shared event loop, streaming one result per entity as it completes.
+    `max_concurrency` bounds scenarios in flight; actual provider calls are further
+    capped by the per-provider limits in ProviderConfig.
+    """
+    def __init__(self, generator, max_concurrency: int = 32, validator: Optional[Validator] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.generator = generator
+        self.max_concurrency = max_concurrency
+        self.validator = validator or Validator()
+
+    def run(self, scenarios: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields per-entity result dicts in completion order.
+        At most `max_concurrency` scenarios are in flight, so the input iterable is consumed lazily.
+        """
+        scenario_iter = iter(scenarios)
+        in_flight = set()
+        exhausted = False
+
+        while in_flight or not exhausted:
+            # Top up the window
+            while not exhausted and len(in_flight) < self.max_concurrency:
+                try:
+                    scenario = next(scenario_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight.add(submit(self.aprocess_scenario(scenario)))
+
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def process_scenario(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        return run_sync(self.aprocess_scenario(scenario))
+
+    async def aprocess_scenario(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generates and validates a single scenario. Never raises: failures are
+        reported in the returned dict so one entity cannot stop the run.
+        """
+        scenario_id = scenario.get("scenario_id", "")
+        start = time.perf_counter()
+        outcome = {
+            "scenario_id": scenario_id,
+            "lei_code": scenario.get("lei_code"),
+            "reporting_date": scenario.get("reporting_date"),
+        }
+
+        with tracing.span("process_scenario", scenario_id=scenario_id) as root:
+            try:
+                scenario_text = scenario_to_text(scenario)
+                # Stored with the run, so saved batch runs can be replayed like single ones
+                outcome["input_text"] = scenario_text
+                if hasattr(self.generator, "agenerate_run"):
+                    run = await self.generator.agenerate_run(scenario_text)
+                    report = run.pop("report")
+                    outcome.update(run)
+                elif hasattr(self.generator, "agenerate_report"):
+                    report = await self.generator.agenerate_report(scenario_text)
+                else:
+                    report = await asyncio.to_thread(self.generator.generate_report, scenario_text)
+                if "error" in report:
+                    outcome.update({"status": "error", "error": report["error"], "raw_response": report.get("raw_response")})
+                else:
+                    validation = self.validator.validate(CA1Template(**report))
+                    outcome.update({"status": "ok", "report": report, "validation": validation})
+            except Exception as e:
+                outcome.update({"status": "error", "error": f"Batch Error: {str(e)}"})
+
+        # The generator's own trace is a subtree of this one, which also covers validation
+        outcome["trace"] = root.to_dict()
+        outcome["elapsed_s"] = round(time.perf_counter() - start, 4)
+        return outcome
+
+
+def load_scenarios(path: str, **reader_options):
+    """
+    Scenarios from a JSON list, or streamed lazily from a CSV / Excel file of
+    entity financials (see src.ingestion.tabular).
+    """
+    if is_tabular(path):
+        return read_scenarios(path, **reader_options)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CA1 reports for a batch of scenarios.")
+    parser.add_argument("scenarios", help="JSON list of scenarios (sample_scenarios.json shape), or a CSV / Excel file of entity financials")
+    parser.add_argument("--sheet", default=None, help="Excel sheet to read (defaults to the first)")
+    parser.add_argument("--sorted-by-entity", action="store_true",
+                        help="Long (trial balance) files are grouped by entity, so entities are emitted as soon as their rows end")
+    parser.add_argument("--provider", default="Mock", choices=["OpenAI", "Anthropic", "Gemini", "Ollama", "Mock"])
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--vector-backend", default=None, choices=["chroma", "numpy", "numpy-int8"],
+                        help="Vector store for dense retrieval (defaults to COREP_VECTOR_BACKEND or chroma)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum scenarios in flight")
+    parser.add_argument("--output", default=None, help="JSONL output file (defaults to stdout)")
+    parser.add_argument("--store", default=None, help="Also save successful runs to this RunStore (SQLite) file")
+    parser.add_argument("--parquet", default=None, help="Also export successful reports to this Parquet file (requires pyarrow)")
+    parser.add_argument("--dpm-csv", default=None,
+                        help="Also export successful reports as a C 01.00 facts CSV (DPM row/column codes) in this directory")
+    parser.add_argument("--xbrl-csv", default=None,
+                        help="Also write one xBRL-CSV report package (zip) per successful report to this directory")
+    parser.add_argument("--reporting-date", default=None,
+                        help="Reference period for exported reports whose scenario has no reporting_date")
+    parser.add_argument("--trace-file", default=None, help="Append the per-stage trace of every scenario to this JSONL file")
+    parser.add_argument("--metrics-file", default=None, help="Write aggregate stage latencies in Prometheus text format to this file")
+    args = parser.parse_args(argv)
+
+    # Imported here so the batch engine itself does not require the retrieval stack
+    from src.llm.generator import CorepGenerator
+
+    generator = CorepGenerator(
+        provider=args.provider,
+        api_key=args.api_key or os.getenv("LLM_API_KEY"),
+        model_name=args.model,
+        base_url=args.base_url,
+        vector_backend=args.vector_backend
+    )
+    batch = BatchReportGenerator(generator, max_concurrency=args.concurrency)
+    tracer = tracing.get_default_tracer()
+    if args.trace_file:
+        tracer.add_exporter(tracing.JsonlTraceExporter(args.trace_file))
+    store = None
+    pending = []
+    if args.store:
+        from src.storage.run_store import RunStore
+        store = RunStore(args.store)
+    exporters = []
+    if args.parquet or args.dpm_csv or args.xbrl_csv:
+        from src.export.ca1_export import ParquetExporter, DPMFactsCSVExporter, XBRLCSVExporter
+        if args.parquet:
+            exporters.append(ParquetExporter(args.parquet))
+        if args.dpm_csv:
+            exporters.append(DPMFactsCSVExporter(args.dpm_csv))
+        if args.xbrl_csv:
+            exporters.append(XBRLCSVExporter(args.xbrl_csv))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    ok_count = 0
+    error_count = 0
+    start = time.perf_counter()
+    try:
+        reader_options = {"sheet_name": args.sheet, "sorted_by_entity": args.sorted_by_entity} if is_tabular(args.scenarios) else {}
+        for result in batch.run(load_scenarios(args.scenarios, **reader_options)):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if result["status"] == "ok":
+                ok_count += 1
+                if store is not None:
+                    pending.append(result)
+                    if len(pending) >= STORE_BATCH_SIZE:
+                        store.save_runs(pending)
+                        pending = []
+                for exporter in exporters:
+                    exporter.add(result["report"], result.get("lei_code") or result["scenario_id"],
+                                 result.get("reporting_date") or args.reporting_date)
+            else:
+                error_count += 1
+                sys.stderr.write(f"{result['scenario_id']}: {result['error']}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store is not None:
+            if pending:
+                store.save_runs(pending)
+            store.close()
+        for exporter in exporters:
+            exporter.close()
+        if args.metrics_file:
+            tracer.metrics.write(args.metrics_file)
+
+    elapsed = time.perf_counter() - start
+    sys.stderr.write(f"Processed {ok_count + error_count} scenarios ({ok_count} ok, {error_count} failed) in {elapsed:.2f}s\n")
+    return 0 if error_count == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,97 +1,265 @@
+import asyncio
 import json
-import os
-import sys
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Iterator
 
+from src.llm.cache import ResponseCache, get_default_cache
 from src.llm.prompts import COREP_SYSTEM_PROMPT, COREP_USER_PROMPT_TEMPLATE
-from src.retrieval.retriever import Retriever
+from src.llm.providers import get_provider, run_sync, iterate_sync, ProviderError
+from src.llm.streaming import IncrementalReportParser, MalformedStreamError
+from src.llm.token_budget import ContextBudget, TokenCounter, DEFAULT_CONTEXT_BUDGET, log_usage
+from src.observability import tracing
+from src.retrieval.batcher import RetrievalBatcher
+from src.retrieval.registry import get_retriever, get_hybrid_retriever
+from src.storage.run_store import prompt_hash
 from src.templates.ca1_template import CA1Template
+from src.templates.mapping import StructuredInputMapper, parse_structured_input
 from pydantic import ValidationError
 
-# Import Providers
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
-
-try:
-    from anthropic import Anthropic
-except ImportError:
-    Anthropic = None
-
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-
 class CorepGenerator:
-    def __init__(self, provider="Mock", api_key=None, model_name="gpt-4o", base_url=None):
+    def __init__(self, provider="Mock", api_key=None, model_name="gpt-4o", base_url=None, use_cache=True,
+                 cache: ResponseCache = None, retrieval_mode="dense", structured_fast_path=True,
+                 context_token_budget=DEFAULT_CONTEXT_BUDGET, vector_backend=None, retriever=None):
         self.provider = provider
         self.api_key = api_key
         self.model_name = model_name
         self.base_url = base_url
-        self.retriever = Retriever()
-        self.client = self._init_client()
+        # "dense" = Chroma only, "hybrid" = Chroma + BM25 fused with RRF
+        self.retrieval_mode = retrieval_mode
+        # "chroma", "numpy" or "numpy-int8" (see src.retrieval.registry); None = COREP_VECTOR_BACKEND
+        self.vector_backend = vector_backend
+        # The shared registry retriever unless one is injected
+        self._retriever = retriever
+        self._retrieval_batcher = None
+        self.llm = self._init_provider()
+        # Mock responses are canned, so there is nothing to cache
+        self.cache = (cache or get_default_cache()) if use_cache and provider != "Mock" else None
+        # Structured JSON inputs are mapped deterministically; the LLM only handles what the mapping cannot
+        self.mapper = StructuredInputMapper() if structured_fast_path else None
+        # Retrieved context is deduplicated and compressed to a fixed token budget
+        self.token_counter = TokenCounter(model_name)
+        self.context_budget = ContextBudget(self.token_counter, budget=context_token_budget)
+        # Identifies the prompt version a stored run was generated with
+        self.prompt_hash = prompt_hash(COREP_SYSTEM_PROMPT, COREP_USER_PROMPT_TEMPLATE)
+
+    @property
+    def retriever(self):
+        """
+        Resolved on first retrieval, so constructing a generator (and the structured
+        fast path) never loads the embedding model or Chroma.
+        """
+        if self._retriever is None:
+            if self.retrieval_mode == "hybrid":
+                self._retriever = get_hybrid_retriever(vector_backend=self.vector_backend)
+            else:
+                self._retriever = get_retriever(vector_backend=self.vector_backend)
+        return self._retriever
 
-    def _init_client(self):
+    @property
+    def retrieval_batcher(self) -> RetrievalBatcher:
+        """
+        Scenarios generated concurrently (batch runs) share one embedding call and
+        one vector store query per group instead of one round-trip each.
+        """
+        if self._retrieval_batcher is None:
+            self._retrieval_batcher = RetrievalBatcher(self.retriever)
+        return self._retrieval_batcher
+
+    def _init_provider(self):
         if self.provider == "Mock":
-            return None
-        
-        if self.provider == "OpenAI":
-            if not OpenAI: raise ImportError("OpenAI library not found")
-            return OpenAI(api_key=self.api_key)
-            
-        if self.provider == "Anthropic":
-            if not Anthropic: raise ImportError("Anthropic library not found")
-            return Anthropic(api_key=self.api_key)
-            
-        if self.provider == "Gemini":
-            if not genai: raise ImportError("Google GenerativeAI library not found")
-            genai.configure(api_key=self.api_key)
-            return genai
-            
-        if self.provider == "Ollama":
-             if not OpenAI: raise ImportError("OpenAI library (for Ollama) not found")
-             return OpenAI(base_url=self.base_url, api_key="ollama")
+            return get_provider("Mock", self.model_name, response=self._mock_response())
+        return get_provider(self.provider, self.model_name, api_key=self.api_key, base_url=self.base_url)
+
+    def generate_report(self, scenario_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Blocking wrapper around agenerate_report; the provider call runs on the shared event loop.
+        """
+        return run_sync(self.agenerate_report(scenario_text, bypass_cache=bypass_cache))
+
+    async def agenerate_report(self, scenario_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        return (await self.agenerate_run(scenario_text, bypass_cache=bypass_cache))["report"]
+
+    def generate_run(self, scenario_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        return run_sync(self.agenerate_run(scenario_text, bypass_cache=bypass_cache))
+
+    async def agenerate_run(self, scenario_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        agenerate_report plus the run metadata kept by the RunStore:
+        {"report", "context_ids", "provider", "model_name", "prompt_hash", "trace"}.
+        "trace" is the per-stage timing breakdown (see src.observability.tracing).
+        """
+        run = {"provider": self.provider, "model_name": self.model_name, "prompt_hash": self.prompt_hash}
+        with tracing.span("generate_report", provider=self.provider, model=self.model_name) as root:
+            run.update(await self._agenerate(scenario_text, bypass_cache))
+        return dict(run, trace=root.to_dict())
+
+    async def _agenerate(self, scenario_text: str, bypass_cache: bool) -> Dict[str, Any]:
+        # 0. Structured fast path
+        mapping = self._map_structured(scenario_text)
+        if mapping is not None and mapping.is_complete:
+            return dict(report=mapping.template.model_dump(), context_ids=[])
+
+        # 1-2. Retrieve Context & Prepare Prompt
+        user_prompt, context_str, context_ids = await self._build_prompt(scenario_text)
+
+        # 3. Call LLM
+        raw_json = await self._acall_llm(user_prompt, context=context_str, bypass_cache=bypass_cache)
+
+        # 4. Parse & Validate JSON
+        report = self._parse_report(raw_json)
+
+        # 5. Deterministically mapped rows take precedence over the LLM's values
+        if mapping is not None and "error" not in report:
+            report = self.mapper.merge(report, mapping)
+        return dict(report=report, context_ids=context_ids)
+
+    def stream_report(self, scenario_text: str, bypass_cache: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Blocking iterator over astream_report events, for the Streamlit UI.
+        """
+        return iterate_sync(self.astream_report(scenario_text, bypass_cache=bypass_cache))
+
+    async def astream_report(self, scenario_text: str, bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of agenerate_report. Yields
+          {"type": "field", "field", "value"} / {"type": "audit", "field", "record"} as the JSON arrives,
+        then a final {"type": "done", "report", "context_ids", "trace"} or {"type": "error", "error", "raw_response"}.
+        A response that becomes malformed is cancelled immediately instead of being read to the end.
+        """
+        # Spans are activated only around blocks without a yield: the consumer may
+        # resume this generator from a different context
+        root = tracing.start_span("stream_report", provider=self.provider, model=self.model_name)
+        try:
+            with tracing.activate(root):
+                mapping = self._map_structured(scenario_text)
+            if mapping is not None and mapping.is_complete:
+                report = mapping.template.model_dump()
+                for field, value in report.items():
+                    if field != "audit_trail":
+                        yield {"type": "field", "field": field, "value": value}
+                root.finish()
+                yield {"type": "done", "report": report, "context_ids": [], "trace": root.to_dict()}
+                return
+
+            with tracing.activate(root):
+                user_prompt, context_str, context_ids = await self._build_prompt(scenario_text)
+
+            cache_key = None
+            cached = None
+            if self.cache is not None:
+                cache_key = ResponseCache.make_key(self.provider, self.model_name, COREP_SYSTEM_PROMPT, user_prompt, context_str)
+                if not bypass_cache:
+                    cached = await asyncio.to_thread(self.cache.get, cache_key)
 
-        return None
+            parser = IncrementalReportParser()
+            llm_span = tracing.start_span("llm_call", parent=root, streamed=True)
+            deltas = self._single_delta(cached) if cached is not None else self.llm.stream(COREP_SYSTEM_PROMPT, user_prompt)
+            try:
+                async for delta in deltas:
+                    if "first_token_ms" not in llm_span.attributes:
+                        llm_span.set(first_token_ms=round(llm_span.duration_s * 1e3, 3))
+                    for event in parser.feed(delta):
+                        if event["type"] == "field" and event["field"].startswith("row_") and not self._is_number(event["value"]):
+                            raise MalformedStreamError(f"Non-numeric value for {event['field']}: {event['value']!r}")
+                        yield event
+                parser.close()
+            except MalformedStreamError as e:
+                yield {"type": "error", "error": f"Invalid JSON format from LLM: {e}", "raw_response": parser.text}
+                return
+            except ProviderError as e:
+                yield {"type": "error", "error": str(e), "raw_response": parser.text}
+                return
+            finally:
+                # Cancels the provider stream if we stopped early
+                await deltas.aclose()
+                llm_span.finish()
 
-    def generate_report(self, scenario_text: str) -> Dict[str, Any]:
-        # 1. Retrieve Context
+            self._log_call(user_prompt, parser.text, cached=cached is not None, span=llm_span)
+            with tracing.activate(root):
+                report = self._parse_report(parser.text)
+            if "error" in report:
+                yield {"type": "error", **report}
+                return
+
+            if cached is None and cache_key is not None:
+                await asyncio.to_thread(self.cache.set, cache_key, parser.text)
+            if mapping is not None:
+                report = self.mapper.merge(report, mapping)
+            root.finish()
+            yield {"type": "done", "report": report, "context_ids": context_ids, "trace": root.to_dict()}
+        finally:
+            root.finish()
+
+    @staticmethod
+    async def _single_delta(text: str) -> AsyncIterator[str]:
+        yield text
+
+    @staticmethod
+    def _is_number(value) -> bool:
+        try:
+            float(value)
+            return not isinstance(value, bool)
+        except (TypeError, ValueError):
+            return False
+
+    def _map_structured(self, scenario_text: str):
+        """Returns a MappingResult for structured JSON input, or None."""
+        if self.mapper is None:
+            return None
+        input_data = parse_structured_input(scenario_text)
+        if input_data is None:
+            return None
+        with tracing.span("structured_mapping") as span:
+            mapping = self.mapper.map(input_data)
+            span.set(complete=mapping.is_complete)
+        if mapping.unmapped:
+            print(f"Unmapped inputs {sorted(mapping.unmapped)}; falling back to LLM.")
+        elif not mapping.has_values:
+            print("No non-zero structured inputs; falling back to LLM.")
+        return mapping
+
+    async def _build_prompt(self, scenario_text: str):
+        """Returns (user_prompt, context_str, context_ids)."""
+        # Embedding + Chroma are blocking, keep them off the event loop
         print(f"Retrieving context for: {scenario_text[:50]}...")
-        retrieved_docs = self.retriever.retrieve(scenario_text, top_k=5)
-        context_str = "\n\n".join([f"Source: {d['metadata']['article']}\n{d['text']}" for d in retrieved_docs])
-        
-        # 2. Prepare Prompt
+        with tracing.span("retrieve_context", mode=self.retrieval_mode):
+            if hasattr(self.retriever, "retrieve_many"):
+                retrieved_docs = await self.retrieval_batcher.retrieve(scenario_text, top_k=5)
+            else:
+                retrieved_docs = await asyncio.to_thread(self.retriever.retrieve, scenario_text, 5)
+        with tracing.span("context_budget") as span:
+            selected_docs, stats = self.context_budget.select(retrieved_docs, scenario_text)
+            span.incr("context_tokens_in", stats["tokens_in"])
+            span.incr("context_tokens_out", stats["tokens_out"])
+        log_usage("Context", stats["tokens_in"], stats["tokens_out"],
+                  f"{stats['chunks_out']}/{stats['chunks_in']} chunks, budget {self.context_budget.budget}")
+        context_str = "\n\n".join([f"Source: {d['metadata']['article']}\n{d['text']}" for d in selected_docs])
+
         user_prompt = COREP_USER_PROMPT_TEMPLATE.format(
             scenario_description=scenario_text,
             context=context_str
         )
+        return user_prompt, context_str, [d["id"] for d in selected_docs]
 
-        # 3. Call LLM
-        if self.provider == "Mock":
-            raw_json = self._mock_response()
-        else:
-            raw_json = self._call_llm(user_prompt)
-
-        # 4. Parse & Validate JSON
+    def _parse_report(self, raw_json: str) -> Dict[str, Any]:
         try:
-            # Clean markup if present
-            cleaned_json = self._clean_json(raw_json)
-            data_dict = json.loads(cleaned_json)
+            with tracing.span("parse_json"):
+                # Clean markup if present
+                cleaned_json = self._clean_json(raw_json)
+                data_dict = json.loads(cleaned_json)
             
             # Helper to map audit trail if missing or partial (LLM sometimes lazy)
             if "audit_trail" not in data_dict:
                 data_dict["audit_trail"] = {}
 
-            # Validate with Pydantic
-            # We wrap it in a try-except to catch validation errors
-            template = CA1Template(**data_dict)
-            
-            # Auto-correct totals to ensure consistency
-            template.calculate_totals()
-            
-            return template.model_dump()
+            with tracing.span("schema_validation"):
+                # Validate with Pydantic
+                # We wrap it in a try-except to catch validation errors
+                template = CA1Template(**data_dict)
+
+                # Auto-correct totals to ensure consistency
+                template.calculate_totals()
+
+                return template.model_dump()
             
         except json.JSONDecodeError as e:
             return {"error": f"Invalid JSON format from LLM: {str(e)}", "raw_response": raw_json}
@@ -100,39 +268,49 @@ class CorepGenerator:
         except Exception as e:
             return {"error": f"Generation Error: {str(e)}", "raw_response": raw_json}
 
-    def _call_llm(self, user_prompt: str) -> str:
-        try:
-            if self.provider == "OpenAI" or self.provider == "Ollama":
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": COREP_SYSTEM_PROMPT},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    response_format={"type": "json_object"},
-                    temperature=0.0
-                )
-                return response.choices[0].message.content
-
-            elif self.provider == "Anthropic":
-                message = self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=4000,
-                    system=COREP_SYSTEM_PROMPT,
-                    messages=[{"role": "user", "content": user_prompt}]
-                )
-                return message.content[0].text
-
-            elif self.provider == "Gemini":
-                model = self.client.GenerativeModel(self.model_name)
-                full_prompt = f"{COREP_SYSTEM_PROMPT}\n\n{user_prompt}"
-                response = model.generate_content(full_prompt, generation_config={"response_mime_type": "application/json"})
-                return response.text
+    def _call_llm(self, user_prompt: str, context: str = "", bypass_cache: bool = False) -> str:
+        return run_sync(self._acall_llm(user_prompt, context=context, bypass_cache=bypass_cache))
 
-        except Exception as e:
-            raise Exception(f"Provider {self.provider} Error: {e}")
-        
-        return "{}"
+    async def _acall_llm(self, user_prompt: str, context: str = "", bypass_cache: bool = False) -> str:
+        """
+        Calls the provider through the response cache. `bypass_cache` skips the
+        lookup but still refreshes the stored response.
+        """
+        with tracing.span("llm_call") as span:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = ResponseCache.make_key(self.provider, self.model_name, COREP_SYSTEM_PROMPT, user_prompt, context)
+                if not bypass_cache:
+                    cached = await asyncio.to_thread(self.cache.get, cache_key)
+                    if cached is not None:
+                        self._log_call(user_prompt, cached, cached=True, span=span)
+                        return cached
+
+            # Provider errors (after retries) propagate as ProviderError
+            response = await self.llm.complete(COREP_SYSTEM_PROMPT, user_prompt)
+            self._log_call(user_prompt, response, span=span)
+
+            if cache_key is not None and self._is_json(response):
+                # Only well-formed responses are worth replaying
+                await asyncio.to_thread(self.cache.set, cache_key, response)
+            return response
+
+    def _log_call(self, user_prompt: str, response: str, cached: bool = False, span: tracing.Span = None):
+        tokens_in = self.token_counter.count(COREP_SYSTEM_PROMPT) + self.token_counter.count(user_prompt)
+        tokens_out = self.token_counter.count(response)
+        log_usage(f"LLM {self.provider}/{self.model_name}", tokens_in, tokens_out, "cached" if cached else "")
+        if span is not None:
+            span.incr("tokens_in", tokens_in)
+            span.incr("tokens_out", tokens_out)
+            if self.cache is not None:
+                span.incr("cache_hits" if cached else "cache_misses")
+
+    def _is_json(self, text: str) -> bool:
+        try:
+            json.loads(self._clean_json(text))
+            return True
+        except (json.JSONDecodeError, TypeError):
+            return False
 
     def _clean_json(self, text: str) -> str:
         text = text.strip()
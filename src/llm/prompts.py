@@ -28,10 +28,13 @@ Your task is to populate the COREP 'Own Funds' (C 01.00) template based on the p
   "row_200_other_reserves": 0.0,
   "row_300_goodwill": 0.0,
   "row_340_intangible_assets": 0.0,
+  "row_370_deferred_tax_assets": 0.0,
   "row_530_at1_capital": 0.0,
   "row_540_at1_instruments": 0.0,
+  "row_550_at1_share_premium": 0.0,
   "row_750_tier2_capital": 0.0,
   "row_760_tier2_instruments": 0.0,
+  "row_770_tier2_share_premium": 0.0,
   "audit_trail": {
     "row_010_own_funds": {
       "value": 0.0,
@@ -43,7 +46,7 @@ Your task is to populate the COREP 'Own Funds' (C 01.00) template based on the p
 }
 
 ### IMPORTANT:
-- Deductions (Goodwill, Intangibles, Own Instruments) MUST be negative values.
+- Deductions (Goodwill, Intangibles, Own Instruments, Deferred Tax Assets) MUST be negative values.
 - If a field is not applicable or zero, set it to 0.0.
 - Ensure calculations are consistent (e.g. Own Funds = T1 + T2).
 """
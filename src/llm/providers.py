@@ -0,0 +1,365 @@
+import asyncio
+import importlib
+import random
+import threading
+import weakref
+from typing import AsyncIterator, Dict, Optional
+
+PROVIDERS = ["OpenAI", "Anthropic", "Gemini", "Ollama", "Mock"]
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _import_sdk(module: str, message: str):
+    """
+    Provider SDKs are imported when a provider is created, so startup (and Mock mode)
+    never pays for SDKs that are not used.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(message) from None
+
+
+class ProviderError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProviderConfig:
+    """
+    Per-provider limits. `max_concurrency` is shared by every client of the same
+    provider in the process, so it can be set to the provider's rate limit.
+    """
+    def __init__(self, max_concurrency: int = 8, timeout: float = 120.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+
+PROVIDER_CONFIGS: Dict[str, ProviderConfig] = {
+    "OpenAI": ProviderConfig(max_concurrency=16),
+    "Anthropic": ProviderConfig(max_concurrency=8),
+    "Gemini": ProviderConfig(max_concurrency=8),
+    "Ollama": ProviderConfig(max_concurrency=2, timeout=300.0),
+    "Mock": ProviderConfig(max_concurrency=64, max_retries=0),
+}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Best-effort extraction of an HTTP status from the various SDK exception types."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # SDK connection/timeout errors carry no status code
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ServiceUnavailable", "DeadlineExceeded"):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class AsyncLLMProvider:
+    """
+    Base class for async chat-completion providers.
+    Subclasses implement `_complete`; concurrency limiting, timeouts and retries live here.
+    """
+    name = "Base"
+
+    # One semaphore per (provider, event loop), shared across instances
+    _semaphores = weakref.WeakKeyDictionary()
+
+    def __init__(self, model_name: str, config: Optional[ProviderConfig] = None):
+        self.model_name = model_name
+        self.config = config or PROVIDER_CONFIGS.get(self.name, ProviderConfig())
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        if self.name not in per_loop:
+            per_loop[self.name] = asyncio.Semaphore(self.config.max_concurrency)
+        return per_loop[self.name]
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter" exponential backoff
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def complete(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Returns the raw text of the model response, retrying transient failures.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self._get_semaphore():
+                    return await asyncio.wait_for(
+                        self._complete(system_prompt, user_prompt),
+                        timeout=self.config.timeout
+                    )
+            except Exception as e:
+                if attempt >= self.config.max_retries or not is_retryable(e):
+                    raise ProviderError(f"Provider {self.name} Error: {e}", _status_code(e)) from e
+                # Sleep outside the semaphore so other requests can proceed
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    async def stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """
+        Yields text deltas as they arrive. Only failures before the first delta are retried.
+        Closing the iterator early (aclose) closes the underlying HTTP stream.
+        """
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self._get_semaphore():
+                    deltas = self._stream(system_prompt, user_prompt)
+                    try:
+                        while True:
+                            try:
+                                # The timeout applies to the gap between deltas
+                                delta = await asyncio.wait_for(deltas.__anext__(), timeout=self.config.timeout)
+                            except StopAsyncIteration:
+                                return
+                            started = True
+                            yield delta
+                    finally:
+                        await deltas.aclose()
+            except Exception as e:
+                if started or attempt >= self.config.max_retries or not is_retryable(e):
+                    raise ProviderError(f"Provider {self.name} Error: {e}", _status_code(e)) from e
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+
+    async def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        raise NotImplementedError
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        # Providers without native streaming deliver the whole response as one delta
+        yield await self._complete(system_prompt, user_prompt)
+
+
+class OpenAIProvider(AsyncLLMProvider):
+    name = "OpenAI"
+
+    def __init__(self, model_name: str, api_key: str = None, base_url: str = None, config: Optional[ProviderConfig] = None):
+        super().__init__(model_name, config)
+        AsyncOpenAI = _import_sdk("openai", "OpenAI library not found").AsyncOpenAI
+        # Retries are handled by complete(); the client keeps a pooled HTTP connection
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=self.config.timeout)
+
+    async def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.0
+        )
+        return response.choices[0].message.content
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.0,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+
+class OllamaProvider(OpenAIProvider):
+    """Ollama exposes an OpenAI-compatible endpoint."""
+    name = "Ollama"
+
+    def __init__(self, model_name: str, base_url: str = None, config: Optional[ProviderConfig] = None, **kwargs):
+        super().__init__(model_name, api_key="ollama", base_url=base_url or "http://localhost:11434/v1", config=config)
+
+
+class AnthropicProvider(AsyncLLMProvider):
+    name = "Anthropic"
+
+    def __init__(self, model_name: str, api_key: str = None, config: Optional[ProviderConfig] = None, **kwargs):
+        super().__init__(model_name, config)
+        AsyncAnthropic = _import_sdk("anthropic", "Anthropic library not found").AsyncAnthropic
+        self.client = AsyncAnthropic(api_key=api_key, max_retries=0, timeout=self.config.timeout)
+
+    async def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        message = await self.client.messages.create(
+            model=self.model_name,
+            max_tokens=4000,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+        return message.content[0].text
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        async with self.client.messages.stream(
+            model=self.model_name,
+            max_tokens=4000,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+
+class GeminiProvider(AsyncLLMProvider):
+    name = "Gemini"
+
+    def __init__(self, model_name: str, api_key: str = None, config: Optional[ProviderConfig] = None, **kwargs):
+        super().__init__(model_name, config)
+        self.genai = _import_sdk("google.generativeai", "Google GenerativeAI library not found")
+        self.genai.configure(api_key=api_key)
+        self.model = self.genai.GenerativeModel(self.model_name)
+
+    async def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        # Only some models support system instructions, so combine with the user prompt for compatibility
+        full_prompt = f"{system_prompt}\n\n{user_prompt}"
+        try:
+            response = await self.model.generate_content_async(
+                full_prompt, generation_config={"response_mime_type": "application/json"}
+            )
+        except Exception as e:
+            if "404" in str(e):
+                print(f"Gemini Model '{self.model_name}' not found. Available models:")
+                for m in self.genai.list_models():
+                    if 'generateContent' in m.supported_generation_methods:
+                        print(f"- {m.name}")
+            raise
+        return response.text
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        full_prompt = f"{system_prompt}\n\n{user_prompt}"
+        response = await self.model.generate_content_async(
+            full_prompt, generation_config={"response_mime_type": "application/json"}, stream=True
+        )
+        async for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+
+
+class MockProvider(AsyncLLMProvider):
+    """Returns a canned response; used for offline runs and tests."""
+    name = "Mock"
+
+    def __init__(self, model_name: str = "mock", response: str = "{}", config: Optional[ProviderConfig] = None, **kwargs):
+        super().__init__(model_name, config)
+        self.response = response
+
+    async def _complete(self, system_prompt: str, user_prompt: str) -> str:
+        return self.response
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        # Small chunks so the UI exercises progressive rendering
+        for i in range(0, len(self.response), 64):
+            yield self.response[i:i + 64]
+
+
+PROVIDER_CLASSES = {
+    "OpenAI": OpenAIProvider,
+    "Anthropic": AnthropicProvider,
+    "Gemini": GeminiProvider,
+    "Ollama": OllamaProvider,
+    "Mock": MockProvider,
+}
+
+_provider_cache: Dict[tuple, AsyncLLMProvider] = {}
+_provider_cache_lock = threading.Lock()
+
+
+def get_provider(provider: str, model_name: str, api_key: str = None, base_url: str = None, **kwargs) -> AsyncLLMProvider:
+    """
+    Returns a shared provider instance so HTTP connection pools are reused
+    across generators (e.g. every Streamlit "Initialize / Update").
+    """
+    if provider not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    cache_key = (provider, model_name, api_key, base_url, tuple(sorted(kwargs.items())))
+    with _provider_cache_lock:
+        instance = _provider_cache.get(cache_key)
+        if instance is None:
+            instance = PROVIDER_CLASSES[provider](model_name, api_key=api_key, base_url=base_url, **kwargs)
+            _provider_cache[cache_key] = instance
+        return instance
+
+
+class _BackgroundLoop:
+    """
+    A single event loop running in a daemon thread. Async clients are bound to the
+    loop they were first used on, so all provider calls are scheduled here.
+    """
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, name="corep-async-loop", daemon=True)
+                thread.start()
+            return self._loop
+
+
+_background_loop = _BackgroundLoop()
+
+
+def submit(coro):
+    """Schedules a coroutine on the shared loop and returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop.get_loop())
+
+
+def iterate_sync(async_iterator):
+    """
+    Drives an async iterator on the shared loop from synchronous code (e.g. Streamlit).
+    Stopping iteration early closes the async iterator.
+    """
+    loop = _background_loop.get_loop()
+    try:
+        while True:
+            try:
+                item = asyncio.run_coroutine_threadsafe(async_iterator.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        asyncio.run_coroutine_threadsafe(async_iterator.aclose(), loop).result()
+
+
+def run_sync(coro):
+    """Runs a coroutine on the shared loop and blocks until it completes."""
+    loop = _background_loop.get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
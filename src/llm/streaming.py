@@ -0,0 +1,196 @@
+import json
+from typing import Dict, Any, List, Optional
+
+# Paths of the objects whose members are emitted as soon as they complete
+_TOP_LEVEL = ()
+_AUDIT_TRAIL = ("audit_trail",)
+
+# Characters that may appear in a JSON number / true / false / null
+_PRIMITIVE_CHARS = set("0123456789+-.eEtrufalsn")
+
+
+class MalformedStreamError(ValueError):
+    """The streamed response can no longer become valid JSON."""
+
+
+class _Container:
+    __slots__ = ("kind", "path", "state", "key", "value_start", "count")
+
+    def __init__(self, kind: str, path: tuple):
+        self.kind = kind            # "{" or "["
+        self.path = path
+        self.state = "key" if kind == "{" else "value"
+        self.key = None
+        self.value_start = None
+        self.count = 0
+
+
+class IncrementalReportParser:
+    """
+    Incremental JSON scanner for streamed CA1 reports.
+
+    `feed()` accepts arbitrary text chunks and returns events for every member
+    completed so far:
+      {"type": "field", "field": <top-level key>, "value": <value>}
+      {"type": "audit", "field": <audit_trail key>, "record": <dict>}
+    A leading/trailing markdown code fence is tolerated. Anything that can no
+    longer become valid JSON raises MalformedStreamError immediately, so the
+    caller can cancel the provider stream.
+    """
+    def __init__(self):
+        self.text = ""
+        self.finished = False
+        self._pos = 0
+        self._started = False
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
+        events: List[Dict[str, Any]] = []
+
+        while self._pos < len(self.text):
+            self._step(self.text[self._pos], events)
+            self._pos += 1
+        return events
+
+    def close(self):
+        """Raises if the stream ended before the top-level object was closed."""
+        if not self.finished:
+            raise MalformedStreamError("Response ended before the JSON object was complete")
+
+    def _fail(self, message: str):
+        snippet = self.text[max(0, self._pos - 20):self._pos + 1]
+        raise MalformedStreamError(f"{message} at offset {self._pos} (...{snippet!r})")
+
+    def _step(self, c: str, events: List[Dict[str, Any]]):
+        if not self._started:
+            if c == "{":
+                self._started = True
+                self._stack.append(_Container("{", _TOP_LEVEL))
+                return
+            preamble = self.text[:self._pos + 1].strip().lower()
+            if preamble and not "```json".startswith(preamble):
+                self._fail("Unexpected text before JSON object")
+            return
+
+        if self.finished:
+            if not (c.isspace() or c == "`"):
+                self._fail("Unexpected text after JSON object")
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._on_string_end()
+            return
+
+        if c.isspace():
+            return
+
+        top = self._stack[-1]
+        if top.kind == "{":
+            self._step_object(top, c, events)
+        else:
+            self._step_array(top, c, events)
+
+    def _start_string(self):
+        self._in_string = True
+        self._string_start = self._pos
+
+    def _on_string_end(self):
+        top = self._stack[-1]
+        if top.kind == "{" and top.state == "key":
+            top.key = json.loads(self.text[self._string_start:self._pos + 1])
+            top.state = "colon"
+
+    def _start_value(self, top: _Container, c: str) -> bool:
+        """Handles the first character of a value. Returns False if `c` cannot start one."""
+        if top.value_start is None:
+            top.value_start = self._pos
+        if c == '"':
+            self._start_string()
+        elif c in "{[":
+            child_path = top.path + ((top.key,) if top.kind == "{" else (None,))
+            self._stack.append(_Container(c, child_path))
+        elif c not in _PRIMITIVE_CHARS:
+            return False
+        return True
+
+    def _step_object(self, top: _Container, c: str, events):
+        if top.state == "key":
+            if c == '"':
+                self._start_string()
+            elif c == "}" and top.count == 0:
+                self._close(events)
+            else:
+                self._fail("Expected a key")
+        elif top.state == "colon":
+            if c != ":":
+                self._fail("Expected ':'")
+            top.state = "value"
+            top.value_start = None
+        elif top.state == "value":
+            if c == "," and top.value_start is not None:
+                self._complete_member(top, self._pos, events)
+                top.state = "key"
+            elif c == "}":
+                self._complete_member(top, self._pos, events)
+                self._close(events)
+            elif not self._start_value(top, c):
+                self._fail("Invalid value")
+        else:  # after_value
+            if c == ",":
+                top.state = "key"
+            elif c == "}":
+                self._close(events)
+            else:
+                self._fail("Expected ',' or '}'")
+
+    def _step_array(self, top: _Container, c: str, events):
+        if top.state == "value":
+            if c == "]":
+                self._close(events)
+            elif c == "," and top.value_start is not None:
+                top.value_start = None
+            elif not self._start_value(top, c):
+                self._fail("Invalid array value")
+        else:  # after_value
+            if c == ",":
+                top.state = "value"
+                top.value_start = None
+            elif c == "]":
+                self._close(events)
+            else:
+                self._fail("Expected ',' or ']'")
+
+    def _complete_member(self, obj: _Container, end: int, events):
+        raw = self.text[obj.value_start:end].strip() if obj.value_start is not None else ""
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            self._fail(f"Invalid value for '{obj.key}'")
+        obj.count += 1
+        obj.value_start = None
+
+        if obj.path == _TOP_LEVEL and obj.key != "audit_trail":
+            events.append({"type": "field", "field": obj.key, "value": value})
+        elif obj.path == _AUDIT_TRAIL:
+            events.append({"type": "audit", "field": obj.key, "record": value})
+
+    def _close(self, events):
+        self._stack.pop()
+        if not self._stack:
+            self.finished = True
+            return
+
+        parent = self._stack[-1]
+        if parent.kind == "{":
+            self._complete_member(parent, self._pos + 1, events)
+        parent.state = "after_value"
@@ -0,0 +1,180 @@
+import re
+import threading
+from typing import Dict, Any, List, Tuple
+
+from core.bm25 import tokenize
+from src.retrieval.lru_cache import LRUCache
+
+# Tokens of retrieved context allowed into one prompt, and per retrieved chunk
+DEFAULT_CONTEXT_BUDGET = 3000
+DEFAULT_MAX_CHUNK_TOKENS = 800
+FALLBACK_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4  # Rough estimate when tiktoken cannot be loaded
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.;:!?])\s+|\n+")
+
+_NOT_LOADED = object()
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _load_encoding(model_name: str):
+    """tiktoken encoding for a model, or None if tiktoken or its BPE files are unavailable (e.g. offline)."""
+    with _encodings_lock:
+        if model_name in _encodings:
+            return _encodings[model_name]
+        encoding = None
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                # Non-OpenAI models: a generic BPE is a close enough estimate
+                encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+        except Exception as e:
+            print(f"tiktoken unavailable ({type(e).__name__}); estimating {CHARS_PER_TOKEN} characters per token.")
+        _encodings[model_name] = encoding
+        return encoding
+
+
+class TokenCounter:
+    """
+    Token counts for a model, memoised per text so retrieved chunks are only
+    encoded once across calls.
+    """
+    def __init__(self, model_name: str = "gpt-4o", cache_size: int = 4096):
+        self.model_name = model_name
+        self._encoding = _NOT_LOADED
+        self._counts = LRUCache(max_entries=cache_size)
+
+    @property
+    def encoding(self):
+        # Loaded on first use, so building a generator does not touch tiktoken
+        if self._encoding is _NOT_LOADED:
+            self._encoding = _load_encoding(self.model_name)
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cached = self._counts.get(text)
+        if cached is not None:
+            return cached
+        if self.encoding is not None:
+            tokens = len(self.encoding.encode(text, disallowed_special=()))
+        else:
+            tokens = (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        self._counts.set(text, tokens)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens * CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class ContextBudget:
+    """
+    Fits retrieved chunks into a token budget before they are put in a prompt:
+      1. sentences already present in a higher-ranked chunk are dropped, so
+         overlapping articles / chunk windows are only sent once;
+      2. chunks are taken in rank order; a chunk larger than its share is reduced to
+         its sentences sharing most terms with the query (kept in original order),
+         and truncated only if a single sentence is still too long;
+      3. selection stops when the budget is spent.
+    """
+    def __init__(self, counter: TokenCounter, budget: int = DEFAULT_CONTEXT_BUDGET,
+                 max_chunk_tokens: int = DEFAULT_MAX_CHUNK_TOKENS):
+        self.counter = counter
+        self.budget = budget
+        self.max_chunk_tokens = max_chunk_tokens
+
+    def select(self, chunks: List[Dict[str, Any]], query: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        `chunks` are dicts with a "text" key, best first. Returns copies of the kept
+        chunks with reduced "text" and a "tokens" count, plus token stats.
+        """
+        query_terms = set(tokenize(query))
+        seen_sentences = set()
+        selected = []
+        remaining = self.budget
+        stats = {"chunks_in": len(chunks), "tokens_in": 0, "duplicate_sentences": 0}
+
+        for chunk in chunks:
+            text = chunk.get("text", "")
+            stats["tokens_in"] += self.counter.count(text)
+            if remaining <= 0:
+                continue
+
+            sentences = []
+            duplicates = 0
+            chunk_sentences = set()
+            for sentence in split_sentences(text):
+                key = _normalize(sentence)
+                if key in seen_sentences or key in chunk_sentences:
+                    duplicates += 1
+                    continue
+                chunk_sentences.add(key)
+                sentences.append(sentence)
+            stats["duplicate_sentences"] += duplicates
+            if not sentences:
+                continue
+
+            limit = min(remaining, self.max_chunk_tokens)
+            if not duplicates and self.counter.count(text) <= limit:
+                reduced = text  # Fits as is; keep the original layout
+            else:
+                reduced = self._fit(sentences, limit, query_terms)
+            if not reduced:
+                continue
+            # Only sentences that made it into the context count as seen: one that
+            # _fit dropped may still be sent with a later chunk
+            seen_sentences.update(_normalize(sentence) for sentence in split_sentences(reduced))
+            tokens = self.counter.count(reduced)
+            selected.append(dict(chunk, text=reduced, tokens=tokens))
+            remaining -= tokens
+
+        stats["chunks_out"] = len(selected)
+        stats["tokens_out"] = sum(c["tokens"] for c in selected)
+        return selected, stats
+
+    def _fit(self, sentences: List[str], limit: int, query_terms: set) -> str:
+        text = " ".join(sentences)
+        if self.counter.count(text) <= limit:
+            return text
+
+        # Rank sentences by query-term overlap (ties keep document order)
+        ranked = sorted(
+            range(len(sentences)),
+            key=lambda i: (-len(query_terms.intersection(tokenize(sentences[i]))), i)
+        )
+        chosen, used = [], 0
+        for i in ranked:
+            # The joining space merges into the next sentence's first token
+            cost = self.counter.count(sentences[i])
+            if used + cost <= limit:
+                chosen.append(i)
+                used += cost
+        if chosen:
+            return " ".join(sentences[i] for i in sorted(chosen))
+        return self.counter.truncate(sentences[ranked[0]], limit)
+
+
+def log_usage(label: str, tokens_in: int, tokens_out: int, detail: str = ""):
+    suffix = f" ({detail})" if detail else ""
+    print(f"{label}: {tokens_in} tokens in, {tokens_out} tokens out{suffix}")
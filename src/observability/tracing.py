@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "corep"
+
+# Span currently open in this thread / asyncio task; asyncio.to_thread copies it into worker threads
+_current_span: ContextVar[Optional["Span"]] = ContextVar("corep_current_span", default=None)
+
+
+class Span:
+    """
+    One timed stage of the pipeline. Spans nest: a span opened while another is
+    current becomes its child, so a finished root span holds the whole breakdown.
+    `attributes` describe the stage; `counters` (tokens, cache hits...) are summed
+    into the process metrics when the span finishes.
+    """
+    def __init__(self, name: str, tracer: "Tracer", parent: Optional["Span"] = None, **attributes):
+        self.name = name
+        self.tracer = tracer
+        self.parent = parent
+        self.attributes: Dict[str, Any] = attributes
+        self.counters: Dict[str, float] = {}
+        self.children: List["Span"] = []
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def incr(self, counter: str, amount: float = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def finish(self):
+        """Idempotent; records the span in the tracer's metrics and exports finished root spans."""
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        self.tracer._finished(self)
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1e3, 3),
+            "duration_ms": round(self.duration_s * 1e3, 3),
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "children": [child.to_dict(origin) for child in list(self.children)],
+        }
+
+
+class MetricsRegistry:
+    """Process-wide span duration histograms and counters, rendered in Prometheus text format."""
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Dict[str, Any]] = {}  # span name -> {"buckets", "sum", "count"}
+        self._counters: Dict[Tuple[str, str], float] = {}  # (counter, span name) -> total
+
+    def observe(self, span: Span):
+        duration = span.duration_s
+        with self._lock:
+            series = self._durations.setdefault(span.name, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += duration
+            series["count"] += 1
+            for counter, amount in span.counters.items():
+                key = (counter, span.name)
+                self._counters[key] = self._counters.get(key, 0) + amount
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{span name: {"count", "total_s", "mean_s"}}"""
+        with self._lock:
+            return {
+                name: {"count": s["count"], "total_s": s["sum"], "mean_s": s["sum"] / s["count"] if s["count"] else 0.0}
+                for name, s in self._durations.items()
+            }
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of traced report pipeline stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, series in sorted(self._durations.items()):
+                label = _escape_label(name)
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{metric}_bucket{{span="{label}",le="{bound:g}"}} {count}')
+                lines.append(f'{metric}_bucket{{span="{label}",le="+Inf"}} {series["count"]}')
+                lines.append(f'{metric}_sum{{span="{label}"}} {series["sum"]:.6f}')
+                lines.append(f'{metric}_count{{span="{label}"}} {series["count"]}')
+
+            by_counter: Dict[str, List[Tuple[str, float]]] = {}
+            for (counter, name), total in sorted(self._counters.items()):
+                by_counter.setdefault(counter, []).append((name, total))
+        for counter, series in by_counter.items():
+            metric = f"{METRIC_PREFIX}_{_metric_name(counter)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, total in series:
+                lines.append(f'{metric}{{span="{_escape_label(name)}"}} {total:g}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).lower()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class JsonlTraceExporter:
+    """Appends every finished root span (one whole trace) to a JSON-lines file."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, span: Span):
+        record = {"trace_id": span.trace_id, "timestamp": time.time(), **span.to_dict()}
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def read_traces(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Traces written by JsonlTraceExporter, most recent last."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        traces = [json.loads(line) for line in f if line.strip()]
+    return traces[-limit:] if limit else traces
+
+
+class Tracer:
+    def __init__(self, metrics: Optional[MetricsRegistry] = None, exporters: Optional[List[Any]] = None):
+        self.metrics = metrics or MetricsRegistry()
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """
+        Starts a span without making it current; call finish() when done. Use this
+        where a `with` block cannot span the stage, e.g. across yields of an async generator.
+        """
+        return Span(name, self, parent if parent is not None else _current_span.get(), **attributes)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes):
+        """Times the enclosed block as a child of the current span (or `parent`)."""
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def _finished(self, span: Span):
+        self.metrics.observe(span)
+        if span.parent is None:
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception as e:
+                    print(f"Trace export failed: {e}")
+
+
+@contextmanager
+def activate(span: Optional[Span]):
+    """Makes an already started span current for the enclosed block (must not contain a yield)."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def record(**counters):
+    """Adds to counters of the current span, if any (e.g. record(cache_hits=1))."""
+    span = _current_span.get()
+    if span is not None:
+        for counter, amount in counters.items():
+            span.incr(counter, amount)
+
+
+def flatten(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rows of a trace dict in execution order, with nesting depth and self time
+    (duration not covered by child spans), for tables.
+    """
+    rows = []
+
+    def walk(node, depth):
+        children = sorted(node.get("children", []), key=lambda c: c["start_ms"])
+        rows.append({
+            "span": node["name"],
+            "depth": depth,
+            "start_ms": node["start_ms"],
+            "duration_ms": node["duration_ms"],
+            "self_ms": round(max(node["duration_ms"] - sum(c["duration_ms"] for c in children), 0.0), 3),
+            **node.get("counters", {}),
+        })
+        for child in children:
+            walk(child, depth + 1)
+
+    walk(trace, 0)
+    return rows
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_default_tracer() -> Tracer:
+    """
+    Process-wide tracer. Set COREP_TRACE_PATH to also append every trace to a JSON-lines file.
+    """
+    global _default_tracer
+    if _default_tracer is None:
+        with _default_tracer_lock:
+            if _default_tracer is None:
+                tracer = Tracer()
+                trace_path = os.getenv("COREP_TRACE_PATH")
+                if trace_path:
+                    tracer.add_exporter(JsonlTraceExporter(trace_path))
+                _default_tracer = tracer
+    return _default_tracer
+
+
+def span(name: str, parent: Optional[Span] = None, **attributes):
+    """tracer.span() on the default tracer."""
+    return get_default_tracer().span(name, parent, **attributes)
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes) -> Span:
+    return get_default_tracer().start_span(name, parent, **attributes)
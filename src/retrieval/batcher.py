@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import json
+from typing import Dict, Any, List, Optional, Set
+
+from src.observability import tracing
+
+
+class _Pending:
+    __slots__ = ("query", "future", "context")
+
+    def __init__(self, query: str, future: asyncio.Future, context: contextvars.Context):
+        self.query = query
+        self.future = future
+        self.context = context
+
+
+class RetrievalBatcher:
+    """
+    Coalesces retrieve() calls awaited concurrently on one event loop into a single
+    retriever.retrieve_many call: one embedding model call and one store query for
+    the whole group instead of one round-trip per scenario.
+
+    A group is flushed `max_wait_s` after its first query, or as soon as it holds
+    `max_batch_size` queries. Queries with different top_k / filters are grouped
+    separately. The retriever runs in a worker thread, off the event loop.
+    """
+    def __init__(self, retriever, max_batch_size: int = 64, max_wait_s: float = 0.005):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.retriever = retriever
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self._groups: Dict[tuple, List[_Pending]] = {}
+        # The loop only keeps weak references to tasks: hold flushes until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def retrieve(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        key = (loop, top_k, json.dumps(filters, sort_keys=True, default=str) if filters else None)
+        pending = _Pending(query, loop.create_future(), contextvars.copy_context())
+
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = []
+            loop.call_later(self.max_wait_s, self._flush, key, group, top_k, filters)
+        group.append(pending)
+        if len(group) >= self.max_batch_size:
+            self._flush(key, group, top_k, filters)
+
+        span = tracing.current_span()
+        results, batch_size = await pending.future
+        if span is not None:
+            span.set(batch_size=batch_size)
+        return results
+
+    def _flush(self, key, group: List[_Pending], top_k: int, filters):
+        # The timer of a group already flushed for being full finds it gone
+        if self._groups.get(key) is not group:
+            return
+        del self._groups[key]
+        task = asyncio.ensure_future(self._run(group, top_k, filters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: List[_Pending], top_k: int, filters):
+        queries = [pending.query for pending in group]
+        # A lone query keeps its spans in the caller's trace; a shared call belongs to no single caller
+        context = group[0].context if len(group) == 1 else contextvars.Context()
+        try:
+            results = await asyncio.to_thread(context.run, self.retriever.retrieve_many, queries, top_k, filters)
+        except Exception as e:
+            for pending in group:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending, docs in zip(group, results):
+            if not pending.future.done():
+                pending.future.set_result((docs, len(group)))
@@ -1,28 +1,69 @@
-from sentence_transformers import SentenceTransformer
+from src.retrieval.lru_cache import LRUCache
+from src.observability import tracing
 import os
 
 class EmbeddingGenerator:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
+    def __init__(self, model_name="all-MiniLM-L6-v2", cache_size=4096, cache_ttl=None):
+        self.model_name = model_name
+        # Encoded vectors keyed on (model, normalised text); repeated queries skip the model entirely
+        self.cache = LRUCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+
         # Use a local cache for models to avoid re-downloading
         cache_folder = os.path.join(os.getcwd(), "models_cache")
         if not os.path.exists(cache_folder):
             os.makedirs(cache_folder)
             
         try:
+            # Imported here: torch + sentence-transformers take seconds to import and are only
+            # needed once a KB actually has to be embedded or queried
+            from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(model_name, cache_folder=cache_folder)
         except Exception as e:
             print(f"Error loading embedding model {model_name}: {e}")
             # Fallback or re-raise depending on strictness. For prototype, we re-raise.
             raise e
 
+    @staticmethod
+    def _normalise(text: str) -> str:
+        # Whitespace-only differences (e.g. re-indented JSON) map to the same entry
+        return " ".join(text.split())
+
     def generate(self, text: str):
         """Generates embedding for a single string."""
         if not text:
             return []
-        return self.model.encode(text).tolist()
+        return self.generate_batch([text])[0]
 
     def generate_batch(self, texts: list):
-        """Generates embeddings for a list of strings."""
+        """
+        Generates embeddings for a list of strings.
+        Cached texts are served from the LRU; all misses are encoded in a single model call.
+        """
         if not texts:
             return []
-        return self.model.encode(texts).tolist()
+
+        normalised = [self._normalise(t) for t in texts]
+        vectors = [None] * len(texts)
+        missing = {}  # normalised text -> positions needing it
+
+        for i, text in enumerate(normalised):
+            cached = self.cache.get((self.model_name, text))
+            if cached is not None:
+                vectors[i] = list(cached)
+            else:
+                missing.setdefault(text, []).append(i)
+
+        tracing.record(embedding_cache_hits=len(texts) - sum(len(p) for p in missing.values()),
+                       embedding_cache_misses=len(missing))
+        if missing:
+            to_encode = list(missing.keys())
+            encoded = self.model.encode(to_encode).tolist()
+            for text, vector in zip(to_encode, encoded):
+                self.cache.set((self.model_name, text), vector)
+                for i in missing[text]:
+                    vectors[i] = list(vector)
+
+        return vectors
+
+    def cache_stats(self):
+        return self.cache.stats()
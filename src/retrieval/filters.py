@@ -0,0 +1,35 @@
+from typing import Dict, Any, List, Optional
+
+
+def _as_list(value) -> List[str]:
+    """Chroma metadata must be flat, so list fields are stored comma-joined."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+
+def matches_filters(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Metadata filters for KB articles (pra_rulebook_kb.json fields):
+      - "tags": keep articles carrying any of the given tags
+      - "template_rows": keep articles mapped to any of the given CA1 rows
+      - "effective_date": keep articles in force on that date (effective_date <= value, ISO format)
+    """
+    if not filters:
+        return True
+
+    for field in ("tags", "template_rows"):
+        wanted = _as_list(filters.get(field))
+        if wanted and not set(wanted) & set(_as_list(metadata.get(field))):
+            return False
+
+    as_of = filters.get("effective_date")
+    if as_of:
+        effective = metadata.get("effective_date")
+        # ISO dates compare correctly as strings
+        if effective and effective > as_of:
+            return False
+
+    return True
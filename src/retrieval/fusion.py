@@ -0,0 +1,19 @@
+from typing import Dict, Any, List
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], top_k: int = 5, k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked result lists by summing 1 / (k + rank) per document ID.
+    Rank-based, so dense distances and BM25 scores need no normalisation.
+    """
+    fused: Dict[str, float] = {}
+    docs: Dict[str, Dict[str, Any]] = {}
+
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            doc_id = doc["id"]
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc_id, doc)
+
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{**docs[doc_id], "score": score} for doc_id, score in ranked]
@@ -0,0 +1,72 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from core.bm25 import BM25Index
+from src.retrieval.filters import matches_filters
+from src.retrieval.fusion import reciprocal_rank_fusion
+from src.retrieval.registry import get_retriever, DEFAULT_KB_PATH
+from src.retrieval.retriever import load_kb_documents
+from src.observability import tracing
+
+
+class HybridRetriever:
+    """
+    Dense (Chroma) + sparse (BM25) retrieval over the same KB, fused with
+    reciprocal-rank fusion. BM25 keeps exact article references such as
+    "Article 36(1)(b)" that embeddings tend to blur.
+    """
+    def __init__(self, kb_path: str = DEFAULT_KB_PATH, dense_retriever=None,
+                 candidate_multiplier: int = 4, rrf_k: int = 60):
+        self.kb_path = kb_path
+        self.dense = dense_retriever or get_retriever(kb_path)
+        self.candidate_multiplier = candidate_multiplier
+        self.rrf_k = rrf_k
+
+        self.documents = load_kb_documents(kb_path)
+        self.sparse_index = BM25Index().build([doc["text"] for doc in self.documents])
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid-retrieval")
+
+    def sparse_retrieve(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        # The KB is small, so rank everything matching and filter afterwards
+        results = []
+        with tracing.span("bm25.search"):
+            for doc_idx, score in self.sparse_index.search(query, top_k=len(self.documents)):
+                doc = self.documents[doc_idx]
+                if matches_filters(doc["metadata"], filters):
+                    results.append({**doc, "score": score})
+                    if len(results) >= top_k:
+                        break
+        return results
+
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Queries both retrievers in parallel and returns the top_k fused results.
+        The returned "score" is the RRF score (higher is better).
+        """
+        n_candidates = top_k * self.candidate_multiplier
+        # Each worker gets its own copy of the context so its spans nest under the caller's
+        dense_future = self._executor.submit(contextvars.copy_context().run, self.dense.retrieve, query, n_candidates, filters)
+        sparse_future = self._executor.submit(contextvars.copy_context().run, self.sparse_retrieve, query, n_candidates, filters)
+
+        return reciprocal_rank_fusion(
+            [dense_future.result(), sparse_future.result()],
+            top_k=top_k,
+            k=self.rrf_k
+        )
+
+    def retrieve_many(self, queries: List[str], top_k: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Batched retrieve: one dense retrieve_many call (a single encode and store query)
+        runs while BM25 scores each query; results are fused per query, in order.
+        """
+        if not queries:
+            return []
+        n_candidates = top_k * self.candidate_multiplier
+        dense_future = self._executor.submit(contextvars.copy_context().run, self.dense.retrieve_many, queries, n_candidates, filters)
+        sparse = [self.sparse_retrieve(query, n_candidates, filters) for query in queries]
+
+        return [
+            reciprocal_rank_fusion([dense, sparse_results], top_k=top_k, k=self.rrf_k)
+            for dense, sparse_results in zip(dense_future.result(), sparse)
+        ]
@@ -0,0 +1,262 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from src.observability import tracing
+
+DEFAULT_NUMPY_STORE_DIR = os.path.join("data", "vector_store")
+DTYPES = ("float32", "int8")
+
+_EMBEDDINGS_FILE = "embeddings-{version}.npy"
+_SCALES_FILE = "scales-{version}.npy"
+_TABLE_FILE = "table.json"
+_LOAD_ATTEMPTS = 3
+# Unreferenced arrays younger than this may belong to another process's write in progress
+_CLEANUP_GRACE_S = 60.0
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantise_int8(vectors: np.ndarray):
+    """Symmetric per-row int8 quantisation: vectors ~= q * scales[:, None]."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class _Snapshot:
+    """One consistent view of the store; replaced as a whole when the files change."""
+    __slots__ = ("matrix", "scales", "ids", "documents", "metadatas", "id_rows", "version")
+
+    def __init__(self, matrix, scales, ids, documents, metadatas, version):
+        self.matrix = matrix
+        self.scales = scales
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.id_rows = {doc_id: i for i, doc_id in enumerate(ids)}
+        self.version = version
+
+
+class NumpyVectorStore:
+    """
+    Exact cosine search over an embedding matrix kept in a memory-mapped .npy file
+    (normalised float32, or int8 with per-row scales) next to a JSON table of IDs,
+    documents and metadata. Every write creates new, uniquely named array files and
+    then atomically replaces the table that names them, so a reader always pairs a
+    matrix with the ID table it was written with. A query is one matrix-vector product plus argpartition,
+    so a KB of a few hundred articles needs no index or server. Worker processes
+    opening the same directory share the matrix pages through the OS page cache.
+
+    Same interface as VectorStore, and query results have Chroma's shape:
+    {"ids", "documents", "metadatas", "distances"} as lists of lists, with
+    distance = 1 - cosine similarity (lower is better).
+    """
+    def __init__(self, collection_name: str = "pra_rulebook", directory: str = DEFAULT_NUMPY_STORE_DIR,
+                 dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+        self.collection_name = collection_name
+        self.dtype = dtype
+        self.path = os.path.join(directory, collection_name)
+        os.makedirs(self.path, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._snapshot = self._load()
+
+    # --- Files ---
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _table_version(self) -> Optional[tuple]:
+        # The table is replaced (new inode) on every write, even within one mtime tick
+        try:
+            stat = os.stat(self._file(_TABLE_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> _Snapshot:
+        # A writer may replace the table and remove the arrays it named between our
+        # reading the table and opening them; the new table names files that exist
+        for attempt in range(_LOAD_ATTEMPTS):
+            try:
+                return self._load_once()
+            except FileNotFoundError:
+                if attempt == _LOAD_ATTEMPTS - 1:
+                    raise
+
+    def _load_once(self) -> _Snapshot:
+        version = self._table_version()
+        if version is None:
+            return _Snapshot(None, None, [], [], [], None)
+        with open(self._file(_TABLE_FILE), "r", encoding="utf-8") as f:
+            table = json.load(f)
+        if not table["ids"]:
+            return _Snapshot(None, None, [], [], [], version)
+        matrix = np.load(self._file(table["embeddings_file"]), mmap_mode="r")
+        scales = np.load(self._file(table["scales_file"]), mmap_mode="r") if table["dtype"] == "int8" else None
+        if matrix.shape[0] != len(table["ids"]) or (scales is not None and scales.shape[0] != len(table["ids"])):
+            raise ValueError(f"Corrupt vector store {self.path}: {matrix.shape[0]} embeddings for {len(table['ids'])} IDs")
+        return _Snapshot(matrix, scales, table["ids"], table["documents"], table["metadatas"], version)
+
+    def _current(self) -> _Snapshot:
+        # Another process may have rewritten the store since we mapped it
+        snapshot = self._snapshot
+        if self._table_version() != snapshot.version:
+            with self._write_lock:
+                if self._table_version() != self._snapshot.version:
+                    self._snapshot = self._load()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _write(self, vectors: np.ndarray, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Rewrites the store: arrays go to new files named by a fresh version, then the
+        table naming them atomically replaces the old one. Superseded arrays are removed.
+        """
+        def replace(name, write):
+            tmp_path = f"{self._file(name)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, self._file(name))
+
+        version = uuid.uuid4().hex[:16]
+        table = {"dtype": self.dtype, "ids": ids, "documents": documents, "metadatas": metadatas,
+                 "embeddings_file": None, "scales_file": None}
+        if ids:
+            if self.dtype == "int8":
+                matrix, scales = quantise_int8(vectors)
+                table["scales_file"] = _SCALES_FILE.format(version=version)
+                replace(table["scales_file"], lambda f: np.save(f, scales))
+            else:
+                matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+            table["embeddings_file"] = _EMBEDDINGS_FILE.format(version=version)
+            replace(table["embeddings_file"], lambda f: np.save(f, matrix))
+        replace(_TABLE_FILE, lambda f: f.write(json.dumps(table).encode("utf-8")))
+        self._snapshot = self._load()
+        self._remove_superseded()
+
+    def _remove_superseded(self):
+        """Removes arrays the table on disk no longer names (it may be another writer's by now)."""
+        try:
+            with open(self._file(_TABLE_FILE), "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return
+        current = {table.get("embeddings_file"), table.get("scales_file")}
+        cutoff = time.time() - _CLEANUP_GRACE_S
+        for pattern in (_EMBEDDINGS_FILE, _SCALES_FILE):
+            for path in glob.glob(self._file(pattern.format(version="*"))):
+                try:
+                    if os.path.basename(path) not in current and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass  # Already removed, or still mapped by a reader on Windows
+
+    def _vectors(self, snapshot: _Snapshot) -> np.ndarray:
+        if snapshot.matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        if snapshot.scales is not None:
+            return snapshot.matrix.astype(np.float32) * np.asarray(snapshot.scales)[:, None]
+        return np.array(snapshot.matrix, dtype=np.float32)
+
+    # --- VectorStore interface ---
+
+    def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Upserts documents (dicts with 'id', 'text', 'metadata') and their embeddings."""
+        if not documents:
+            return
+        new_vectors = _normalise(np.asarray(embeddings, dtype=np.float32))
+        with self._write_lock:
+            snapshot = self._load()
+            vectors = self._vectors(snapshot)
+            ids, texts, metadatas = list(snapshot.ids), list(snapshot.documents), list(snapshot.metadatas)
+            rows = dict(snapshot.id_rows)
+            if vectors.shape[0] and vectors.shape[1] != new_vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {new_vectors.shape[1]} does not match the store ({vectors.shape[1]})")
+
+            appended = []
+            for doc, vector in zip(documents, new_vectors):
+                row = rows.get(doc["id"])
+                if row is None:
+                    rows[doc["id"]] = len(ids)
+                    ids.append(doc["id"])
+                    texts.append(doc["text"])
+                    metadatas.append(doc["metadata"])
+                    appended.append(vector)
+                else:
+                    texts[row], metadatas[row] = doc["text"], doc["metadata"]
+                    vectors[row] = vector
+            if appended:
+                vectors = np.vstack([vectors, np.asarray(appended)]) if vectors.shape[0] else np.asarray(appended)
+            self._write(vectors, ids, texts, metadatas)
+
+    def get_manifest(self) -> Dict[str, str]:
+        snapshot = self._current()
+        return {doc_id: (metadata or {}).get("content_hash", "") for doc_id, metadata in zip(snapshot.ids, snapshot.metadatas)}
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        with self._write_lock:
+            snapshot = self._load()
+            drop = set(ids)
+            keep = [i for i, doc_id in enumerate(snapshot.ids) if doc_id not in drop]
+            vectors = self._vectors(snapshot)
+            self._write(
+                vectors[keep] if len(keep) else vectors[:0],
+                [snapshot.ids[i] for i in keep],
+                [snapshot.documents[i] for i in keep],
+                [snapshot.metadatas[i] for i in keep],
+            )
+
+    def count(self) -> int:
+        return len(self._current().ids)
+
+    def query(self, query_embedding: List[float], n_results: int = 5):
+        with tracing.span("vector_store.query", n_results=n_results, backend="numpy"):
+            return self._search(np.asarray([query_embedding], dtype=np.float32), n_results)
+
+    def query_many(self, query_embeddings: Sequence[List[float]], n_results: int = 5):
+        """Batched query: one matrix product for all queries; one result list per query."""
+        with tracing.span("vector_store.query_many", n_results=n_results, queries=len(query_embeddings), backend="numpy"):
+            return self._search(np.asarray(query_embeddings, dtype=np.float32), n_results)
+
+    def _search(self, queries: np.ndarray, n_results: int) -> Dict[str, List[list]]:
+        snapshot = self._current()
+        n_queries = queries.shape[0]
+        k = min(n_results, len(snapshot.ids))
+        if k <= 0:
+            return {key: [[] for _ in range(n_queries)] for key in ("ids", "documents", "metadatas", "distances")}
+
+        scores = _normalise(queries) @ snapshot.matrix.T  # (queries, documents)
+        if snapshot.scales is not None:
+            scores = scores * snapshot.scales
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (n_queries, 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        # Best first; ties go to the earlier document
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return {
+            "ids": [[snapshot.ids[i] for i in row] for row in top],
+            "documents": [[snapshot.documents[i] for i in row] for row in top],
+            "metadatas": [[snapshot.metadatas[i] for i in row] for row in top],
+            "distances": [[float(1.0 - s) for s in row] for row in top_scores],
+        }
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, Callable
+
+from src.retrieval.embeddings import EmbeddingGenerator
+from src.retrieval.vector_store import VectorStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_COLLECTION = "pra_rulebook"
+DEFAULT_KB_PATH = "data/knowledge_base/pra_rulebook_kb.json"
+# "chroma" (persistent Chroma collection), "numpy" (memory-mapped float32) or "numpy-int8"
+VECTOR_BACKENDS = ("chroma", "numpy", "numpy-int8")
+DEFAULT_VECTOR_BACKEND = os.getenv("COREP_VECTOR_BACKEND", "chroma")
+
+# Process-wide singletons. Each entry is created lazily on first use and then
+# shared by every Streamlit session, generator and batch worker.
+_embedding_generators: Dict[str, EmbeddingGenerator] = {}
+_vector_stores: Dict[tuple, Any] = {}
+_retrievers: Dict[tuple, Any] = {}
+_hybrid_retrievers: Dict[tuple, Any] = {}
+_load_seconds: Dict[str, float] = {}
+
+_registry_lock = threading.Lock()
+_key_locks: Dict[tuple, threading.Lock] = {}
+
+
+def _get_or_create(cache: Dict, key, factory: Callable, label: str):
+    """
+    Double-checked creation with a lock per key, so loading one model does not
+    block lookups of resources that are already loaded.
+    """
+    instance = cache.get(key)
+    if instance is not None:
+        return instance
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault((label, key), threading.Lock())
+
+    with key_lock:
+        instance = cache.get(key)
+        if instance is None:
+            start = time.perf_counter()
+            instance = factory()
+            # Registry dicts are only written under _registry_lock, so memory_stats can copy them
+            with _registry_lock:
+                _load_seconds[f"{label}:{key}"] = time.perf_counter() - start
+                cache[key] = instance
+        return instance
+
+
+def get_embedding_generator(model_name: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingGenerator:
+    return _get_or_create(_embedding_generators, model_name, lambda: EmbeddingGenerator(model_name), "embedding")
+
+
+def collection_for_model(collection_name: str, model_name: str) -> str:
+    """
+    Physical collection holding `model_name`'s embeddings. The default model keeps the
+    plain name (existing stores stay valid); other models get their own collection,
+    so retrievers on different models do not re-embed over each other's content.
+    """
+    if model_name == DEFAULT_EMBEDDING_MODEL:
+        return collection_name
+    name = f"{collection_name}__{re.sub(r'[^A-Za-z0-9._-]+', '-', model_name).strip('-._')}"
+    if len(name) > 63:  # Chroma's limit on collection names
+        name = f"{name[:50]}-{hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:12]}"
+    return name
+
+
+def _create_vector_store(collection_name: str, backend: str):
+    if backend == "chroma":
+        return VectorStore(collection_name)
+    if backend in ("numpy", "numpy-int8"):
+        from src.retrieval.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(collection_name, dtype="int8" if backend == "numpy-int8" else "float32")
+    raise ValueError(f"Unknown vector backend {backend!r}; expected one of {VECTOR_BACKENDS}")
+
+
+def get_vector_store(collection_name: str = DEFAULT_COLLECTION, backend: str = None,
+                     model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """
+    Shared vector store for a collection of `model_name` embeddings. `backend` defaults
+    to COREP_VECTOR_BACKEND ("chroma" unless set); every backend has the VectorStore interface.
+    """
+    backend = backend or DEFAULT_VECTOR_BACKEND
+    return _get_or_create(_vector_stores, (collection_name, model_name, backend),
+                          lambda: _create_vector_store(collection_for_model(collection_name, model_name), backend),
+                          "vector_store")
+
+
+def get_retriever(kb_path: str = DEFAULT_KB_PATH, model_name: str = DEFAULT_EMBEDDING_MODEL,
+                  collection_name: str = DEFAULT_COLLECTION, vector_backend: str = None):
+    """
+    Shared Retriever for a KB / model / collection / backend combination. The KB is
+    synced into the vector store once per process rather than once per generator.
+    """
+    from src.retrieval.retriever import Retriever
+
+    vector_backend = vector_backend or DEFAULT_VECTOR_BACKEND
+    key = (kb_path, model_name, collection_name, vector_backend)
+    return _get_or_create(
+        _retrievers, key,
+        lambda: Retriever(kb_path=kb_path, model_name=model_name, collection_name=collection_name,
+                          vector_store=get_vector_store(collection_name, vector_backend, model_name)),
+        "retriever"
+    )
+
+
+def get_hybrid_retriever(kb_path: str = DEFAULT_KB_PATH, model_name: str = DEFAULT_EMBEDDING_MODEL,
+                         collection_name: str = DEFAULT_COLLECTION, vector_backend: str = None):
+    """
+    Shared HybridRetriever (dense + BM25) on top of the shared dense Retriever.
+    """
+    from src.retrieval.hybrid import HybridRetriever
+
+    vector_backend = vector_backend or DEFAULT_VECTOR_BACKEND
+    key = (kb_path, model_name, collection_name, vector_backend)
+    return _get_or_create(
+        _hybrid_retrievers, key,
+        lambda: HybridRetriever(kb_path=kb_path,
+                                dense_retriever=get_retriever(kb_path, model_name, collection_name, vector_backend)),
+        "hybrid_retriever"
+    )
+
+
+def warm_up(kb_path: str = DEFAULT_KB_PATH, model_name: str = DEFAULT_EMBEDDING_MODEL,
+            collection_name: str = DEFAULT_COLLECTION, vector_backend: str = None) -> Dict[str, float]:
+    """
+    Eagerly loads the embedding model, vector store and retriever (e.g. at app or worker start).
+    Returns the load time in seconds of each resource.
+    """
+    retriever = get_retriever(kb_path, model_name, collection_name, vector_backend)
+    # Touch the lazily-loaded model so the first query does not pay for it
+    retriever.embedding_generator
+    return dict(_load_seconds)
+
+
+def _model_bytes(generator: EmbeddingGenerator) -> int:
+    try:
+        return sum(p.numel() * p.element_size() for p in generator.model.parameters())
+    except Exception:
+        return 0
+
+
+def memory_stats() -> Dict[str, Any]:
+    """
+    Summary of what the registry holds, for diagnostics. The registry is copied
+    under the lock; the (possibly slow) per-resource stats are read outside it.
+    """
+    with _registry_lock:
+        embedding_generators = dict(_embedding_generators)
+        vector_stores = dict(_vector_stores)
+        retrievers = dict(_retrievers)
+        hybrid_count = len(_hybrid_retrievers)
+        load_seconds = dict(_load_seconds)
+
+    stats = {
+        "embedding_models": {
+            name: {"parameter_mb": round(_model_bytes(gen) / (1024 * 1024), 1), "cache": gen.cache_stats()}
+            for name, gen in embedding_generators.items()
+        },
+        "vector_stores": {
+            f"{name} ({model}, {backend})": {"documents": store.count()}
+            for (name, model, backend), store in vector_stores.items()
+        },
+        "retrievers": len(retrievers) + hybrid_count,
+        "retrieval_caches": {
+            f"{collection} ({backend})": retriever.result_cache.stats()
+            for (_, _, collection, backend), retriever in retrievers.items() if retriever.result_cache is not None
+        },
+        "load_seconds": {k: round(v, 3) for k, v in load_seconds.items()},
+    }
+    if resource is not None:
+        # ru_maxrss is reported in KB on Linux
+        stats["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return stats
+
+
+def clear():
+    """Drops all shared instances (used by tests)."""
+    with _registry_lock:
+        _embedding_generators.clear()
+        _vector_stores.clear()
+        _retrievers.clear()
+        _hybrid_retrievers.clear()
+        _load_seconds.clear()
+        _key_locks.clear()
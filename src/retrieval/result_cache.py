@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+from typing import List, Dict, Any, Optional
+
+from src.llm.cache import ResponseCache
+from src.retrieval.lru_cache import LRUCache
+
+# Set to a SQLite path to keep retrieval results across processes and restarts
+RETRIEVAL_CACHE_PATH_ENV = "COREP_RETRIEVAL_CACHE_PATH"
+
+
+class RetrievalCache:
+    """
+    Retrieval results keyed on (index version, normalised query, top_k, filters).
+    An in-memory LRU sits in front of an optional SQLite tier (a ResponseCache),
+    so repeated scenario descriptions skip both embedding and search.
+
+    The index version is part of every key: re-ingesting changed content produces
+    a new version and the old entries are never hit again (they age out of the LRU,
+    and out of the disk tier through its TTL / size eviction).
+    Results are stored serialised, so callers can mutate what they get back.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None,
+                 disk_path: Optional[str] = None, disk_max_entries: int = 50000):
+        self.memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = None
+        if disk_path:
+            disk_options = {"max_entries": disk_max_entries}
+            if ttl_seconds is not None:
+                disk_options["ttl_seconds"] = ttl_seconds
+            self.disk = ResponseCache(path=disk_path, **disk_options)
+
+    @staticmethod
+    def normalise_query(query: str) -> str:
+        # Same normalisation as the embedding cache: whitespace differences do not matter
+        return " ".join(query.split())
+
+    @classmethod
+    def make_key(cls, index_version: str, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps([index_version, cls.normalise_query(query), top_k, filters or None],
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, results: List[Dict[str, Any]]):
+        value = json.dumps(results, ensure_ascii=False)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory": self.memory.stats(), "disk": self.disk.stats() if self.disk is not None else None}
+
+
+def create_retrieval_cache() -> RetrievalCache:
+    """In-memory cache, with a disk tier when COREP_RETRIEVAL_CACHE_PATH is set."""
+    return RetrievalCache(disk_path=os.getenv(RETRIEVAL_CACHE_PATH_ENV) or None)
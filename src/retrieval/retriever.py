@@ -1,72 +1,216 @@
 from src.retrieval.embeddings import EmbeddingGenerator
 from src.retrieval.vector_store import VectorStore
+from src.retrieval.registry import get_embedding_generator, get_vector_store
+from src.retrieval.filters import matches_filters
+from src.retrieval.result_cache import RetrievalCache, create_retrieval_cache
+from src.observability import tracing
+import hashlib
 import json
 import os
-import uuid
+from typing import List
+
+
+def load_kb_documents(kb_path: str):
+    """
+    Loads the KB JSON into {'id', 'text', 'metadata'} documents.
+    Returns an empty list if the file does not exist.
+    """
+    if not os.path.exists(kb_path):
+        print(f"Warning: KB file not found at {kb_path}")
+        return []
+
+    with open(kb_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    documents = []
+    for item in data:
+        text = f"{item['article']} - {item['section']}\n{item['text']}"
+
+        # Metadata must be flat dict for Chroma
+        metadata = {
+            "article": item.get("article", ""),
+            "section": item.get("section", ""),
+            "tags": ",".join(item.get("tags", [])),
+            "template_rows": ",".join(item.get("template_rows", [])),
+            "effective_date": item.get("effective_date", "")
+        }
+
+        documents.append({
+            "id": item.get("article", ""),
+            "text": text,
+            "metadata": metadata
+        })
+    return documents
+
 
 class Retriever:
-    def __init__(self, kb_path="data/knowledge_base/pra_rulebook_kb.json"):
-        self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore()
+    def __init__(self, kb_path="data/knowledge_base/pra_rulebook_kb.json", model_name="all-MiniLM-L6-v2",
+                 collection_name="pra_rulebook", embedding_generator: EmbeddingGenerator = None,
+                 vector_store: VectorStore = None, result_cache: RetrievalCache = None, use_result_cache: bool = True):
+        # Model and store come from the process-wide registry unless injected
+        self.model_name = embedding_generator.model_name if embedding_generator else model_name
+        self._embedding_generator = embedding_generator
+        self.vector_store = vector_store or get_vector_store(collection_name, model_name=self.model_name)
         self.kb_path = kb_path
+        # Repeated queries against an unchanged index skip embedding and search
+        self.result_cache = (result_cache or create_retrieval_cache()) if use_result_cache else None
+        self.index_version = ""
         self._initialize_kb()
 
+    @property
+    def embedding_generator(self) -> EmbeddingGenerator:
+        """
+        Loaded on first use: an unchanged KB needs no embeddings at startup.
+        """
+        if self._embedding_generator is None:
+            self._embedding_generator = get_embedding_generator(self.model_name)
+        return self._embedding_generator
+
     def _initialize_kb(self):
         """
-        Loads KB from JSON and ingests into Vector Store if empty or needed.
-        For prototype, we'll simple check if collection is empty or just upsert all (idempotent).
+        Syncs the Vector Store with the KB JSON.
+        Each document carries a content hash in its metadata; only new or changed
+        articles are embedded, and IDs no longer in the KB are deleted.
         """
-        if not os.path.exists(self.kb_path):
-            print(f"Warning: KB file not found at {self.kb_path}")
+        documents = load_kb_documents(self.kb_path)
+        if not documents:
+            self.index_version = self._index_version([])
             return
 
-        with open(self.kb_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        documents = []
-        texts_to_embed = []
-
-        for item in data:
-            # Create a unique ID or use article ID
-            doc_id = item.get("article", str(uuid.uuid4()))
-            text = f"{item['article']} - {item['section']}\n{item['text']}"
-            
-            # Metadata must be flat dict for Chroma
-            metadata = {
-                "article": item.get("article", ""),
-                "section": item.get("section", ""),
-                "tags": ",".join(item.get("tags", []))
-            }
-            
-            documents.append({
-                "id": doc_id,
-                "text": text,
-                "metadata": metadata
-            })
-            texts_to_embed.append(text)
-
-        if documents:
-            embeddings = self.embedding_generator.generate_batch(texts_to_embed)
-            self.vector_store.add_documents(documents, embeddings)
-            print(f"Ingested {len(documents)} articles into Vector Store.")
-
-    def retrieve(self, query: str, top_k: int = 5):
+        for doc in documents:
+            content_hash = self._content_hash(doc["text"], doc["metadata"], self.model_name)
+            doc["metadata"]["content_hash"] = content_hash
+            # Fall back to the content hash so the ID stays stable across runs
+            doc["id"] = doc["id"] or content_hash
+
+        manifest = self.vector_store.get_manifest()
+        kb_ids = {doc["id"] for doc in documents}
+        stale_ids = [doc_id for doc_id in manifest if doc_id not in kb_ids]
+        changed = [doc for doc in documents if manifest.get(doc["id"]) != doc["metadata"]["content_hash"]]
+
+        if stale_ids:
+            self.vector_store.delete(stale_ids)
+
+        if changed:
+            embeddings = self.embedding_generator.generate_batch([doc["text"] for doc in changed])
+            self.vector_store.add_documents(changed, embeddings)
+        # Set once the store holds this content
+        self.index_version = self._index_version(documents)
+
+        print(f"Vector Store synced: {len(changed)} embedded, {len(stale_ids)} removed, {len(documents) - len(changed)} unchanged.")
+
+    @staticmethod
+    def _content_hash(text: str, metadata: dict, model_name: str) -> str:
+        # The embedding model is part of the hash so switching models re-embeds everything
+        payload = json.dumps({"text": text, "metadata": metadata, "model": model_name}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _index_version(self, documents) -> str:
+        """
+        Fingerprint of what the store holds after a sync: document IDs and content
+        hashes (which include the embedding model) plus the store type. Any re-ingest
+        that changes the indexed content changes it, invalidating cached results.
+        """
+        digest = hashlib.sha256(f"{type(self.vector_store).__name__}:{getattr(self.vector_store, 'dtype', '')}".encode("utf-8"))
+        for doc_id, content_hash in sorted((doc["id"], doc["metadata"]["content_hash"]) for doc in documents):
+            digest.update(f"\x00{doc_id}\x00{content_hash}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cached(self, queries: List[str], top_k: int, filters: dict):
+        """Returns (cache keys, cached results or None per query)."""
+        if self.result_cache is None:
+            return [None] * len(queries), [None] * len(queries)
+        keys = [RetrievalCache.make_key(self.index_version, query, top_k, filters) for query in queries]
+        results = [self.result_cache.get(key) for key in keys]
+        misses = results.count(None)
+        tracing.record(retrieval_cache_hits=len(queries) - misses, retrieval_cache_misses=misses)
+        return keys, results
+
+    def retrieve(self, query: str, top_k: int = 5, filters: dict = None):
         """
         Retrieves relevant documents for a query.
+        `filters` (see matches_filters) are applied to an over-fetched candidate set,
+        widened until top_k documents match or the collection is exhausted.
         """
-        query_embedding = self.embedding_generator.generate(query)
-        results = self.vector_store.query(query_embedding, n_results=top_k)
-        
-        # Format results
-        # Chroma returns lists of lists
+        with tracing.span("retriever.retrieve", top_k=top_k):
+            (key,), (results,) = self._cached([query], top_k, filters)
+            if results is None:
+                results = self._retrieve(query, top_k, filters)
+                if key is not None:
+                    self.result_cache.set(key, results)
+            return results
+
+    def _retrieve(self, query: str, top_k: int, filters: dict):
+        with tracing.span("embed_query"):
+            query_embedding = self.embedding_generator.generate(query)
+        def search(embeddings, n_results):
+            return self.vector_store.query(embeddings[0], n_results=n_results)
+        return self._search([query_embedding], top_k, filters, search)[0]
+
+    def retrieve_many(self, queries: List[str], top_k: int = 5, filters: dict = None):
+        """
+        Batched retrieve: all queries are embedded in one model call and searched with
+        one multi-embedding store query. Returns one result list per query, in order.
+        """
+        if not queries:
+            return []
+        with tracing.span("retriever.retrieve_many", top_k=top_k, queries=len(queries)):
+            keys, results = self._cached(list(queries), top_k, filters)
+            missing = [i for i, docs in enumerate(results) if docs is None]
+            if missing:
+                # Only the cache misses are embedded and searched
+                fetched = self._retrieve_many([queries[i] for i in missing], top_k, filters)
+                for i, docs in zip(missing, fetched):
+                    results[i] = docs
+                    if keys[i] is not None:
+                        self.result_cache.set(keys[i], docs)
+            return results
+
+    def _retrieve_many(self, queries: List[str], top_k: int, filters: dict):
+        with tracing.span("embed_query", queries=len(queries)):
+            query_embeddings = self.embedding_generator.generate_batch(queries)
+        return self._search(query_embeddings, top_k, filters, self.vector_store.query_many)
+
+    def _search(self, query_embeddings, top_k: int, filters: dict, search):
+        """
+        Formatted results per query embedding; `search(embeddings, n_results)` runs the
+        store query. With filters the search starts at top_k * 4 candidates, and queries
+        left with fewer than top_k matches are searched again with twice as many, up to
+        the whole collection.
+        """
+        formatted = [None] * len(query_embeddings)
+        pending = list(range(len(query_embeddings)))
+        n_results = top_k * 4 if filters else top_k
+        collection_size = None
+        while pending:
+            results = search([query_embeddings[i] for i in pending], n_results)
+            for row, i in enumerate(pending):
+                formatted[i] = self._format_results(results, row, top_k, filters)
+            if not filters:
+                break
+            if collection_size is None:
+                collection_size = self.vector_store.count()
+            if n_results >= collection_size:
+                break
+            pending = [i for i in pending if len(formatted[i]) < top_k]
+            n_results = min(n_results * 2, collection_size)
+        return formatted
+
+    @staticmethod
+    def _format_results(results, row: int, top_k: int, filters: dict):
+        # Chroma returns lists of lists, one list per query embedding
         formatted_results = []
         if results and results['documents']:
-            num_results = len(results['documents'][0])
+            num_results = len(results['documents'][row])
             for i in range(num_results):
+                metadata = results['metadatas'][row][i]
+                if not matches_filters(metadata, filters):
+                    continue
                 formatted_results.append({
-                    "text": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i],
-                    "score": results['distances'][0][i] if 'distances' in results else None
+                    "id": results['ids'][row][i],
+                    "text": results['documents'][row][i],
+                    "metadata": metadata,
+                    "score": results['distances'][row][i] if 'distances' in results else None
                 })
         
-        return formatted_results
+        return formatted_results[:top_k]
@@ -1,15 +1,17 @@
-import chromadb
-from chromadb.config import Settings
 import os
 from typing import List, Dict, Any
 
+from src.observability import tracing
+
 class VectorStore:
     def __init__(self, collection_name="pra_rulebook"):
         # persistent storage
         db_path = os.path.join(os.getcwd(), "data", "chroma_db")
         if not os.path.exists(db_path):
             os.makedirs(db_path)
-            
+
+        # Imported on first use so modules that only reference VectorStore stay cheap to import
+        import chromadb
         self.client = chromadb.PersistentClient(path=db_path)
         self.collection = self.client.get_or_create_collection(name=collection_name)
 
@@ -33,11 +35,42 @@ class VectorStore:
             metadatas=metadatas
         )
 
+    def get_manifest(self) -> Dict[str, str]:
+        """
+        Returns {id: content_hash} for every stored document, used to skip re-embedding unchanged content.
+        """
+        existing = self.collection.get(include=["metadatas"])
+        return {
+            doc_id: (metadata or {}).get("content_hash", "")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+    def delete(self, ids: List[str]):
+        """
+        Removes documents by ID.
+        """
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
     def query(self, query_embedding: List[float], n_results: int = 5):
         """
         Queries the store.
         """
-        return self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        with tracing.span("vector_store.query", n_results=n_results):
+            return self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results
+            )
+
+    def query_many(self, query_embeddings: List[List[float]], n_results: int = 5):
+        """
+        Queries the store with several embeddings in one call; one result list per query.
+        """
+        with tracing.span("vector_store.query_many", n_results=n_results, queries=len(query_embeddings)):
+            return self.collection.query(
+                query_embeddings=list(query_embeddings),
+                n_results=n_results
+            )
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join("data", "runs", "corep_runs.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    scenario_id TEXT,
+    lei_code TEXT,
+    reporting_date TEXT,
+    provider TEXT,
+    model_name TEXT,
+    prompt_hash TEXT,
+    input_text TEXT,
+    report TEXT NOT NULL,
+    is_valid INTEGER,
+    error_count INTEGER,
+    warning_count INTEGER,
+    validation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_entity ON runs(lei_code, reporting_date, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_model ON runs(model_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_prompt ON runs(prompt_hash);
+
+CREATE TABLE IF NOT EXISTS audit_records (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    value REAL,
+    reasoning TEXT,
+    source_articles TEXT,
+    confidence REAL,
+    PRIMARY KEY (run_id, field)
+);
+CREATE INDEX IF NOT EXISTS idx_audit_field ON audit_records(field);
+
+CREATE TABLE IF NOT EXISTS context_docs (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (run_id, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_context_doc ON context_docs(doc_id);
+
+CREATE TABLE IF NOT EXISTS run_traces (
+    run_id INTEGER PRIMARY KEY REFERENCES runs(run_id) ON DELETE CASCADE,
+    trace TEXT NOT NULL
+);
+"""
+
+_SUMMARY_COLUMNS = (
+    "run_id", "created_at", "scenario_id", "lei_code", "reporting_date", "provider",
+    "model_name", "prompt_hash", "is_valid", "error_count", "warning_count"
+)
+
+
+def prompt_hash(*parts: str) -> str:
+    """Short fingerprint of the prompt templates a run was generated with."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class RunStore:
+    """
+    Embedded SQLite store of generated reports, their audit trails, retrieved
+    context IDs and validation summaries, indexed by LEI, reporting date,
+    model and prompt hash.
+    """
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def save_run(self, report: Dict[str, Any], **metadata) -> int:
+        """
+        Stores one report. Metadata keys: scenario_id, lei_code, reporting_date,
+        provider, model_name, prompt_hash, input_text, context_ids, validation, trace.
+        """
+        return self.save_runs([dict(metadata, report=report)])[0]
+
+    def save_runs(self, runs: Iterable[Dict[str, Any]]) -> List[int]:
+        """Bulk insert in a single transaction; each item has a "report" plus save_run metadata."""
+        now = time.time()
+        run_ids = []
+        with self._lock, self._conn:
+            for run in runs:
+                report = dict(run["report"])
+                audit_trail = report.pop("audit_trail", None) or {}
+                validation = run.get("validation") or {}
+                cursor = self._conn.execute(
+                    "INSERT INTO runs (created_at, scenario_id, lei_code, reporting_date, provider, model_name,"
+                    " prompt_hash, input_text, report, is_valid, error_count, warning_count, validation)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        now, run.get("scenario_id"), run.get("lei_code"), run.get("reporting_date"),
+                        run.get("provider"), run.get("model_name"), run.get("prompt_hash"),
+                        run.get("input_text"), json.dumps(report),
+                        None if not validation else int(validation["is_valid"]),
+                        validation.get("error_count"), validation.get("warning_count"),
+                        json.dumps(validation) if validation else None,
+                    )
+                )
+                run_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO audit_records (run_id, field, value, reasoning, source_articles, confidence)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, field, record.get("value"), record.get("reasoning"),
+                         json.dumps(record.get("source_articles", [])), record.get("confidence"))
+                        for field, record in audit_trail.items()
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT INTO context_docs (run_id, rank, doc_id) VALUES (?, ?, ?)",
+                    [(run_id, rank, doc_id) for rank, doc_id in enumerate(run.get("context_ids") or [])]
+                )
+                if run.get("trace"):
+                    self._conn.execute("INSERT INTO run_traces (run_id, trace) VALUES (?, ?)",
+                                       (run_id, json.dumps(run["trace"])))
+                run_ids.append(run_id)
+        return run_ids
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Full run: summary columns plus report (with audit_trail), validation, input_text, context_ids and trace."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_SUMMARY_COLUMNS)}, input_text, report, validation FROM runs WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            audit_rows = self._conn.execute(
+                "SELECT field, value, reasoning, source_articles, confidence FROM audit_records WHERE run_id = ?",
+                (run_id,)
+            ).fetchall()
+            context_ids = [r[0] for r in self._conn.execute(
+                "SELECT doc_id FROM context_docs WHERE run_id = ? ORDER BY rank", (run_id,)
+            )]
+            trace_row = self._conn.execute("SELECT trace FROM run_traces WHERE run_id = ?", (run_id,)).fetchone()
+
+        run = self._summary(row[:len(_SUMMARY_COLUMNS)])
+        input_text, report, validation = row[len(_SUMMARY_COLUMNS):]
+        report = json.loads(report)
+        report["audit_trail"] = {
+            field: {"value": value, "reasoning": reasoning,
+                    "source_articles": json.loads(sources), "confidence": confidence}
+            for field, value, reasoning, sources, confidence in audit_rows
+        }
+        run.update({
+            "input_text": input_text,
+            "report": report,
+            "validation": json.loads(validation) if validation else None,
+            "context_ids": context_ids,
+            "trace": json.loads(trace_row[0]) if trace_row else None,
+        })
+        return run
+
+    def find_runs(self, lei_code: str = None, reporting_date: str = None, model_name: str = None,
+                  prompt_hash: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Run summaries (no report bodies) matching all given filters, newest first."""
+        clauses, params = [], []
+        for column, value in (("lei_code", lei_code), ("reporting_date", reporting_date),
+                              ("model_name", model_name), ("prompt_hash", prompt_hash)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM runs {where} ORDER BY created_at DESC, run_id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def latest_run(self, lei_code: str, reporting_date: str) -> Optional[Dict[str, Any]]:
+        """The most recent full run for an entity and period, e.g. to reopen a submission."""
+        runs = self.find_runs(lei_code=lei_code, reporting_date=reporting_date, limit=1)
+        return self.get_run(runs[0]["run_id"]) if runs else None
+
+    def compare_runs(self, run_id_a: int, run_id_b: int) -> Dict[str, Dict[str, float]]:
+        """
+        Row-by-row comparison of two runs (e.g. two quarters of one entity):
+        {field: {"a", "b", "change"}} for every numeric field that differs.
+        """
+        a, b = self.get_run(run_id_a), self.get_run(run_id_b)
+        if a is None or b is None:
+            raise KeyError(f"Unknown run: {run_id_a if a is None else run_id_b}")
+        diff = {}
+        for field in sorted(set(a["report"]) | set(b["report"])):
+            value_a, value_b = a["report"].get(field, 0.0), b["report"].get(field, 0.0)
+            if isinstance(value_a, (int, float)) and isinstance(value_b, (int, float)) and value_a != value_b:
+                diff[field] = {"a": value_a, "b": value_b, "change": value_b - value_a}
+        return diff
+
+    def runs_citing(self, doc_id: str) -> List[int]:
+        """IDs of runs whose retrieved context included the document (e.g. an amended article)."""
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT run_id FROM context_docs WHERE doc_id = ? ORDER BY run_id", (doc_id,)
+            )]
+
+    def delete_run(self, run_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _summary(row) -> Dict[str, Any]:
+        summary = dict(zip(_SUMMARY_COLUMNS, row))
+        if summary["is_valid"] is not None:
+            summary["is_valid"] = bool(summary["is_valid"])
+        return summary
+
+
+_default_store: Optional[RunStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> RunStore:
+    """Process-wide store at COREP_RUN_STORE_PATH (or the default path)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = RunStore(os.getenv("COREP_RUN_STORE_PATH", DEFAULT_STORE_PATH))
+        return _default_store
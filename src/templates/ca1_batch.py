@@ -0,0 +1,131 @@
+import re
+from typing import Dict, Any, List, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from src.templates.ca1_template import CA1Template
+
+
+def template_cells() -> Dict[str, str]:
+    """CA1 row ID -> CA1Template field name, e.g. '300' -> 'row_300_goodwill'."""
+    cells = {}
+    for field in CA1Template.model_fields:
+        match = re.match(r"row_(\d{3})_", field)
+        if match:
+            cells[match.group(1)] = field
+    return cells
+
+
+CA1_CELLS = template_cells()
+CA1_COLUMNS = list(CA1_CELLS)  # Column order of report matrices
+CA1_FIELDS = [CA1_CELLS[row] for row in CA1_COLUMNS]
+_FIELD_INDEX = {field: i for i, field in enumerate(CA1_FIELDS)}
+_ROW_INDEX = {row: i for i, row in enumerate(CA1_COLUMNS)}
+
+
+class CA1Batch:
+    """
+    Columnar container for many CA1 reports: one float64 column per row ID plus
+    an entity index. Values live in a single Fortran-ordered matrix, so each
+    column is a contiguous view and the whole batch can be handed to NumPy,
+    pandas or Arrow without copying.
+
+    Convert to/from CA1Template only at the edges (e.g. a single-report UI view);
+    audit trails are not carried.
+    """
+    def __init__(self, values: np.ndarray, entity_ids: Optional[Sequence[str]] = None):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(CA1_COLUMNS):
+            raise ValueError(f"Expected a matrix with {len(CA1_COLUMNS)} columns, got shape {values.shape}")
+        self.values = np.asfortranarray(values)
+        self.entity_ids = list(entity_ids) if entity_ids is not None else [str(i) for i in range(len(values))]
+        if len(self.entity_ids) != len(values):
+            raise ValueError("entity_ids must have one entry per report")
+
+    @classmethod
+    def zeros(cls, n: int, entity_ids: Optional[Sequence[str]] = None) -> "CA1Batch":
+        return cls(np.zeros((n, len(CA1_COLUMNS)), dtype=np.float64, order="F"), entity_ids)
+
+    @classmethod
+    def from_templates(cls, templates: Sequence[CA1Template], entity_ids: Optional[Sequence[str]] = None) -> "CA1Batch":
+        batch = cls.zeros(len(templates), entity_ids)
+        for j, field in enumerate(CA1_FIELDS):
+            batch.values[:, j] = [getattr(t, field) for t in templates]
+        return batch
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], entity_ids: Optional[Sequence[str]] = None) -> "CA1Batch":
+        """
+        Builds a batch from report dicts (e.g. model_dump() output or LLM JSON).
+        Unknown keys are ignored; missing or null rows are 0.
+        """
+        records = list(records)
+        batch = cls.zeros(len(records), entity_ids)
+        for i, record in enumerate(records):
+            for key, value in record.items():
+                j = _FIELD_INDEX.get(key)
+                if j is not None and value is not None:
+                    batch.values[i, j] = value
+        return batch
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def column(self, key: str) -> np.ndarray:
+        """View of one row ID across all entities; accepts '300' or 'row_300_goodwill'."""
+        j = _ROW_INDEX.get(key)
+        if j is None:
+            j = _FIELD_INDEX[key]
+        return self.values[:, j]
+
+    __getitem__ = column
+
+    def calculate_totals(self) -> "CA1Batch":
+        """
+        Vectorised CA1Template.calculate_totals over every entity, in place.
+        """
+        c = self.column
+        np.add(c("140"), c("150"), out=c("130"))
+
+        # Deductions (070, 300, 340, 370) are stored as negative values
+        cet1 = c("020")
+        cet1[:] = 0.0
+        for row in ("040", "060", "130", "180", "200", "070", "300", "340", "370"):
+            cet1 += c(row)
+
+        np.add(c("540"), c("550"), out=c("530"))
+        np.add(c("020"), c("530"), out=c("015"))
+        np.add(c("760"), c("770"), out=c("750"))
+        np.add(c("015"), c("750"), out=c("010"))
+        return self
+
+    def to_matrix(self) -> np.ndarray:
+        """The underlying (entities x CA1_COLUMNS) matrix, without copying."""
+        return self.values
+
+    def template(self, index: int) -> CA1Template:
+        return CA1Template(**dict(zip(CA1_FIELDS, self.values[index].tolist())))
+
+    def to_templates(self) -> List[CA1Template]:
+        return [self.template(i) for i in range(len(self))]
+
+    def to_records(self) -> List[Dict[str, float]]:
+        return [dict(zip(CA1_FIELDS, row)) for row in self.values.tolist()]
+
+    def to_pandas(self):
+        """DataFrame indexed by entity with one column per CA1 field, sharing memory with the batch."""
+        import pandas as pd
+
+        index = pd.Index(self.entity_ids, name="entity_id")
+        return pd.DataFrame(self.values, index=index, columns=CA1_FIELDS, copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table with an entity_id column; the float64 columns are zero-copy views."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("to_arrow requires pyarrow: pip install pyarrow") from e
+
+        columns = [pa.array(self.entity_ids, type=pa.string())]
+        columns += [pa.array(self.values[:, j]) for j in range(len(CA1_FIELDS))]
+        return pa.Table.from_arrays(columns, names=["entity_id"] + CA1_FIELDS)
@@ -53,18 +53,27 @@ class CA1Template(BaseModel):
     # Row 340: Other Intangible Assets (Deduction)
     row_340_intangible_assets: float = Field(0.0, description="Other intangible assets (negative value)")
     
+    # Row 370: Deferred tax assets (Deduction)
+    row_370_deferred_tax_assets: float = Field(0.0, description="Deferred tax assets on temporary differences (negative value)")
+    
     # Row 530: AT1 Capital
     row_530_at1_capital: float = Field(0.0, description="Additional Tier 1 Capital")
     
     # Row 540: AT1 Instruments
     row_540_at1_instruments: float = Field(0.0, description="Capital instruments eligible as AT1 Capital")
     
+    # Row 550: AT1 Share premium
+    row_550_at1_share_premium: float = Field(0.0, description="Share premium related to AT1 instruments")
+    
     # Row 750: Tier 2 Capital
     row_750_tier2_capital: float = Field(0.0, description="Tier 2 Capital")
     
     # Row 760: Tier 2 Instruments
     row_760_tier2_instruments: float = Field(0.0, description="Capital instruments and subordinated loans eligible as Tier 2 Capital")
 
+    # Row 770: T2 Share premium
+    row_770_tier2_share_premium: float = Field(0.0, description="Share premium related to T2 instruments")
+
     # Audit Trail
     audit_trail: Dict[str, AuditRecord] = Field(default_factory=dict, description="Audit trail for each field")
 
@@ -78,7 +87,7 @@ class CA1Template(BaseModel):
         # 1. Calculate CET1 (Row 020)
         # CET1 = Paid Up (040) + Share Premium (060) + Retained Earnings (130) + 
         #        Accumulated OCI (180) + Other Reserves (200) + 
-        #        Adjustments (070, 300, 340 which are deductions/negative)
+        #        Adjustments (070, 300, 340, 370 which are deductions/negative)
         self.row_130_retained_earnings = self.row_140_previous_years_retained + self.row_150_profit_or_loss_eligible
         
         self.row_020_cet1_capital = (
@@ -89,20 +98,21 @@ class CA1Template(BaseModel):
             self.row_200_other_reserves +
             self.row_070_own_cet1_instruments + # deduction
             self.row_300_goodwill +             # deduction
-            self.row_340_intangible_assets      # deduction
+            self.row_340_intangible_assets +    # deduction
+            self.row_370_deferred_tax_assets    # deduction
         )
 
         # 2. Calculate AT1 (Row 530)
-        # AT1 = AT1 Instruments (540)
-        self.row_530_at1_capital = self.row_540_at1_instruments
+        # AT1 = AT1 Instruments (540) + AT1 Share Premium (550)
+        self.row_530_at1_capital = self.row_540_at1_instruments + self.row_550_at1_share_premium
 
         # 3. Calculate Tier 1 (Row 015)
         # Tier 1 = CET1 (020) + AT1 (530)
         self.row_015_tier1_capital = self.row_020_cet1_capital + self.row_530_at1_capital
 
         # 4. Calculate Tier 2 (Row 750)
-        # Tier 2 = T2 Instruments (760)
-        self.row_750_tier2_capital = self.row_760_tier2_instruments
+        # Tier 2 = T2 Instruments (760) + T2 Share Premium (770)
+        self.row_750_tier2_capital = self.row_760_tier2_instruments + self.row_770_tier2_share_premium
 
         # 5. Calculate Own Funds (Row 010)
         # Own Funds = Tier 1 (015) + Tier 2 (750)
@@ -0,0 +1,119 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple, Iterable, Set
+
+from src.templates.mapping import STRUCTURE_PATH, load_row_definitions
+
+_SUM_RANGE = re.compile(r"sum\(rows_(\d+)_to_(\d+)\)")
+_TERM = re.compile(r"([+-])?\s*row_(\d+)")
+
+
+class CellDependencyGraph:
+    """
+    Aggregate -> component dependencies between CA1 rows, derived from the
+    `calculation` fields of ca1_template_structure.json.
+
+    Each aggregate is a signed sum of its components. Rows with sign "negative"
+    are stored as negative values, so they are always added even where the
+    calculation subtracts them. Rows the template model does not hold (e.g. 030)
+    are kept as intermediate nodes.
+    """
+    def __init__(self, formulas: Dict[str, List[Tuple[str, float]]]):
+        self.formulas = formulas
+        self.dependents: Dict[str, List[str]] = {}
+        for aggregate, terms in formulas.items():
+            for component, _ in terms:
+                self.dependents.setdefault(component, []).append(aggregate)
+        self.order = self._topological_order()
+        self._position = {row: i for i, row in enumerate(self.order)}
+
+    @classmethod
+    def from_structure(cls, path: str = STRUCTURE_PATH) -> "CellDependencyGraph":
+        definitions = load_row_definitions(path)
+        formulas = {}
+        for row, definition in definitions.items():
+            terms = parse_calculation(definition.get("calculation", "direct_input"), row, definitions)
+            if terms:
+                formulas[row] = terms
+        return cls(formulas)
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(row):
+            if state.get(row) == "done":
+                return
+            if state.get(row) == "visiting":
+                raise ValueError(f"Cyclic calculation involving row {row}")
+            state[row] = "visiting"
+            for component, _ in self.formulas.get(row, []):
+                visit(component)
+            state[row] = "done"
+            if row in self.formulas:
+                order.append(row)
+
+        for row in sorted(self.formulas):
+            visit(row)
+        return order
+
+    def affected(self, changed: Iterable[str]) -> List[str]:
+        """Aggregates depending (transitively) on the changed rows, in evaluation order."""
+        seen: Set[str] = set()
+        stack = list(changed)
+        while stack:
+            for aggregate in self.dependents.get(stack.pop(), []):
+                if aggregate not in seen:
+                    seen.add(aggregate)
+                    stack.append(aggregate)
+        return sorted(seen, key=self._position.__getitem__)
+
+    def evaluate(self, row: str, values: Dict[str, float]) -> float:
+        return sum(coefficient * values.get(component, 0.0) for component, coefficient in self.formulas[row])
+
+    def recompute(self, values: Dict[str, float], changed: Iterable[str]) -> Dict[str, float]:
+        """
+        Recomputes only the aggregates affected by `changed`, updating `values` in place.
+        Returns the aggregates whose value changed.
+        """
+        updates = {}
+        for row in self.affected(changed):
+            value = self.evaluate(row, values)
+            if values.get(row) != value:
+                values[row] = value
+                updates[row] = value
+        return updates
+
+    def recompute_all(self, values: Dict[str, float]) -> Dict[str, float]:
+        for row in self.order:
+            values[row] = self.evaluate(row, values)
+        return values
+
+
+def parse_calculation(calculation: str, row: str, definitions: Dict[str, Dict]) -> List[Tuple[str, float]]:
+    """
+    'row_040 + row_050 - row_070' -> [('040', 1), ('050', 1), ('070', 1)] (070 is a deduction)
+    'sum(rows_026_to_520)' -> the direct children of `row` (by hierarchical id) within the range.
+    'direct_input' -> [] ; a trailing '- deductions' adds nothing, deductions being children.
+    """
+    if not calculation or calculation == "direct_input":
+        return []
+
+    terms = []
+    match = _SUM_RANGE.search(calculation)
+    if match:
+        low, high = int(match.group(1)), int(match.group(2))
+        parent_id = definitions[row]["id"]
+        for child, definition in definitions.items():
+            child_id = definition["id"]
+            if child_id.rsplit(".", 1)[0] == parent_id and "." in child_id and low <= int(child) <= high:
+                terms.append((child, 1.0))
+
+    for sign, component in _TERM.findall(calculation):
+        negative_row = definitions.get(component, {}).get("sign") == "negative"
+        terms.append((component, 1.0 if sign != "-" or negative_row else -1.0))
+    return terms
+
+
+@lru_cache(maxsize=None)
+def get_dependency_graph(path: str = STRUCTURE_PATH) -> CellDependencyGraph:
+    return CellDependencyGraph.from_structure(path)
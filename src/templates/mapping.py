@@ -0,0 +1,190 @@
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Any, Optional, Set
+
+from src.templates.ca1_template import CA1Template, AuditRecord
+
+STRUCTURE_PATH = os.path.join("data", "knowledge_base", "ca1_template_structure.json")
+
+# input_data key (sample_scenarios.json) -> (CA1Template field, multiplier).
+# Several keys may feed the same row; contributions are summed.
+INPUT_FIELD_MAP = {
+    "paid_up_capital_instruments": ("row_040_paid_up_capital", 1),
+    "share_premium": ("row_060_share_premium", 1),
+    "own_cet1_instruments": ("row_070_own_cet1_instruments", 1),
+    "retained_earnings_previous": ("row_140_previous_years_retained", 1),
+    "current_year_profit": ("row_150_profit_or_loss_eligible", 1),
+    # Article 26(2): only profits net of dividends are eligible
+    "interim_dividends_paid": ("row_150_profit_or_loss_eligible", -1),
+    "foreseeable_dividends": ("row_150_profit_or_loss_eligible", -1),
+    "accumulated_oci": ("row_180_accumulated_oci", 1),
+    "other_reserves": ("row_200_other_reserves", 1),
+    "goodwill": ("row_300_goodwill", 1),
+    "other_intangible_assets": ("row_340_intangible_assets", 1),
+    "deferred_tax_assets": ("row_370_deferred_tax_assets", 1),
+    "at1_capital_instruments": ("row_540_at1_instruments", 1),
+    "at1_share_premium": ("row_550_at1_share_premium", 1),
+    "t2_subordinated_loans": ("row_760_tier2_instruments", 1),
+    "t2_share_premium": ("row_770_tier2_share_premium", 1),
+}
+
+# Aggregates filled by CA1Template.calculate_totals
+CALCULATED_FIELDS = [
+    "row_130_retained_earnings",
+    "row_020_cet1_capital",
+    "row_530_at1_capital",
+    "row_015_tier1_capital",
+    "row_750_tier2_capital",
+    "row_010_own_funds",
+]
+
+
+def row_id(field_name: str) -> str:
+    """'row_300_goodwill' -> '300'"""
+    return field_name.split("_")[1]
+
+
+@lru_cache(maxsize=None)
+def load_row_definitions(path: str = STRUCTURE_PATH) -> Dict[str, Dict[str, Any]]:
+    """Row definitions from ca1_template_structure.json keyed by row ID."""
+    with open(path, "r", encoding="utf-8") as f:
+        structure = json.load(f)
+    return {field["row"]: field for field in structure["fields"]}
+
+
+def _to_number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", ""))
+        except ValueError:
+            return None
+    return None
+
+
+class MappingResult:
+    def __init__(self, template: CA1Template, mapped_fields: Set[str], unmapped: Dict[str, Any],
+                 has_values: bool = True):
+        self.template = template
+        self.mapped_fields = mapped_fields
+        self.unmapped = unmapped
+        # At least one recognised input was non-zero
+        self.has_values = has_values
+
+    @property
+    def is_complete(self) -> bool:
+        """
+        True if every input was mapped and at least one of them was non-zero, i.e. no
+        LLM call is needed. Empty or all-zero input describes no bank, so it is not
+        answered with an all-zero report.
+        """
+        return self.has_values and not self.unmapped
+
+
+class StructuredInputMapper:
+    """
+    Deterministically maps structured input_data onto CA1Template rows.
+    Deduction rows (sign "negative" in the template structure) are normalised to
+    negative values, and the audit trail cites each row's source_articles.
+    """
+    def __init__(self, field_map: Dict[str, tuple] = None, structure_path: str = STRUCTURE_PATH):
+        self.field_map = field_map or INPUT_FIELD_MAP
+        self.row_definitions = load_row_definitions(structure_path)
+
+    def map(self, input_data: Dict[str, Any]) -> MappingResult:
+        values: Dict[str, float] = {}
+        sources: Dict[str, list] = {}
+        unmapped: Dict[str, Any] = {}
+        has_values = False
+
+        for key, raw_value in input_data.items():
+            number = _to_number(raw_value)
+            if key not in self.field_map or number is None:
+                # Zero/empty extras carry no information, anything else needs the LLM
+                if raw_value not in (None, "", 0, 0.0):
+                    unmapped[key] = raw_value
+                continue
+
+            field, multiplier = self.field_map[key]
+            has_values = has_values or number != 0
+            values[field] = values.get(field, 0.0) + multiplier * number
+            sources.setdefault(field, []).append((key, number, multiplier))
+
+        audit_trail = {}
+        for field, value in values.items():
+            definition = self.row_definitions.get(row_id(field), {})
+            if definition.get("sign") == "negative":
+                value = -abs(value)
+                values[field] = value
+            audit_trail[field] = AuditRecord(
+                value=value,
+                reasoning=self._describe_inputs(definition, sources[field]),
+                source_articles=definition.get("source_articles", []),
+                confidence=1.0
+            )
+
+        template = CA1Template(
+            row_010_own_funds=0.0,
+            row_015_tier1_capital=0.0,
+            row_020_cet1_capital=0.0,
+            **values
+        )
+        template.calculate_totals()
+
+        for field in CALCULATED_FIELDS:
+            definition = self.row_definitions.get(row_id(field), {})
+            audit_trail[field] = AuditRecord(
+                value=getattr(template, field),
+                reasoning=f"Calculated: {definition.get('description', field)} ({definition.get('calculation', 'aggregate')})",
+                source_articles=definition.get("source_articles", []),
+                confidence=1.0
+            )
+        template.audit_trail = audit_trail
+
+        return MappingResult(template, set(values), unmapped, has_values)
+
+    def _describe_inputs(self, definition: Dict[str, Any], inputs: list) -> str:
+        parts = []
+        for key, number, multiplier in inputs:
+            verb = "less" if multiplier < 0 else "from"
+            parts.append(f"{verb} input '{key}' ({number:,.0f})")
+        reasoning = f"Deterministic mapping to '{definition.get('item', 'row')}' " + ", ".join(parts)
+        if definition.get("sign") == "negative":
+            reasoning += "; reported as a deduction (negative)"
+        return reasoning
+
+    def merge(self, report: Dict[str, Any], result: MappingResult) -> Dict[str, Any]:
+        """
+        Overlays the deterministically mapped rows onto an LLM-generated report,
+        so the LLM only decides rows that the mapping could not fill, then recomputes totals.
+        """
+        data = dict(report)
+        audit_trail = dict(data.get("audit_trail") or {})
+        for field in result.mapped_fields:
+            data[field] = getattr(result.template, field)
+            audit_trail[field] = result.template.audit_trail[field].model_dump()
+        data["audit_trail"] = audit_trail
+
+        template = CA1Template(**data)
+        template.calculate_totals()
+        return template.model_dump()
+
+
+def parse_structured_input(scenario_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the input_data dict if the scenario is structured JSON, otherwise None.
+    Accepts either a bare input_data object or a whole scenario with an "input_data" key.
+    """
+    try:
+        data = json.loads(scenario_text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    if isinstance(data.get("input_data"), dict):
+        return data["input_data"]
+    return data
@@ -0,0 +1,324 @@
+import json
+import re
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.templates.ca1_template import CA1Template
+from src.templates.ca1_batch import CA1Batch, CA1_COLUMNS
+from src.templates.mapping import STRUCTURE_PATH, load_row_definitions
+
+# Absolute tolerance for equality checks (rounding), as in the hand-written rules
+EQUALITY_TOLERANCE = 1.0
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<cell>\{\s*(?P<template>\w+)\s*,\s*r(?P<row>\d+)\s*,\s*c(?P<col>\d+)\s*\})
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<op><=|>=|!=|==|=|<|>|\+|-|\*|/|\(|\))
+    )""", re.VERBOSE)
+
+
+def build_matrix(reports: Union[CA1Batch, Sequence[CA1Template]]) -> np.ndarray:
+    """Report matrix for evaluation: rows = entities, columns = CA1_COLUMNS."""
+    if isinstance(reports, CA1Batch):
+        return reports.to_matrix()
+    return CA1Batch.from_templates(reports).to_matrix()
+
+
+# --- Expression graph ---
+
+class Node:
+    key: str
+
+    def evaluate(self, matrix: np.ndarray, column_index: Dict[str, int], memo: Dict[str, np.ndarray]) -> np.ndarray:
+        # Identical sub-expressions across rules share one key and are computed once per pass
+        if self.key not in memo:
+            memo[self.key] = self._evaluate(matrix, column_index, memo)
+        return memo[self.key]
+
+    def cells(self) -> set:
+        return set()
+
+
+class Cell(Node):
+    def __init__(self, row: str):
+        self.row = row
+        self.key = f"r{row}"
+
+    def _evaluate(self, matrix, column_index, memo):
+        col = column_index.get(self.row)
+        if col is None:
+            # Template rows CA1Template does not model (e.g. r160 / r170) are zero;
+            # compile_rules rejects rows the template structure does not define
+            return np.zeros(matrix.shape[0], dtype=np.float64)
+        return matrix[:, col]
+
+    def cells(self):
+        return {self.row}
+
+
+class Const(Node):
+    def __init__(self, value: float):
+        self.value = value
+        self.key = repr(value)
+
+    def _evaluate(self, matrix, column_index, memo):
+        return np.full(matrix.shape[0], self.value, dtype=np.float64)
+
+
+class BinOp(Node):
+    OPS = {
+        "+": np.add,
+        "-": np.subtract,
+        "*": np.multiply,
+        "/": np.divide,
+    }
+
+    def __init__(self, op: str, left: Node, right: Node):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.key = f"({left.key}{op}{right.key})"
+
+    def _evaluate(self, matrix, column_index, memo):
+        return self.OPS[self.op](self.left.evaluate(matrix, column_index, memo), self.right.evaluate(matrix, column_index, memo))
+
+    def cells(self):
+        return self.left.cells() | self.right.cells()
+
+
+class Comparison:
+    def __init__(self, op: str, left: Node, right: Node, source: str):
+        self.op = "=" if op == "==" else op
+        self.left = left
+        self.right = right
+        self.source = source
+
+    def evaluate(self, matrix, column_index, memo):
+        """Returns (passed, lhs, rhs) arrays."""
+        lhs = self.left.evaluate(matrix, column_index, memo)
+        rhs = self.right.evaluate(matrix, column_index, memo)
+        if self.op == "=":
+            passed = np.abs(lhs - rhs) < EQUALITY_TOLERANCE
+        elif self.op == "!=":
+            passed = np.abs(lhs - rhs) >= EQUALITY_TOLERANCE
+        elif self.op == "<=":
+            passed = lhs <= rhs
+        elif self.op == ">=":
+            passed = lhs >= rhs
+        elif self.op == "<":
+            passed = lhs < rhs
+        else:
+            passed = lhs > rhs
+        return passed, lhs, rhs
+
+    def cells(self):
+        return self.left.cells() | self.right.cells()
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+class _Parser:
+    """Recursive-descent parser for DPM-style expressions."""
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    def _tokenize(self, text: str):
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKEN_PATTERN.match(text, pos)
+            if not match:
+                raise RuleSyntaxError(f"Unexpected input at {pos} in '{text}'")
+            if match.group("cell"):
+                tokens.append(("cell", match.group("row")))
+            elif match.group("number"):
+                tokens.append(("number", float(match.group("number"))))
+            else:
+                tokens.append(("op", match.group("op")))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def parse(self) -> Comparison:
+        left = self._additive()
+        kind, op = self._next()
+        if kind != "op" or op not in ("=", "==", "!=", "<=", ">=", "<", ">"):
+            raise RuleSyntaxError(f"Expected a comparison in '{self.text}'")
+        right = self._additive()
+        if self.pos != len(self.tokens):
+            raise RuleSyntaxError(f"Trailing input in '{self.text}'")
+        return Comparison(op, left, right, self.text)
+
+    def _additive(self) -> Node:
+        node = self._term()
+        while self._peek() in (("op", "+"), ("op", "-")):
+            _, op = self._next()
+            node = BinOp(op, node, self._term())
+        return node
+
+    def _term(self) -> Node:
+        node = self._unary()
+        while self._peek() in (("op", "*"), ("op", "/")):
+            _, op = self._next()
+            node = BinOp(op, node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._peek() == ("op", "-"):
+            self._next()
+            return BinOp("-", Const(0.0), self._unary())
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, value = self._next()
+        if kind == "cell":
+            return Cell(value)
+        if kind == "number":
+            return Const(value)
+        if (kind, value) == ("op", "("):
+            node = self._additive()
+            if self._next() != ("op", ")"):
+                raise RuleSyntaxError(f"Expected ')' in '{self.text}'")
+            return node
+        raise RuleSyntaxError(f"Unexpected token {value!r} in '{self.text}'")
+
+
+def parse_expression(text: str) -> Comparison:
+    return _Parser(text).parse()
+
+
+# --- Rules ---
+
+class CompiledRule:
+    def __init__(self, rule_id: str, severity: str, description: str, checks: List[Comparison]):
+        self.rule_id = rule_id
+        self.severity = severity
+        self.description = description
+        self.checks = checks
+        self.cells = set().union(*(check.cells() for check in checks))
+
+    def failure_message(self, results, entity: int) -> str:
+        failures = []
+        for check, (passed, lhs, rhs) in zip(self.checks, results):
+            if not passed[entity]:
+                failures.append(f"{check.source} [{lhs[entity]:,.2f} vs {rhs[entity]:,.2f}]")
+        return f"{self.description}: " + "; ".join(failures)
+
+
+class RuleSet:
+    """
+    Rules compiled once into a shared expression graph and evaluated as NumPy
+    array operations over a matrix of reports.
+    """
+    def __init__(self, rules: List[CompiledRule], columns: List[str] = CA1_COLUMNS):
+        self.rules = rules
+        self.columns = columns
+        self.column_index = {row: i for i, row in enumerate(columns)}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def subset(self, rule_ids) -> "RuleSet":
+        wanted = set(rule_ids)
+        return RuleSet([r for r in self.rules if r.rule_id in wanted], self.columns)
+
+    def evaluate(self, matrix: np.ndarray):
+        """
+        Returns (passed, details): `passed` is a bool array of shape (entities, rules);
+        `details[j]` holds the per-check (passed, lhs, rhs) arrays of rule j, for messages.
+        """
+        memo: Dict[str, np.ndarray] = {}
+        passed = np.ones((matrix.shape[0], len(self.rules)), dtype=bool)
+        details = []
+        for j, rule in enumerate(self.rules):
+            results = [check.evaluate(matrix, self.column_index, memo) for check in rule.checks]
+            for check_passed, _, _ in results:
+                passed[:, j] &= check_passed
+            details.append(results)
+        return passed, details
+
+
+def _expressions(definition: Dict[str, Any]) -> List[str]:
+    return definition.get("expressions") or [definition["expression"]]
+
+
+def _normalise_expression(text: str) -> str:
+    return " ".join(text.split())
+
+
+def compile_rules(definitions: List[Dict[str, Any]], columns: List[str] = CA1_COLUMNS,
+                  known_rows: Optional[Iterable[str]] = None) -> RuleSet:
+    """
+    Compiles rule definitions: {"rule_id", "severity", "description", "expressions": [...]}
+    (or a single "expression"). `known_rows` defaults to the rows of the C 01.00 template
+    structure: rows it defines but `columns` does not carry evaluate as zero, any other
+    row reference raises RuleSyntaxError.
+    """
+    if known_rows is None:
+        known_rows = load_row_definitions(STRUCTURE_PATH)
+    known_rows = set(columns) | set(known_rows)
+    rules = []
+    for definition in definitions:
+        rule = CompiledRule(
+            rule_id=definition["rule_id"],
+            severity=definition.get("severity", "error").upper(),
+            description=definition.get("name") or definition.get("description", definition["rule_id"]),
+            checks=[parse_expression(e) for e in _expressions(definition)]
+        )
+        unknown = sorted(rule.cells - known_rows)
+        if unknown:
+            raise RuleSyntaxError(f"Rule {rule.rule_id} references rows not in the template: "
+                                  + ", ".join(f"r{row}" for row in unknown))
+        rules.append(rule)
+    return RuleSet(rules, columns)
+
+
+def merge_rule_definitions(primary: List[Dict[str, Any]], secondary: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    `primary` plus the checks of `secondary` that `primary` does not already make, so a
+    failure is reported once, under the primary rule's ID and severity. Secondary rules
+    whose checks are all covered, or whose "eba_rule_id" names a primary rule, are dropped.
+    """
+    covered = {_normalise_expression(e) for definition in primary for e in _expressions(definition)}
+    primary_ids = {definition["rule_id"] for definition in primary}
+    merged = list(primary)
+    for definition in secondary:
+        if definition.get("eba_rule_id") in primary_ids:
+            continue
+        expressions = [e for e in _expressions(definition) if _normalise_expression(e) not in covered]
+        if expressions:
+            merged.append({k: v for k, v in definition.items() if k != "expression"} | {"expressions": expressions})
+            covered.update(_normalise_expression(e) for e in expressions)
+    return merged
+
+
+def load_eba_rule_definitions(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads eba_validation_rules.json, where the DPM expression is held in "description".
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        {
+            "rule_id": rule["rule_id"],
+            "severity": rule.get("severity", "error"),
+            "description": f"EBA {rule['rule_id']} ({rule.get('category', 'rule')})",
+            "expression": rule["description"],
+        }
+        for rule in data.get("validation_rules", [])
+        if rule.get("template", "C_01.00") == "C_01.00"
+    ]
@@ -0,0 +1,83 @@
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from src.templates.ca1_template import CA1Template
+from src.templates.ca1_batch import CA1_CELLS, CA1_COLUMNS
+from src.templates.dependency_graph import CellDependencyGraph, get_dependency_graph
+from src.templates.mapping import row_id
+from src.validation.validator import Validator
+
+
+class IncrementalValidator:
+    """
+    Keeps one report and its validation results, and on each edit recomputes
+    only the affected aggregates (via the cell dependency graph) and re-evaluates
+    only the rules that reference a changed cell.
+    """
+    def __init__(self, template: CA1Template, validator: Optional[Validator] = None,
+                 graph: Optional[CellDependencyGraph] = None):
+        self.validator = validator or Validator()
+        self.graph = graph or get_dependency_graph()
+        self.values: Dict[str, float] = {row: getattr(template, field) for row, field in CA1_CELLS.items()}
+        # Intermediate rows the template does not hold (e.g. 030) start from their components
+        for row in self.graph.order:
+            if row not in CA1_CELLS:
+                self.values[row] = self.graph.evaluate(row, self.values)
+
+        self._rules_by_cell: Dict[str, List[str]] = {}
+        for rule in self.validator.rule_set.rules:
+            for cell in rule.cells:
+                self._rules_by_cell.setdefault(cell, []).append(rule.rule_id)
+
+        summary = self.validator.validate_matrix(self._matrix())[0]
+        self.results: Dict[str, Dict[str, Any]] = {r["rule_id"]: r for r in summary["results"]}
+
+    def _matrix(self) -> np.ndarray:
+        return np.array([[self.values[row] for row in CA1_COLUMNS]], dtype=np.float64)
+
+    def update(self, changes: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Applies edits keyed by field name ('row_300_goodwill') or row ID ('300').
+        Returns the diff: changed cells (edits plus recomputed aggregates), the
+        rules re-evaluated, the results that changed, and the new summary.
+        """
+        changed_cells = {}
+        for key, value in changes.items():
+            row = row_id(key) if key.startswith("row_") else key
+            if row not in self.values:
+                raise KeyError(f"Unknown CA1 cell: {key}")
+            value = float(value)
+            if self.values[row] != value:
+                self.values[row] = value
+                changed_cells[row] = value
+        changed_cells.update(self.graph.recompute(self.values, list(changed_cells)))
+
+        rule_ids = sorted({rule_id for row in changed_cells for rule_id in self._rules_by_cell.get(row, [])})
+        changed_results = []
+        if rule_ids:
+            subset = self.validator.rule_set.subset(rule_ids)
+            for result in self.validator.validate_matrix(self._matrix(), rule_set=subset)[0]["results"]:
+                if result != self.results[result["rule_id"]]:
+                    changed_results.append(result)
+                self.results[result["rule_id"]] = result
+
+        return {
+            "changed_cells": {CA1_CELLS.get(row, row): value for row, value in changed_cells.items()},
+            "rechecked_rules": rule_ids,
+            "changed_results": changed_results,
+            **self.summary(),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        failed = [r for r in self.results.values() if not r["passed"]]
+        error_count = sum(1 for r in failed if r["severity"] == "ERROR")
+        return {
+            "is_valid": error_count == 0,
+            "error_count": error_count,
+            "warning_count": len(failed) - error_count,
+            "results": list(self.results.values()),
+        }
+
+    def template(self) -> CA1Template:
+        return CA1Template(**{field: self.values[row] for row, field in CA1_CELLS.items()})
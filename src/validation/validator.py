@@ -1,32 +1,72 @@
+import os
+from functools import lru_cache
 from src.templates.ca1_template import CA1Template
-from src.validation.rules import ALL_RULES, ValidationResult
-from typing import List, Dict, Any
+from src.templates.ca1_batch import CA1Batch
+from src.validation.rules import BUILTIN_RULES, ValidationResult
+from src.validation.compiler import RuleSet, compile_rules, load_eba_rule_definitions, merge_rule_definitions, build_matrix
+from src.observability import tracing
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+import numpy as np
+
+EBA_RULES_PATH = os.path.join("data", "knowledge_base", "eba_validation_rules.json")
+
+
+@lru_cache(maxsize=None)
+def get_rule_set(rules_path: Optional[str] = EBA_RULES_PATH) -> RuleSet:
+    """
+    The EBA rules file compiled once per process. The EBA definitions are
+    authoritative: built-in checks they already make (e.g. v0010_m for CA1_R010, the
+    goodwill sign check of CA1_R100) are dropped, so each failure is reported once at
+    the EBA severity. Built-in rules only fill the gaps, or stand in when the file
+    is absent.
+    """
+    definitions = list(BUILTIN_RULES)
+    if rules_path and os.path.exists(rules_path):
+        definitions = merge_rule_definitions(load_eba_rule_definitions(rules_path), definitions)
+    return compile_rules(definitions)
+
 
 class Validator:
-    def __init__(self):
-        self.rules = ALL_RULES
+    def __init__(self, rules_path: Optional[str] = EBA_RULES_PATH):
+        self.rule_set = get_rule_set(rules_path)
 
     def validate(self, data: CA1Template) -> Dict[str, Any]:
         """
         Runs all validation rules against the provided template data.
         Returns a summary dictionary.
         """
-        results = []
-        error_count = 0
-        warning_count = 0
-        
-        for rule_func in self.rules:
-            result = rule_func(data)
-            results.append(result)
-            if not result.passed:
-                if result.severity == "ERROR":
-                    error_count += 1
-                else:
-                    warning_count += 1
-                    
-        return {
-            "is_valid": error_count == 0,
-            "error_count": error_count,
-            "warning_count": warning_count,
-            "results": [r.to_dict() for r in results]
-        }
+        return self.validate_batch([data])[0]
+
+    def validate_batch(self, reports: Union[CA1Batch, Sequence[CA1Template]]) -> List[Dict[str, Any]]:
+        """Validates many reports in one vectorised pass; one summary per report."""
+        with tracing.span("validate", reports=len(reports)) as span:
+            summaries = self.validate_matrix(build_matrix(reports))
+            span.incr("validation_errors", sum(s["error_count"] for s in summaries))
+            return summaries
+
+    def validate_matrix(self, matrix: np.ndarray, rule_set: Optional[RuleSet] = None) -> List[Dict[str, Any]]:
+        """
+        Validates a report matrix (rows = entities, columns = CA1 cells in
+        CA1_COLUMNS order, as in CA1Batch), against all rules or a subset.
+        """
+        rule_set = rule_set or self.rule_set
+        passed, details = rule_set.evaluate(matrix)
+        is_error = np.array([rule.severity == "ERROR" for rule in rule_set.rules], dtype=bool)
+        error_counts = (~passed & is_error).sum(axis=1)
+        warning_counts = (~passed & ~is_error).sum(axis=1)
+
+        summaries = []
+        for i in range(matrix.shape[0]):
+            results = []
+            for j, rule in enumerate(rule_set.rules):
+                ok = bool(passed[i, j])
+                msg = "Passed" if ok else rule.failure_message(details[j], i)
+                results.append(ValidationResult(rule.rule_id, ok, msg, rule.severity))
+            summaries.append({
+                "is_valid": bool(error_counts[i] == 0),
+                "error_count": int(error_counts[i]),
+                "warning_count": int(warning_counts[i]),
+                "results": [r.to_dict() for r in results]
+            })
+        return summaries
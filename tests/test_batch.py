@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+
+from src.llm.batch import BatchReportGenerator, scenario_to_text
+
+REPORT = {
+    "row_010_own_funds": 150.0,
+    "row_015_tier1_capital": 150.0,
+    "row_020_cet1_capital": 150.0,
+    "row_040_paid_up_capital": 100.0,
+    "row_130_retained_earnings": 50.0,
+    "row_140_previous_years_retained": 50.0,
+}
+
+class FakeGenerator:
+    def __init__(self, fail_on=None, delay=0.0):
+        self.fail_on = fail_on
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_report(self, scenario_text):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if json.loads(scenario_text).get("id") == self.fail_on:
+                raise RuntimeError("provider exploded")
+            return dict(REPORT)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def make_scenarios(n):
+    return [{"scenario_id": f"S{i}", "input_data": {"id": i}} for i in range(n)]
+
+def test_scenario_to_text_uses_input_data():
+    assert json.loads(scenario_to_text({"input_data": {"goodwill": 1}})) == {"goodwill": 1}
+
+def test_batch_isolates_failures():
+    batch = BatchReportGenerator(FakeGenerator(fail_on=3), max_concurrency=4)
+    results = {r["scenario_id"]: r for r in batch.run(make_scenarios(10))}
+
+    assert len(results) == 10
+    assert results["S3"]["status"] == "error"
+    assert "provider exploded" in results["S3"]["error"]
+    assert all(r["status"] == "ok" and r["validation"]["is_valid"] for k, r in results.items() if k != "S3")
+
+def test_batch_respects_concurrency_limit():
+    generator = FakeGenerator(delay=0.02)
+    list(BatchReportGenerator(generator, max_concurrency=3).run(make_scenarios(12)))
+    assert generator.peak <= 3
+
+def test_batch_uses_async_generator():
+    class AsyncFakeGenerator:
+        async def agenerate_report(self, scenario_text):
+            return dict(REPORT)
+
+    results = list(BatchReportGenerator(AsyncFakeGenerator(), max_concurrency=2).run(make_scenarios(5)))
+    assert [r["status"] for r in results] == ["ok"] * 5
@@ -0,0 +1,85 @@
+import json
+import sys
+import types
+import urllib.request
+
+from benchmarks import suite  # noqa: F401
+from benchmarks.harness import run_benchmarks, time_callable, find_regressions, save_results, load_results
+from benchmarks.llm_stub_server import StubLLMServer
+from benchmarks.run import main
+
+
+def _ok(median_s):
+    return {"status": "ok", "median_s": median_s}
+
+
+def test_find_regressions_applies_threshold_and_noise_floor():
+    baseline = {"a": _ok(0.010), "b": _ok(0.010), "c": _ok(0.0001), "d": {"status": "skipped"}}
+    current = {"a": _ok(0.014), "b": _ok(0.011), "c": _ok(0.0005), "d": _ok(1.0), "e": _ok(1.0)}
+    regressions = find_regressions(current, baseline, threshold=0.25)
+    assert [r["key"] for r in regressions] == ["a"]
+    assert round(regressions[0]["ratio"], 2) == 1.4
+
+
+def test_time_callable_repeats():
+    calls = []
+    timings = time_callable(lambda: calls.append(1), min_time=0.0, min_repeats=3)
+    assert len(timings) == 3
+    assert len(calls) == 4  # Including the warm-up
+
+
+def test_run_benchmarks_small_scale(tmp_path):
+    names = ["ca1_template_construct", "calculate_totals_batch", "validator_validate_batch", "retriever_retrieve_chroma"]
+    results = run_benchmarks(names, sizes=[2], min_time=0.0, log=lambda _: None)
+    for name in names[:3]:
+        assert results[f"{name}[n=2]"]["status"] == "ok"
+    assert results["retriever_retrieve_chroma[n=2]"]["status"] in ("ok", "skipped")
+
+    path = str(tmp_path / "results.json")
+    save_results(path, results)
+    assert load_results(path) == results
+
+
+def test_cli_fails_on_regression(tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    output = str(tmp_path / "latest.json")
+    save_results(baseline, {"ca1_template_construct[n=1000]": _ok(1e-6)})
+
+    args = ["--bench", "ca1_template_construct", "--sizes", "1000", "--min-time", "0", "--output", output]
+    assert main(args + ["--baseline", baseline]) == 1
+    assert main(args) == 0
+
+
+def test_stub_server_chat_completion():
+    with StubLLMServer('{"row_010_own_funds": 1}') as server:
+        request = urllib.request.Request(
+            server.base_url + "/chat/completions",
+            data=json.dumps({"model": "stub", "messages": []}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            body = json.load(response)
+    assert body["choices"][0]["message"]["content"] == '{"row_010_own_funds": 1}'
+    assert server.requests == 1
+
+
+class _StubSentenceTransformer:
+    def __init__(self, model_name, cache_folder=None):
+        self.encoded = []
+
+    def encode(self, texts):
+        import numpy as np
+        self.encoded.append(len(texts))
+        return np.ones((len(texts), 8))
+
+
+def test_offline_benchmarks_run_without_optional_dependencies(monkeypatch):
+    # A stub model stands in for sentence-transformers, so nothing is downloaded
+    stub_module = types.ModuleType("sentence_transformers")
+    stub_module.SentenceTransformer = _StubSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", stub_module)
+
+    names = ["embeddings_generate_batch", "retriever_retrieve", "generate_report_mock"]
+    results = run_benchmarks(names, sizes=[2], min_time=0.0, log=lambda _: None)
+    for name in names:
+        assert results[f"{name}[n=2]"]["status"] == "ok", results[f"{name}[n=2]"]
@@ -0,0 +1,43 @@
+from core.bm25 import BM25Index, tokenize
+from core.rag import RAGPipeline
+
+DOCS = [
+    "Common Equity Tier 1 items include capital instruments and share premium.",
+    "A tiered structure of reserves.",
+    "Goodwill and other intangible assets are deducted from CET1.",
+]
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Article 36(1)(b), Goodwill!") == ["article", "36", "1", "b", "goodwill", "36(1)", "36(1)(b)"]
+
+def test_matches_whole_words_only():
+    index = BM25Index().build(DOCS)
+    assert [doc for doc, _ in index.search("tier")] == [0]
+
+def test_ranks_by_relevance():
+    index = BM25Index().build(DOCS)
+    results = index.search("goodwill intangible deduction", top_k=2)
+    assert results[0][0] == 2
+    assert len(results) == 1  # no other document shares a term
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / "bm25.json")
+    index = BM25Index().build(DOCS, signature="abc")
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+    assert loaded.signature == "abc"
+    assert loaded.search("share premium") == index.search("share premium")
+
+def test_rag_pipeline_reuses_saved_index(tmp_path):
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    (rules_dir / "rules.txt").write_text("Article 26 retained earnings\n\nArticle 36 goodwill deduction", encoding="utf-8")
+    index_path = str(tmp_path / "bm25.json")
+
+    first = RAGPipeline(data_dir=str(rules_dir), index_path=index_path)
+    assert first.retrieve("goodwill")[0]["text"] == "Article 36 goodwill deduction"
+
+    second = RAGPipeline(data_dir=str(rules_dir), index_path=index_path)
+    assert second.index.signature == first.index.signature
+    assert second.retrieve("retained")[0]["text"] == "Article 26 retained earnings"
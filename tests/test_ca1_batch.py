@@ -0,0 +1,68 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from src.templates.ca1_batch import CA1Batch, CA1_FIELDS
+from src.templates.ca1_template import CA1Template
+from src.validation.validator import Validator
+
+
+def _templates():
+    return [
+        CA1Template(row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0,
+                    row_040_paid_up_capital=100.0, row_140_previous_years_retained=30.0,
+                    row_150_profit_or_loss_eligible=5.0, row_300_goodwill=-10.0,
+                    row_540_at1_instruments=20.0, row_760_tier2_instruments=15.0),
+        CA1Template(row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0,
+                    row_060_share_premium=40.0, row_370_deferred_tax_assets=-4.0,
+                    row_550_at1_share_premium=2.0, row_770_tier2_share_premium=1.0),
+    ]
+
+
+def test_calculate_totals_matches_template():
+    templates = _templates()
+    batch = CA1Batch.from_templates(templates, entity_ids=["A", "B"]).calculate_totals()
+    for template in templates:
+        template.calculate_totals()
+
+    assert [t.model_dump(exclude={"audit_trail"}) for t in batch.to_templates()] == \
+        [t.model_dump(exclude={"audit_trail"}) for t in templates]
+    assert batch["010"].tolist() == [160.0, 39.0]
+    assert batch["row_010_own_funds"].tolist() == [160.0, 39.0]
+
+
+def test_from_records_ignores_unknown_keys():
+    batch = CA1Batch.from_records([
+        {"row_040_paid_up_capital": 10, "audit_trail": {}, "row_300_goodwill": None},
+        {},
+    ])
+    assert len(batch) == 2
+    assert batch.entity_ids == ["0", "1"]
+    assert batch["040"].tolist() == [10.0, 0.0]
+    assert batch.to_records()[0]["row_300_goodwill"] == 0.0
+
+
+def test_pandas_export_is_zero_copy():
+    batch = CA1Batch.from_templates(_templates(), entity_ids=["A", "B"]).calculate_totals()
+    df = batch.to_pandas()
+    assert list(df.columns) == CA1_FIELDS
+    assert df.loc["B", "row_020_cet1_capital"] == 36.0
+    assert np.shares_memory(df.to_numpy(), batch.values)
+
+
+def test_arrow_export():
+    table = CA1Batch.from_templates(_templates(), entity_ids=["A", "B"]).to_arrow()
+    assert table.column("entity_id").to_pylist() == ["A", "B"]
+    assert table.column("row_040_paid_up_capital").type == pa.float64()
+
+
+def test_validator_accepts_batch():
+    batch = CA1Batch.from_templates(_templates()).calculate_totals()
+    assert Validator().validate_batch(batch) == Validator().validate_batch(batch.to_templates())
+
+
+def test_shape_checks():
+    with pytest.raises(ValueError):
+        CA1Batch(np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        CA1Batch.zeros(2, entity_ids=["only-one"])
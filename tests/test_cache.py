@@ -0,0 +1,43 @@
+import time
+
+from src.llm.cache import ResponseCache
+
+def test_key_depends_on_model_and_context():
+    base = ResponseCache.make_key("OpenAI", "gpt-4o", "sys", "user", "ctx")
+    assert base == ResponseCache.make_key("OpenAI", "gpt-4o", "sys", "user", "ctx")
+    assert base != ResponseCache.make_key("OpenAI", "gpt-4o-mini", "sys", "user", "ctx")
+    assert base != ResponseCache.make_key("OpenAI", "gpt-4o", "sys", "user", "other ctx")
+
+def test_hit_miss_counters_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    assert cache.get("k") is None
+    cache.set("k", '{"a": 1}')
+    assert cache.get("k") == '{"a": 1}'
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    assert ResponseCache(path).get("k") == '{"a": 1}'
+
+def test_lru_eviction_by_entry_count():
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")  # "b" is now least recently used
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+def test_size_cap_and_ttl():
+    cache = ResponseCache(":memory:", max_bytes=10)
+    cache.set("a", "x" * 8)
+    cache.set("b", "y" * 8)
+    assert cache.stats()["entries"] == 1
+
+    expiring = ResponseCache(":memory:", ttl_seconds=0)
+    expiring.set("a", "1")
+    time.sleep(0.01)
+    assert expiring.get("a") is None
@@ -0,0 +1,97 @@
+from core import bm25
+from core.chunker import RulebookChunker, ChunkCache, chunk_file
+from core.rag import RAGPipeline
+
+RULES = """Source: https://example.org/crr
+
+Article 26 Common Equity Tier 1 items
+1. Common Equity Tier 1 items of institutions consist of the following:
+(a) capital instruments, provided that the conditions laid down in Article 28 are met;
+(b) share premium accounts related to the instruments referred to in point (a);
+(c) retained earnings;
+2. For the purposes of point (c) of paragraph 1, institutions may include interim
+profits
+only with the prior permission of the competent authority.
+
+Article 36 Deductions from Common Equity Tier 1 items
+1. Institutions shall deduct the following from Common Equity Tier 1 items:
+(b) intangible assets;
+"""
+
+
+def test_chunks_follow_article_structure():
+    chunks = RulebookChunker().chunk_text(RULES, source="crr.txt")
+
+    assert [c["article"] for c in chunks] == ["Article 26(1)", "Article 36(1)"]
+    assert chunks[0]["section"] == "Common Equity Tier 1 items"
+    assert chunks[0]["source_url"] == "https://example.org/crr"
+    assert "interim profits only with the prior permission" in chunks[0]["text"]  # Fragments merged back
+    assert chunks[1]["text"].startswith("Article 36 Deductions")
+    assert set(chunks[0]) >= {"id", "article", "section", "text", "tags", "template_rows", "hierarchy", "effective_date"}
+
+
+def test_chunks_are_size_bounded_with_overlap():
+    chunks = RulebookChunker(max_chars=200, overlap_chars=100).chunk_text(RULES, source="crr.txt")
+    article_26 = [c for c in chunks if c["article"].startswith("Article 26")]
+
+    assert len(article_26) > 1
+    assert all(len(c["text"]) <= 200 for c in chunks)
+    # The trailing point of one chunk is repeated at the start of the next
+    assert article_26[1]["text"].splitlines()[0] in article_26[0]["text"]
+    assert article_26[-1]["hierarchy"].startswith("Article 26 > ")
+    assert not any(c["article"].startswith("Article 36") and "retained earnings" in c["text"] for c in chunks)
+
+
+def test_ids_are_stable_when_other_articles_change():
+    chunker = RulebookChunker()
+    before = {c["article"]: c["id"] for c in chunker.chunk_text(RULES, source="crr.txt")}
+    amended = RULES.replace("(b) intangible assets;", "(b) intangible assets, including goodwill;")
+    after = {c["article"]: c["id"] for c in chunker.chunk_text(amended, source="crr.txt")}
+
+    assert after["Article 26(1)"] == before["Article 26(1)"]
+    assert after["Article 36(1)"] != before["Article 36(1)"]
+    assert before["Article 26(1)"].startswith("crr:article-26-1:")
+
+
+def test_unchanged_files_are_served_from_cache(tmp_path, monkeypatch):
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    (rules_dir / "crr.txt").write_text(RULES, encoding="utf-8")
+    cache_dir = str(tmp_path / "chunks")
+
+    first = RAGPipeline(data_dir=str(rules_dir), chunk_cache_dir=cache_dir)
+    assert first.retrieve("intangible assets deduction")[0]["article"] == "Article 36(1)"
+    # A different chunker configuration does not reuse the cached output
+    _, _, cached = chunk_file(str(rules_dir / "crr.txt"), RulebookChunker(max_chars=500), ChunkCache(cache_dir))
+    assert cached is False
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged file was chunked again")
+    monkeypatch.setattr(RulebookChunker, "chunk_text", fail)
+    second = RAGPipeline(data_dir=str(rules_dir), chunk_cache_dir=cache_dir)
+    assert second.documents == first.documents
+    assert second.index.signature == first.index.signature
+
+
+def test_only_edited_articles_are_chunked_and_tokenised(tmp_path, monkeypatch):
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    (rules_dir / "crr.txt").write_text(RULES, encoding="utf-8")
+    (rules_dir / "other.txt").write_text("Article 92 Own funds requirements\n1. Institutions shall at all times satisfy ratios.\n",
+                                         encoding="utf-8")
+    rag = RAGPipeline(data_dir=str(rules_dir), chunk_cache_dir=str(tmp_path / "chunks"), use_result_cache=False)
+
+    chunked, tokenised = [], []
+    chunk_article, tokenize = RulebookChunker.chunk_article, bm25.tokenize
+    monkeypatch.setattr(RulebookChunker, "chunk_article", lambda self, block, *args: chunked.append(block[0]) or chunk_article(self, block, *args))
+    monkeypatch.setattr(bm25, "tokenize", lambda text: tokenised.append(text) or tokenize(text))
+    (rules_dir / "crr.txt").write_text(RULES.replace("(b) intangible assets;", "(b) intangible assets, including goodwill;"),
+                                       encoding="utf-8")
+    rag.ingest_rules(changed_files=["crr.txt"])
+
+    assert chunked == ["Article 36 Deductions from Common Equity Tier 1 items"]
+    assert len(tokenised) == 1 and "including goodwill" in tokenised[0]
+    # Same index as a full rebuild
+    fresh = bm25.BM25Index().build([doc["text"] for doc in rag.documents])
+    assert rag.index.postings == fresh.postings and rag.index.doc_lengths == fresh.doc_lengths
+    assert rag.retrieve("goodwill")[0]["article"] == "Article 36(1)"
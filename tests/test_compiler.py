@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from src.templates.ca1_template import CA1Template
+from src.validation.compiler import (
+    CA1_COLUMNS, RuleSyntaxError, build_matrix, compile_rules, merge_rule_definitions, parse_expression
+)
+from src.validation.validator import Validator
+
+
+def _report(**values):
+    data = dict(row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0)
+    data.update(values)
+    return CA1Template(**data)
+
+
+def test_parse_and_evaluate_expression():
+    check = parse_expression("{CA1, r010, c010} = {CA1, r015, c010} + {CA1, r750, c010}")
+    assert check.cells() == {"010", "015", "750"}
+
+    matrix = build_matrix([
+        _report(row_010_own_funds=150.0, row_015_tier1_capital=100.0, row_750_tier2_capital=50.0),
+        _report(row_010_own_funds=200.0, row_015_tier1_capital=100.0, row_750_tier2_capital=50.0),
+    ])
+    column_index = {row: i for i, row in enumerate(CA1_COLUMNS)}
+    passed, lhs, rhs = check.evaluate(matrix, column_index, {})
+    assert passed.tolist() == [True, False]
+    assert rhs.tolist() == [150.0, 150.0]
+
+
+def test_precedence_and_parentheses():
+    rules = compile_rules([
+        {"rule_id": "A", "expression": "-{CA1, r300, c010} * 2 = ({CA1, r040, c010} - 10) / 2", "severity": "warning"},
+    ])
+    matrix = build_matrix([_report(row_300_goodwill=-5.0, row_040_paid_up_capital=30.0)])
+    passed, _ = rules.evaluate(matrix)
+    assert passed.tolist() == [[True]]
+    assert rules.rules[0].severity == "WARNING"
+
+
+def test_unmodelled_template_rows_are_zero_and_unknown_rows_rejected():
+    # r160 / r170 are C 01.00 rows that CA1Template does not model
+    rules = compile_rules([{"rule_id": "v0130_m", "expression":
+                            "{CA1, r130, c010} = {CA1, r140, c010} + {CA1, r150, c010} + {CA1, r160, c010} + {CA1, r170, c010}"}])
+    matrix = build_matrix([_report(row_130_retained_earnings=50.0, row_140_previous_years_retained=30.0,
+                                   row_150_profit_or_loss_eligible=20.0)])
+    assert rules.evaluate(matrix)[0].tolist() == [[True]]
+
+    with pytest.raises(RuleSyntaxError, match="X .*r999"):
+        compile_rules([{"rule_id": "X", "expression": "{CA1, r999, c010} >= 0"}])
+
+
+def test_merge_keeps_one_rule_per_check():
+    eba = [
+        {"rule_id": "v0010_m", "expression": "{CA1, r010, c010} = {CA1, r015, c010} + {CA1, r750, c010}"},
+        {"rule_id": "v0300_w", "severity": "warning", "expression": "{CA1,  r300, c010} <= 0"},
+    ]
+    builtin = [
+        {"rule_id": "CA1_R010", "eba_rule_id": "v0010_m", "expressions": ["{CA1, r010, c010} = {CA1, r015, c010}"]},
+        {"rule_id": "CA1_R100", "expressions": ["{CA1, r300, c010} <= 0", "{CA1, r370, c010} <= 0"]},
+    ]
+    merged = merge_rule_definitions(eba, builtin)
+    assert [d["rule_id"] for d in merged] == ["v0010_m", "v0300_w", "CA1_R100"]
+    assert merged[2]["expressions"] == ["{CA1, r370, c010} <= 0"]
+
+
+def test_syntax_errors():
+    for text in ["{CA1, r010, c010}", "{CA1, r010, c010} = ", "{CA1, r010} = 1", "1 = 1 1"]:
+        with pytest.raises(RuleSyntaxError):
+            parse_expression(text)
+
+
+def test_validate_batch_matches_single_validation():
+    reports = [
+        _report(row_010_own_funds=150.0, row_015_tier1_capital=150.0, row_020_cet1_capital=150.0,
+                row_040_paid_up_capital=150.0),
+        _report(row_010_own_funds=150.0, row_015_tier1_capital=150.0, row_020_cet1_capital=150.0,
+                row_040_paid_up_capital=140.0, row_300_goodwill=10.0),
+    ]
+    validator = Validator()
+    batch = validator.validate_batch(reports)
+    assert batch == [validator.validate(r) for r in reports]
+
+    assert batch[0]["is_valid"] and batch[0]["warning_count"] == 0
+    failed = {r["rule_id"]: r for r in batch[1]["results"] if not r["passed"]}
+    # The EBA sign check wins; the built-in CA1_R100 does not report it as well
+    assert "v0300_w" in failed and "CA1_R100" not in failed
+    assert failed["v0300_w"]["severity"] == "WARNING"
+    assert "{CA1, r300, c010} <= 0" in failed["v0300_w"]["message"]
+
+
+def test_empty_batch():
+    assert Validator().validate_batch([]) == []
+    assert build_matrix([]).shape == (0, len(CA1_COLUMNS))
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import os
+import zipfile
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.export.ca1_export import ParquetExporter, DPMFactsCSVExporter, XBRLCSVExporter, dpm_coordinates
+from src.templates.ca1_batch import CA1Batch, CA1_COLUMNS, CA1_FIELDS
+from src.templates.ca1_template import CA1Template
+
+
+def _report(paid_up):
+    template = CA1Template(row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0,
+                           row_040_paid_up_capital=paid_up, row_300_goodwill=-10.0)
+    template.calculate_totals()
+    return template
+
+
+def test_dpm_facts_csv(tmp_path):
+    with DPMFactsCSVExporter(str(tmp_path), row_group_size=2) as exporter:
+        exporter.add(_report(100.0), "LEI1", "2025-12-31")
+        exporter.add(_report(200.0).model_dump(), "LEI2", "2025-12-31")
+        exporter.add(_report(300.0), "LEI3")
+    assert exporter.rows_written == 3
+
+    with open(tmp_path / "c_01.00.csv", newline="") as f:
+        facts = list(csv.DictReader(f))
+
+    assert len(facts) == 3 * len(exporter.row_codes)
+    own_funds = {(r["entity_id"], r["reporting_date"]): float(r["value"]) for r in facts if r["row"] == "r0010"}
+    assert own_funds == {("LEI1", "2025-12-31"): 90.0, ("LEI2", "2025-12-31"): 190.0, ("LEI3", ""): 290.0}
+    assert {(r["template"], r["column"]) for r in facts} == {("C_01.00", "c0010")}
+    assert "r0300" in exporter.row_codes
+
+
+def test_xbrl_csv_report_packages(tmp_path):
+    with XBRLCSVExporter(str(tmp_path), row_group_size=2) as exporter:
+        exporter.add(_report(100.0), "LEI1", "2025-12-31")
+        exporter.add(_report(200.0).model_dump(), "LEI2", "2025-12-31")
+    assert [os.path.basename(p) for p in exporter.paths] == ["LEI1_2025-12-31_C_01.00.zip", "LEI2_2025-12-31_C_01.00.zip"]
+
+    with zipfile.ZipFile(exporter.paths[0]) as package:
+        assert sorted(package.namelist()) == [f"LEI1_2025-12-31_C_01.00/{name}" for name in (
+            "META-INF/reportPackage.json", "reports/FilingIndicators.csv", "reports/c_01.00.csv",
+            "reports/parameters.csv", "reports/report.json")]
+        read = lambda name: package.read(f"LEI1_2025-12-31_C_01.00/{name}").decode("utf-8")
+        report = json.loads(read("reports/report.json"))
+        parameters = dict(list(csv.reader(io.StringIO(read("reports/parameters.csv"))))[1:])
+        facts = dict(list(csv.reader(io.StringIO(read("reports/c_01.00.csv"))))[1:])
+        indicators = list(csv.reader(io.StringIO(read("reports/FilingIndicators.csv"))))
+
+    assert report["documentInfo"]["documentType"] == "https://xbrl.org/2021/xbrl-csv"
+    assert report["documentInfo"]["extends"]
+    assert parameters == {"entityID": "lei:LEI1", "refPeriod": "2025-12-31", "baseCurrency": "iso4217:GBP",
+                          "decimalsMonetary": "0"}
+    assert indicators == [["templateID", "reported"], ["C_01.00", "true"]]
+    assert facts["r0010c0010"] == "90" and facts["r0300c0010"] == "-10"
+
+    with pytest.raises(ValueError, match="reporting_date"):
+        with XBRLCSVExporter(str(tmp_path)) as exporter:
+            exporter.add(_report(100.0), "LEI3")
+
+
+def test_dpm_coordinates_come_from_the_structure_file(tmp_path):
+    structure = {
+        "template_code": "C_01.00",
+        "columns": [{"column": "010"}],
+        "fields": [{"row": row} for row in CA1_COLUMNS],
+    }
+    structure["fields"][0]["column"] = "020"
+    path = tmp_path / "structure.json"
+    path.write_text(json.dumps(structure), encoding="utf-8")
+
+    template_code, coordinates = dpm_coordinates(str(path))
+    assert template_code == "C_01.00"
+    assert coordinates[0] == (f"r0{CA1_COLUMNS[0]}", "c0020")
+    assert coordinates[1][1] == "c0010"
+
+    structure["fields"] = structure["fields"][1:]
+    path.write_text(json.dumps(structure), encoding="utf-8")
+    with pytest.raises(ValueError, match="not defined"):
+        dpm_coordinates(str(path))
+
+
+def test_parquet_row_groups(tmp_path):
+    path = str(tmp_path / "reports.parquet")
+    batch = CA1Batch.from_templates([_report(float(i)) for i in range(5)], entity_ids=[f"E{i}" for i in range(5)])
+    with ParquetExporter(path, row_group_size=2) as exporter:
+        exporter.write_batch(batch)
+        exporter.add(_report(99.0), "E5", "2025-12-31")
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 4
+    table = parquet.read()
+    assert table.column_names == ["entity_id", "reporting_date"] + CA1_FIELDS
+    assert table.column("row_040_paid_up_capital").to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0, 99.0]
+
+
+def test_parquet_requires_pyarrow(tmp_path, monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "pyarrow":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+    with pytest.raises(ImportError, match="pyarrow"):
+        ParquetExporter(str(tmp_path / "x.parquet"))
@@ -0,0 +1,22 @@
+from src.retrieval.filters import matches_filters
+from src.retrieval.fusion import reciprocal_rank_fusion
+
+METADATA = {"tags": "goodwill,deductions", "template_rows": "300,340", "effective_date": "2014-01-01"}
+
+def test_filters_match_any_tag_or_row():
+    assert matches_filters(METADATA, {"tags": ["goodwill", "AT1"]})
+    assert matches_filters(METADATA, {"template_rows": ["340"]})
+    assert not matches_filters(METADATA, {"tags": ["AT1"]})
+    assert not matches_filters(METADATA, {"tags": ["goodwill"], "template_rows": ["530"]})
+
+def test_filters_effective_date():
+    assert matches_filters(METADATA, {"effective_date": "2025-12-31"})
+    assert not matches_filters(METADATA, {"effective_date": "2013-12-31"})
+
+def test_rrf_rewards_agreement_between_lists():
+    dense = [{"id": "A"}, {"id": "B"}, {"id": "C"}]
+    sparse = [{"id": "B"}, {"id": "C"}, {"id": "D"}]
+    fused = reciprocal_rank_fusion([dense, sparse], top_k=3)
+
+    assert [doc["id"] for doc in fused] == ["B", "C", "A"]
+    assert fused[0]["score"] > fused[2]["score"]
@@ -0,0 +1,64 @@
+from src.templates.ca1_template import CA1Template
+from src.templates.dependency_graph import get_dependency_graph
+from src.validation.incremental import IncrementalValidator
+from src.validation.validator import Validator
+
+
+def _template():
+    template = CA1Template(
+        row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0,
+        row_040_paid_up_capital=100.0, row_060_share_premium=20.0,
+        row_070_own_cet1_instruments=-5.0, row_140_previous_years_retained=30.0,
+        row_300_goodwill=-10.0, row_540_at1_instruments=15.0, row_760_tier2_instruments=8.0
+    )
+    template.calculate_totals()
+    return template
+
+
+def test_graph_from_structure():
+    graph = get_dependency_graph()
+    # sum(rows_026_to_520) resolves to the direct children of CET1
+    cet1 = dict(graph.formulas["020"])
+    assert {"030", "130", "300", "370"} <= set(cet1)
+    assert "040" not in cet1 and "540" not in cet1
+    # Deductions are stored negative, so "- row_070" is still added
+    assert dict(graph.formulas["030"])["070"] == 1.0
+    assert graph.affected(["300"]) == ["020", "015", "010"]
+    assert graph.affected(["140"]) == ["130", "020", "015", "010"]
+
+
+def test_graph_matches_calculate_totals():
+    template = _template()
+    values = {"040": 100.0, "060": 20.0, "070": -5.0, "140": 30.0, "300": -10.0, "540": 15.0, "760": 8.0}
+    get_dependency_graph().recompute_all(values)
+    for row, field in [("020", "row_020_cet1_capital"), ("015", "row_015_tier1_capital"), ("010", "row_010_own_funds")]:
+        assert values[row] == getattr(template, field)
+
+
+def test_update_recomputes_affected_cells_and_rules_only():
+    checker = IncrementalValidator(_template())
+    assert checker.summary()["is_valid"]
+
+    diff = checker.update({"row_300_goodwill": 25.0})
+    assert diff["changed_cells"] == {
+        "row_300_goodwill": 25.0, "row_020_cet1_capital": 170.0,
+        "row_015_tier1_capital": 185.0, "row_010_own_funds": 193.0,
+    }
+    assert "v0130_m" not in diff["rechecked_rules"]
+    assert "v0300_w" in diff["rechecked_rules"]
+    assert {r["rule_id"] for r in diff["changed_results"]} == {"v0300_w"}
+    # The EBA goodwill sign check is a warning
+    assert diff["is_valid"] and diff["warning_count"] == 1
+
+    # Same outcome as validating the edited report from scratch
+    assert Validator().validate(checker.template())["results"] == diff["results"]
+
+    diff = checker.update({"300": -10.0})
+    assert diff["is_valid"] and diff["warning_count"] == 0
+    assert {r["rule_id"] for r in diff["changed_results"]} == {"v0300_w"}
+
+
+def test_no_op_update():
+    diff = IncrementalValidator(_template()).update({"row_040_paid_up_capital": 100.0})
+    assert diff["changed_cells"] == {}
+    assert diff["rechecked_rules"] == []
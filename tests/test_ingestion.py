@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from openpyxl import Workbook
+
+from src.ingestion import tabular
+from src.ingestion.tabular import TabularScenarioReader, canonical_key, parse_amount
+from src.llm.batch import load_scenarios
+
+
+def test_header_and_amount_normalisation():
+    assert canonical_key("Paid-up Capital") == "paid_up_capital_instruments"
+    assert canonical_key("goodwill") == "goodwill"
+    assert canonical_key("LEI") == "lei_code"
+    assert canonical_key("Loans and advances") is None
+    assert parse_amount("(1,500)") == -1500.0
+    assert parse_amount("£2,000.5") == 2000.5
+    assert parse_amount("") is None
+    assert parse_amount(float("nan")) is None
+
+
+def test_wide_csv(tmp_path):
+    path = tmp_path / "entities.csv"
+    path.write_text(
+        "LEI,Reporting Date,Bank,Paid-up Capital,Goodwill,Loans\n"
+        "LEI1,2025-12-31,Bank One,\"500,000\",30000,9999\n"
+        "LEI2,2025-12-31,Bank Two,200000,,0\n"
+    )
+    reader = TabularScenarioReader(str(path), chunk_size=1)
+    scenarios = list(reader)
+    assert scenarios[0] == {
+        "lei_code": "LEI1", "reporting_date": "2025-12-31", "bank_name": "Bank One",
+        "scenario_id": "LEI1_2025-12-31",
+        "input_data": {"paid_up_capital_instruments": 500000.0, "goodwill": 30000.0},
+    }
+    assert scenarios[1]["input_data"] == {"paid_up_capital_instruments": 200000.0}
+    assert reader.unmapped == {"Loans": 1}
+
+
+def test_long_csv_sums_accounts_and_streams_grouped_entities(tmp_path):
+    path = tmp_path / "trial_balance.csv"
+    rows = ["lei,period,account,balance"]
+    for lei in ("A", "B", "C"):
+        rows += [f"{lei},2025-06-30,Share capital,100", f"{lei},2025-06-30,Share capital,50",
+                 f"{lei},2025-06-30,Intangibles,(10)", f"{lei},2025-06-30,Cash,1000"]
+    path.write_text("\n".join(rows) + "\n")
+
+    reader = TabularScenarioReader(str(path), chunk_size=2, sorted_by_entity=True)
+    scenarios = iter(reader)
+    first = next(scenarios)
+    assert first["lei_code"] == "A"
+    assert first["input_data"] == {"paid_up_capital_instruments": 150.0, "other_intangible_assets": -10.0}
+    # A is emitted as soon as B's first row is seen, before the file is read to the end
+    assert reader.rows_read == 5
+    assert [s["lei_code"] for s in scenarios] == ["B", "C"]
+    assert reader.unmapped == {"Cash": 3}
+
+
+def test_long_unsorted_merges_entities(tmp_path):
+    path = tmp_path / "tb.csv"
+    path.write_text("lei,account,amount\nA,goodwill,5\nB,goodwill,7\nA,goodwill,1\n")
+    scenarios = list(TabularScenarioReader(str(path)))
+    assert [(s["lei_code"], s["input_data"]["goodwill"]) for s in scenarios] == [("A", 6.0), ("B", 7.0)]
+
+
+def test_long_sorted_rejects_an_entity_that_reappears(tmp_path):
+    path = tmp_path / "tb.csv"
+    path.write_text("lei,account,amount\nA,goodwill,5\nB,goodwill,7\nA,goodwill,1\n")
+    scenarios = iter(TabularScenarioReader(str(path), sorted_by_entity=True))
+    assert next(scenarios)["lei_code"] == "A"
+    with pytest.raises(ValueError, match="Data row 3: entity A"):
+        list(scenarios)
+
+
+def test_long_generated_ids_are_unique_when_streaming(tmp_path):
+    path = tmp_path / "tb.csv"
+    path.write_text("bank,account,amount\nOne,goodwill,5\nTwo,goodwill,7\nThree,goodwill,1\n")
+    scenarios = list(TabularScenarioReader(str(path), sorted_by_entity=True))
+    assert [s["scenario_id"] for s in scenarios] == ["ROW_000001", "ROW_000002", "ROW_000003"]
+
+
+def test_long_unsorted_warns_when_entities_accumulate(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(tabular, "LONG_ENTITY_WARNING_THRESHOLD", 2)
+    path = tmp_path / "tb.csv"
+    path.write_text("lei,account,amount\nA,goodwill,5\nB,goodwill,7\nC,goodwill,1\n")
+    assert len(list(TabularScenarioReader(str(path)))) == 3
+    output = capsys.readouterr().out
+    assert output.count("holding running totals for 2 entities") == 1
+    assert "sorted_by_entity=True" in output
+
+
+def test_excel_read_only_and_batch_loader(tmp_path):
+    path = tmp_path / "entities.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Scenario ID", "Paid up capital", "AT1 instruments", None])
+    sheet.append(["S1", 100, 20, None])
+    sheet.append([None, None, None, None])
+    sheet.append(["S2", 300, 0, None])
+    workbook.save(path)
+
+    scenarios = list(load_scenarios(str(path)))
+    assert [s["scenario_id"] for s in scenarios] == ["S1", "S2"]
+    assert scenarios[0]["input_data"] == {"paid_up_capital_instruments": 100.0, "at1_capital_instruments": 20.0}
+
+
+def test_batch_loader_still_reads_json(tmp_path):
+    path = tmp_path / "scenarios.json"
+    path.write_text(json.dumps({"scenario_id": "S1", "input_data": {}}))
+    assert load_scenarios(str(path)) == [{"scenario_id": "S1", "input_data": {}}]
@@ -0,0 +1,100 @@
+import json
+
+from src.retrieval.retriever import Retriever
+from src.retrieval.vector_store import VectorStore
+
+
+class _FakeCollection:
+    """Stands in for a Chroma collection: upsert / get / delete on a dict."""
+    def __init__(self):
+        self.rows = {}
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserted.append(list(ids))
+        for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.rows[doc_id] = (embedding, document, metadata)
+
+    def get(self, include=None):
+        return {"ids": list(self.rows), "metadatas": [row[2] for row in self.rows.values()]}
+
+    def delete(self, ids):
+        self.deleted.append(list(ids))
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def count(self):
+        return len(self.rows)
+
+
+def _store():
+    # Skip __init__: no chromadb client, the wrapper logic runs against the fake collection
+    store = VectorStore.__new__(VectorStore)
+    store.collection = _FakeCollection()
+    return store
+
+
+class _CountingEmbeddings:
+    model_name = "count-2"
+
+    def __init__(self):
+        self.encoded = []
+
+    def generate_batch(self, texts):
+        self.encoded.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def _write_kb(path, articles):
+    path.write_text(json.dumps([
+        {"article": article, "section": "S", "text": text, "tags": [], "template_rows": []}
+        for article, text in articles.items()
+    ]), encoding="utf-8")
+
+
+def _sync(kb_path, store, embeddings):
+    return Retriever(kb_path=str(kb_path), embedding_generator=embeddings, vector_store=store, use_result_cache=False)
+
+
+def test_unchanged_kb_makes_no_encode_or_upsert_calls(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    _write_kb(kb_path, {"Article 26": "retained earnings", "Article 36": "goodwill"})
+    store, embeddings = _store(), _CountingEmbeddings()
+    _sync(kb_path, store, embeddings)
+    assert store.collection.upserted == [["Article 26", "Article 36"]]
+
+    store.collection.upserted.clear()
+    embeddings.encoded.clear()
+    _sync(kb_path, store, embeddings)
+    assert embeddings.encoded == []
+    assert store.collection.upserted == []
+    assert store.collection.deleted == []
+
+
+def test_only_the_edited_article_is_re_embedded(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    _write_kb(kb_path, {"Article 26": "retained earnings", "Article 36": "goodwill"})
+    store, embeddings = _store(), _CountingEmbeddings()
+    _sync(kb_path, store, embeddings)
+
+    embeddings.encoded.clear()
+    _write_kb(kb_path, {"Article 26": "retained earnings", "Article 36": "goodwill and other intangibles"})
+    _sync(kb_path, store, embeddings)
+    assert embeddings.encoded == [["Article 36 - S\ngoodwill and other intangibles"]]
+    assert store.collection.upserted[-1] == ["Article 36"]
+    assert store.collection.rows["Article 36"][1].endswith("other intangibles")
+
+
+def test_removed_article_is_deleted_from_the_store(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    _write_kb(kb_path, {"Article 26": "retained earnings", "Article 36": "goodwill"})
+    store, embeddings = _store(), _CountingEmbeddings()
+    _sync(kb_path, store, embeddings)
+
+    embeddings.encoded.clear()
+    _write_kb(kb_path, {"Article 26": "retained earnings"})
+    _sync(kb_path, store, embeddings)
+    assert store.collection.deleted == [["Article 36"]]
+    assert embeddings.encoded == []
+    assert store.get_manifest().keys() == {"Article 26"}
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from src.templates.mapping import StructuredInputMapper, parse_structured_input
+from src.validation.validator import Validator
+
+@pytest.fixture
+def scenarios():
+    with open("data/knowledge_base/sample_scenarios.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_sample_scenarios_map_completely_and_validate(scenarios):
+    mapper = StructuredInputMapper()
+    for scenario in scenarios:
+        result = mapper.map(scenario["input_data"])
+        assert result.is_complete
+        assert Validator().validate(result.template)["is_valid"]
+
+def test_deductions_are_negative_and_totals_computed(scenarios):
+    template = StructuredInputMapper().map(scenarios[0]["input_data"]).template
+
+    assert template.row_300_goodwill == -30_000_000
+    assert template.row_070_own_cet1_instruments == -5_000_000
+    # 120m profit less 20m interim and 25m foreseeable dividends
+    assert template.row_150_profit_or_loss_eligible == 75_000_000
+    assert template.row_020_cet1_capital == 1_505_000_000
+    assert template.row_530_at1_capital == 160_000_000
+    assert template.row_010_own_funds == 1_873_000_000
+
+def test_audit_trail_cites_template_source_articles(scenarios):
+    template = StructuredInputMapper().map(scenarios[0]["input_data"]).template
+    assert template.audit_trail["row_300_goodwill"].source_articles == ["Article 36(1)(b)", "Article 37"]
+    assert "row_010_own_funds" in template.audit_trail
+
+def test_unmapped_and_free_text_inputs_are_reported():
+    result = StructuredInputMapper().map({"goodwill": "about 30M", "minority_interests": 5, "unused": 0})
+    assert not result.is_complete
+    assert result.unmapped == {"goodwill": "about 30M", "minority_interests": 5}
+
+def test_empty_or_all_zero_input_is_not_complete():
+    mapper = StructuredInputMapper()
+    for input_data in [{}, {"goodwill": 0, "share_premium": "0"}, {"unused": 0}]:
+        result = mapper.map(input_data)
+        assert not result.is_complete
+        assert result.unmapped == {}
+    assert mapper.map({"goodwill": 0, "share_premium": 10}).is_complete
+
+def test_merge_prefers_mapped_values():
+    mapper = StructuredInputMapper()
+    mapping = mapper.map({"goodwill": 30, "minority_interests": 5})
+    llm_report = {"row_010_own_funds": 0, "row_015_tier1_capital": 0, "row_020_cet1_capital": 0,
+                  "row_300_goodwill": 30, "row_200_other_reserves": 5, "audit_trail": {}}
+
+    merged = mapper.merge(llm_report, mapping)
+    assert merged["row_300_goodwill"] == -30
+    assert merged["row_200_other_reserves"] == 5
+    assert merged["row_020_cet1_capital"] == -25
+
+def test_parse_structured_input():
+    assert parse_structured_input('{"goodwill": 1}') == {"goodwill": 1}
+    assert parse_structured_input('{"input_data": {"goodwill": 1}}') == {"goodwill": 1}
+    assert parse_structured_input("Bank with 500M paid up capital") is None
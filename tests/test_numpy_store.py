@@ -0,0 +1,132 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.retrieval import numpy_store
+from src.retrieval.numpy_store import NumpyVectorStore, quantise_int8
+from src.retrieval.retriever import Retriever
+
+
+def _docs(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    docs = [{"id": f"doc{i}", "text": f"text {i}", "metadata": {"article": f"Article {i}", "content_hash": f"h{i}"}}
+            for i in range(n)]
+    return docs, vectors
+
+
+def _exact_top(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    return [f"doc{i}" for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_query_matches_exact_search(tmp_path, dtype):
+    docs, vectors = _docs(200)
+    store = NumpyVectorStore("kb", directory=str(tmp_path), dtype=dtype)
+    store.add_documents(docs, vectors.tolist())
+
+    query = vectors[17] + 0.05
+    results = store.query(query.tolist(), n_results=5)
+    assert set(results) == {"ids", "documents", "metadatas", "distances"}
+    assert results["ids"][0][0] == "doc17"
+    assert results["metadatas"][0][0]["article"] == "Article 17"
+    assert results["distances"][0] == sorted(results["distances"][0])
+    if dtype == "float32":
+        assert results["ids"][0] == _exact_top(vectors, query, 5)
+    assert isinstance(store._current().matrix, np.memmap)
+
+
+def test_query_many_and_small_stores(tmp_path):
+    docs, vectors = _docs(3)
+    store = NumpyVectorStore("kb", directory=str(tmp_path))
+    assert store.query([1.0] * 16, n_results=5)["ids"] == [[]]
+
+    store.add_documents(docs, vectors.tolist())
+    batch = store.query_many([vectors[2].tolist(), vectors[0].tolist()], n_results=10)
+    assert [ids[0] for ids in batch["ids"]] == ["doc2", "doc0"]
+    assert all(len(ids) == 3 for ids in batch["ids"])
+
+
+def test_upsert_delete_and_reopen(tmp_path):
+    docs, vectors = _docs(5)
+    store = NumpyVectorStore("kb", directory=str(tmp_path))
+    store.add_documents(docs, vectors.tolist())
+
+    changed = dict(docs[1], text="amended", metadata={"article": "Article 1", "content_hash": "new"})
+    store.add_documents([changed], [vectors[4].tolist()])
+    store.delete(["doc0", "doc3"])
+
+    reopened = NumpyVectorStore("kb", directory=str(tmp_path))
+    assert reopened.count() == 3
+    assert reopened.get_manifest() == {"doc1": "new", "doc2": "h2", "doc4": "h4"}
+    assert reopened.query(vectors[4].tolist(), n_results=2)["documents"][0][0] in ("amended", "text 4")
+
+    # A second handle (e.g. another worker process) picks up writes made elsewhere
+    store.delete(["doc2"])
+    assert reopened.count() == 2
+
+
+def test_writes_use_versioned_arrays_named_by_the_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(numpy_store, "_CLEANUP_GRACE_S", -1.0)
+    docs, vectors = _docs(4)
+    store = NumpyVectorStore("kb", directory=str(tmp_path), dtype="int8")
+    store.add_documents(docs[:2], vectors[:2].tolist())
+    with open(os.path.join(store.path, "table.json"), encoding="utf-8") as f:
+        first = json.load(f)
+    store.add_documents(docs[2:], vectors[2:].tolist())
+    with open(os.path.join(store.path, "table.json"), encoding="utf-8") as f:
+        second = json.load(f)
+
+    assert first["embeddings_file"] != second["embeddings_file"]
+    assert sorted(os.listdir(store.path)) == sorted([second["embeddings_file"], second["scales_file"], "table.json"])
+
+
+def test_load_rejects_a_matrix_that_does_not_match_the_ids(tmp_path):
+    docs, vectors = _docs(3)
+    store = NumpyVectorStore("kb", directory=str(tmp_path))
+    store.add_documents(docs, vectors.tolist())
+    table_path = os.path.join(store.path, "table.json")
+    with open(table_path, encoding="utf-8") as f:
+        table = json.load(f)
+    table["ids"].append("doc3")
+    with open(table_path, "w", encoding="utf-8") as f:
+        json.dump(table, f)
+
+    with pytest.raises(ValueError, match="3 embeddings for 4 IDs"):
+        NumpyVectorStore("kb", directory=str(tmp_path))
+
+
+def test_quantise_int8_roundtrip():
+    _, vectors = _docs(10)
+    q, scales = quantise_int8(vectors)
+    assert q.dtype == np.int8
+    assert np.abs(q.astype(np.float32) * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+
+
+class _HashEmbeddings:
+    model_name = "hash-16"
+
+    def generate(self, text):
+        return self.generate_batch([text])[0]
+
+    def generate_batch(self, texts):
+        return [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=16).tolist() for t in texts]
+
+
+def test_retriever_syncs_kb_into_numpy_store(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    kb_path.write_text(json.dumps([
+        {"article": f"Article {i}", "section": "S", "text": f"text {i}", "tags": [], "template_rows": []}
+        for i in range(4)
+    ]), encoding="utf-8")
+    store = NumpyVectorStore("kb", directory=str(tmp_path / "store"))
+    embeddings = _HashEmbeddings()
+
+    retriever = Retriever(kb_path=str(kb_path), embedding_generator=embeddings, vector_store=store)
+    assert store.count() == 4
+    query = "Article 2 - S\ntext 2"  # Same text as the stored document, so the same vector
+    assert retriever.retrieve(query, top_k=2)[0]["id"] == "Article 2"
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.llm_chain import CorepLLMChain
+from src.llm.providers import AsyncLLMProvider, ProviderConfig, ProviderError, MockProvider, get_provider, run_sync
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class FlakyProvider(AsyncLLMProvider):
+    name = "Flaky"
+
+    def __init__(self, failures, status_code=429, config=None):
+        super().__init__("flaky", config or ProviderConfig(max_retries=3, backoff_base=0.001))
+        self.failures = failures
+        self.status_code = status_code
+        self.calls = 0
+
+    async def _complete(self, system_prompt, user_prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise HTTPError(self.status_code)
+        return '{"ok": true}'
+
+def test_retries_rate_limit_then_succeeds():
+    provider = FlakyProvider(failures=2)
+    assert run_sync(provider.complete("sys", "user")) == '{"ok": true}'
+    assert provider.calls == 3
+
+def test_client_error_is_not_retried():
+    provider = FlakyProvider(failures=1, status_code=400)
+    with pytest.raises(ProviderError) as exc:
+        run_sync(provider.complete("sys", "user"))
+    assert exc.value.status_code == 400
+    assert provider.calls == 1
+
+def test_concurrency_limit_is_shared_per_provider():
+    class SlowProvider(AsyncLLMProvider):
+        name = "Slow"
+        active = 0
+        peak = 0
+
+        async def _complete(self, system_prompt, user_prompt):
+            SlowProvider.active += 1
+            SlowProvider.peak = max(SlowProvider.peak, SlowProvider.active)
+            await asyncio.sleep(0.01)
+            SlowProvider.active -= 1
+            return "{}"
+
+    config = ProviderConfig(max_concurrency=2)
+    providers = [SlowProvider("a", config), SlowProvider("b", config)]
+
+    async def fan_out():
+        await asyncio.gather(*[p.complete("s", "u") for p in providers for _ in range(5)])
+
+    run_sync(fan_out())
+    assert SlowProvider.peak == 2
+
+def test_get_provider_reuses_instances():
+    first = get_provider("Mock", "mock", response="{}")
+    assert get_provider("Mock", "mock", response="{}") is first
+    assert isinstance(first, MockProvider)
+
+class ThreadRecordingRAG:
+    def __init__(self):
+        self.threads = []
+
+    def retrieve(self, query, top_k=5):
+        self.threads.append(threading.get_ident())
+        return [{"source": "crr.txt", "article": "Article 26", "text": "Retained earnings are CET1 items."}]
+
+def test_chain_retrieval_runs_off_the_event_loop():
+    chain = CorepLLMChain(provider="Mock", rag=ThreadRecordingRAG())
+
+    async def run():
+        return threading.get_ident(), await chain.aprocess_scenario("Bank with retained earnings")
+
+    loop_thread, result = asyncio.run(run())
+    assert chain.rag.threads and chain.rag.threads[0] != loop_thread
+    assert result["template_data"]["CET1Capital"] == 150.0
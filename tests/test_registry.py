@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src.retrieval import registry
+
+
+class _FakeEmbeddingGenerator:
+    created = []
+
+    def __init__(self, model_name):
+        time.sleep(0.05)  # Slow enough for concurrent first calls to overlap
+        self.model_name = model_name
+        _FakeEmbeddingGenerator.created.append(model_name)
+
+    def generate_batch(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def cache_stats(self):
+        return {"hits": 0, "misses": 0}
+
+
+class _FakeVectorStore:
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+        self.rows = {}
+
+    def get_manifest(self):
+        return {doc_id: metadata["content_hash"] for doc_id, metadata in self.rows.items()}
+
+    def add_documents(self, documents, embeddings):
+        self.rows.update({doc["id"]: doc["metadata"] for doc in documents})
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id)
+
+    def count(self):
+        return len(self.rows)
+
+
+@pytest.fixture(autouse=True)
+def fake_resources(monkeypatch):
+    monkeypatch.setattr(registry, "EmbeddingGenerator", _FakeEmbeddingGenerator)
+    monkeypatch.setattr(registry, "VectorStore", _FakeVectorStore)
+    _FakeEmbeddingGenerator.created.clear()
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps([
+        {"article": "Article 26", "section": "CET1", "text": "retained earnings", "tags": [], "template_rows": []},
+    ]), encoding="utf-8")
+    return str(path)
+
+
+def test_resources_are_process_wide_singletons(kb_path):
+    assert registry.get_embedding_generator("m1") is registry.get_embedding_generator("m1")
+    assert registry.get_vector_store("kb", "chroma") is registry.get_vector_store("kb", "chroma")
+    retriever = registry.get_retriever(kb_path, collection_name="kb", vector_backend="chroma")
+    assert registry.get_retriever(kb_path, collection_name="kb", vector_backend="chroma") is retriever
+    assert retriever.vector_store is registry.get_vector_store("kb", "chroma")
+
+
+def test_concurrent_first_access_creates_one_instance():
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(registry.get_embedding_generator("m1"))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _FakeEmbeddingGenerator.created == ["m1"]
+    assert all(result is results[0] for result in results)
+
+
+def test_vector_stores_are_separated_by_embedding_model():
+    default = registry.get_vector_store("kb", "chroma")
+    other = registry.get_vector_store("kb", "chroma", model_name="sentence-transformers/all-mpnet-base-v2")
+    assert other is not default
+    assert default.collection_name == "kb"
+    assert other.collection_name == "kb__sentence-transformers-all-mpnet-base-v2"
+    assert len(registry.collection_for_model("kb", "x" * 100)) <= 63
+
+
+def test_warm_up_and_memory_stats(kb_path):
+    load_seconds = registry.warm_up(kb_path, collection_name="kb", vector_backend="chroma")
+    assert {key.split(":")[0] for key in load_seconds} == {"embedding", "vector_store", "retriever"}
+    assert _FakeEmbeddingGenerator.created == [registry.DEFAULT_EMBEDDING_MODEL]
+
+    stats = registry.memory_stats()
+    assert stats["vector_stores"] == {f"kb ({registry.DEFAULT_EMBEDDING_MODEL}, chroma)": {"documents": 1}}
+    assert stats["embedding_models"][registry.DEFAULT_EMBEDDING_MODEL]["cache"] == {"hits": 0, "misses": 0}
+    assert stats["retrievers"] == 1
+    assert list(stats["retrieval_caches"]) == ["kb (chroma)"]
+
+
+def test_memory_stats_tolerates_concurrent_registration(monkeypatch):
+    # count() registering another store stands in for a concurrent get_vector_store
+    class _RegisteringStore(_FakeVectorStore):
+        def count(self):
+            registry.get_vector_store(f"{self.collection_name}-next", "chroma")
+            return super().count()
+    monkeypatch.setattr(registry, "VectorStore", _RegisteringStore)
+    registry.get_vector_store("kb", "chroma")
+
+    stats = registry.memory_stats()
+    assert list(stats["vector_stores"]) == [f"kb ({registry.DEFAULT_EMBEDDING_MODEL}, chroma)"]
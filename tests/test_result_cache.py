@@ -0,0 +1,85 @@
+import json
+
+from core.rag import RAGPipeline
+from src.retrieval.numpy_store import NumpyVectorStore
+from src.retrieval.result_cache import RetrievalCache
+from src.retrieval.retriever import Retriever
+
+DOCS = [{"id": "Article 36", "text": "goodwill deduction", "metadata": {"article": "Article 36"}, "score": 0.1}]
+
+
+def test_key_covers_query_top_k_filters_and_version():
+    key = RetrievalCache.make_key("v1", "goodwill  deduction\n", 5)
+    assert key == RetrievalCache.make_key("v1", "goodwill deduction", 5)
+    assert key != RetrievalCache.make_key("v2", "goodwill deduction", 5)
+    assert key != RetrievalCache.make_key("v1", "goodwill deduction", 3)
+    assert key != RetrievalCache.make_key("v1", "goodwill deduction", 5, {"tags": ["goodwill"]})
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "retrieval.sqlite")
+    key = RetrievalCache.make_key("v1", "goodwill", 5)
+    RetrievalCache(disk_path=path).set(key, DOCS)
+
+    cache = RetrievalCache(disk_path=path)
+    results = cache.get(key)
+    assert results == DOCS
+    results[0]["text"] = "mutated by the caller"
+    assert cache.get(key) == DOCS
+    assert cache.stats()["memory"]["hits"] == 1 and cache.stats()["disk"]["hits"] == 1
+
+
+class _CountingEmbeddings:
+    model_name = "count-4"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, text):
+        return self.generate_batch([text])[0]
+
+    def generate_batch(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 1.0, float(text.count("e")), 0.5] for text in texts]
+
+
+def _write_kb(path, texts):
+    path.write_text(json.dumps([
+        {"article": f"Article {i}", "section": "S", "text": text, "tags": [], "template_rows": []}
+        for i, text in enumerate(texts)
+    ]), encoding="utf-8")
+
+
+def test_retriever_cache_skips_embedding_until_reindexed(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    _write_kb(kb_path, ["retained earnings", "goodwill"])
+    store = NumpyVectorStore("kb", directory=str(tmp_path / "store"))
+    cache = RetrievalCache()
+    embeddings = _CountingEmbeddings()
+
+    retriever = Retriever(kb_path=str(kb_path), embedding_generator=embeddings, vector_store=store, result_cache=cache)
+    first = retriever.retrieve("goodwill deduction", top_k=2)
+    calls = embeddings.calls
+    assert retriever.retrieve(" goodwill   deduction ", top_k=2) == first
+    assert retriever.retrieve_many(["goodwill deduction"], top_k=2) == [first]
+    assert embeddings.calls == calls
+
+    _write_kb(kb_path, ["retained earnings", "goodwill", "intangible assets"])
+    reindexed = Retriever(kb_path=str(kb_path), embedding_generator=embeddings, vector_store=store, result_cache=cache)
+    assert reindexed.index_version != retriever.index_version
+    assert len(reindexed.retrieve("goodwill deduction", top_k=3)) == 3
+
+
+def test_rag_pipeline_cache_is_invalidated_by_changed_rules(tmp_path):
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    (rules_dir / "crr.txt").write_text("Article 36 Deductions\n1. Goodwill shall be deducted.\n", encoding="utf-8")
+    rag = RAGPipeline(data_dir=str(rules_dir), chunk_cache_dir=None)
+
+    assert rag.retrieve("goodwill")[0]["article"] == "Article 36(1)"
+    assert rag.retrieve("goodwill") == rag.retrieve("goodwill")
+    assert rag.result_cache.stats()["memory"]["hits"] == 2
+
+    (rules_dir / "crr.txt").write_text("Article 37 Goodwill\n1. Goodwill includes intangibles.\n", encoding="utf-8")
+    rag.ingest_rules()
+    assert rag.retrieve("goodwill")[0]["article"] == "Article 37(1)"
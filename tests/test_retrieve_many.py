@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from src.retrieval.batcher import RetrievalBatcher
+from src.retrieval.hybrid import HybridRetriever
+from src.retrieval.numpy_store import NumpyVectorStore
+from src.retrieval.retriever import Retriever
+
+QUERIES = ["retained earnings", "goodwill deduction", "share premium", "retained earnings"]
+
+
+class _CountingEmbeddings:
+    model_name = "hash-16"
+
+    def __init__(self):
+        self.batches = []
+
+    def generate(self, text):
+        return self.generate_batch([text])[0]
+
+    def generate_batch(self, texts):
+        self.batches.append(len(texts))
+        # Bag of hashed words, so queries land near documents sharing their words
+        vectors = []
+        for text in texts:
+            vector = np.zeros(16)
+            for word in text.lower().split():
+                vector[sum(map(ord, word)) % 16] += 1
+            vectors.append(vector.tolist())
+        return vectors
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    kb_path = tmp_path / "kb.json"
+    kb_path.write_text(json.dumps([
+        {"article": "Article 26", "section": "CET1", "text": "retained earnings and share premium", "tags": ["cet1"], "template_rows": []},
+        {"article": "Article 36", "section": "Deductions", "text": "goodwill deduction intangible assets", "tags": ["deductions"], "template_rows": []},
+        {"article": "Article 51", "section": "AT1", "text": "additional tier instruments", "tags": ["at1"], "template_rows": []},
+    ]), encoding="utf-8")
+    store = NumpyVectorStore("kb", directory=str(tmp_path / "store"))
+    return Retriever(kb_path=str(kb_path), embedding_generator=_CountingEmbeddings(), vector_store=store)
+
+
+def test_retrieve_many_matches_retrieve_in_one_encode(retriever):
+    retriever.embedding_generator.batches.clear()
+    batched = retriever.retrieve_many(QUERIES, top_k=2)
+
+    assert retriever.embedding_generator.batches == [len(QUERIES)]
+    assert batched == [retriever.retrieve(query, top_k=2) for query in QUERIES]
+    assert batched[1][0]["id"] == "Article 36"
+    assert retriever.retrieve_many([], top_k=2) == []
+
+
+def test_retrieve_many_applies_filters_per_query(retriever):
+    results = retriever.retrieve_many(QUERIES, top_k=2, filters={"tags": ["cet1"]})
+    assert all([doc["id"] for doc in docs] == ["Article 26"] for docs in results)
+
+
+def test_filtered_search_widens_until_top_k_match(tmp_path):
+    # 40 close neighbours of the query, and the only "rare" articles ranked after them
+    articles = [{"article": f"Article {i}", "section": "S", "text": "retained earnings", "tags": ["common"],
+                 "template_rows": []} for i in range(40)]
+    articles += [{"article": f"Article {i}", "section": "S", "text": "additional tier instruments", "tags": ["rare"],
+                  "template_rows": []} for i in (100, 101, 102)]
+    kb_path = tmp_path / "kb.json"
+    kb_path.write_text(json.dumps(articles), encoding="utf-8")
+    store = NumpyVectorStore("kb", directory=str(tmp_path / "store"))
+    retriever = Retriever(kb_path=str(kb_path), embedding_generator=_CountingEmbeddings(), vector_store=store,
+                          use_result_cache=False)
+
+    rare = {"Article 100", "Article 101", "Article 102"}
+    docs = retriever.retrieve("retained earnings", top_k=2, filters={"tags": ["rare"]})
+    assert len(docs) == 2 and {doc["id"] for doc in docs} <= rare
+    results = retriever.retrieve_many(["retained earnings", "tier instruments"], top_k=5, filters={"tags": ["rare"]})
+    assert [{doc["id"] for doc in docs} for docs in results] == [rare, rare]
+
+
+def test_hybrid_retrieve_many_matches_retrieve(retriever):
+    hybrid = HybridRetriever(kb_path=retriever.kb_path, dense_retriever=retriever)
+    assert hybrid.retrieve_many(QUERIES, top_k=2) == [hybrid.retrieve(query, top_k=2) for query in QUERIES]
+
+
+def test_batcher_coalesces_concurrent_queries(retriever):
+    calls = []
+    retrieve_many = retriever.retrieve_many
+
+    def counting_retrieve_many(queries, top_k, filters):
+        calls.append(list(queries))
+        return retrieve_many(queries, top_k, filters)
+    retriever.retrieve_many = counting_retrieve_many
+    batcher = RetrievalBatcher(retriever, max_batch_size=3)
+
+    async def run():
+        return await asyncio.gather(*(batcher.retrieve(query, top_k=2) for query in QUERIES))
+
+    results = asyncio.run(run())
+    assert calls == [QUERIES[:3], QUERIES[3:]]
+    assert results == [retriever.retrieve(query, top_k=2) for query in QUERIES]
+
+
+def test_batcher_holds_flush_tasks_until_done(retriever):
+    batcher = RetrievalBatcher(retriever, max_batch_size=2)
+
+    async def run():
+        results = asyncio.gather(*(batcher.retrieve(query, top_k=2) for query in QUERIES[:2]))
+        await asyncio.sleep(0)
+        in_flight = len(batcher._tasks)
+        return in_flight, await results
+
+    in_flight, results = asyncio.run(run())
+    assert in_flight == 1
+    assert results == [retriever.retrieve(query, top_k=2) for query in QUERIES[:2]]
+    assert not batcher._tasks
+
+
+def test_batcher_propagates_errors(retriever):
+    def failing_retrieve_many(queries, top_k, filters):
+        raise RuntimeError("store unavailable")
+    retriever.retrieve_many = failing_retrieve_many
+
+    async def run():
+        return await asyncio.gather(*(RetrievalBatcher(retriever).retrieve(q) for q in QUERIES[:2]), return_exceptions=True)
+
+    assert all(isinstance(e, RuntimeError) for e in asyncio.run(run()))
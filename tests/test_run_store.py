@@ -0,0 +1,86 @@
+from src.llm.batch import BatchReportGenerator, scenario_to_text
+from src.storage.run_store import RunStore, prompt_hash
+
+
+def _report(own_funds, goodwill=-10.0):
+    return {
+        "row_010_own_funds": own_funds,
+        "row_300_goodwill": goodwill,
+        "audit_trail": {
+            "row_300_goodwill": {"value": goodwill, "reasoning": "Deduction",
+                                 "source_articles": ["Article 36(1)(b)"], "confidence": 0.9},
+        },
+    }
+
+
+def _validation(is_valid=True):
+    return {"is_valid": is_valid, "error_count": 0 if is_valid else 1, "warning_count": 0, "results": []}
+
+
+def test_save_and_get_run_round_trip():
+    store = RunStore(":memory:")
+    run_id = store.save_run(
+        _report(100.0), lei_code="LEI1", reporting_date="2025-03-31", provider="Mock",
+        model_name="gpt-4o", prompt_hash="abc", input_text="{}", context_ids=["Article 26", "Article 36"],
+        validation=_validation()
+    )
+    run = store.get_run(run_id)
+    assert run["report"] == _report(100.0)
+    assert run["context_ids"] == ["Article 26", "Article 36"]
+    assert run["is_valid"] is True
+    assert run["validation"]["error_count"] == 0
+    assert store.get_run(run_id + 1) is None
+
+
+def test_bulk_insert_lookups_and_compare():
+    store = RunStore(":memory:")
+    ids = store.save_runs([
+        {"report": _report(100.0), "lei_code": "LEI1", "reporting_date": "2025-03-31", "model_name": "m1",
+         "context_ids": ["Article 26"]},
+        {"report": _report(120.0, goodwill=-15.0), "lei_code": "LEI1", "reporting_date": "2025-06-30",
+         "model_name": "m2", "validation": _validation(False)},
+        {"report": _report(90.0), "lei_code": "LEI2", "reporting_date": "2025-03-31", "model_name": "m1",
+         "context_ids": ["Article 26"]},
+    ])
+    assert store.count() == 3
+    assert [r["run_id"] for r in store.find_runs(lei_code="LEI1")] == [ids[1], ids[0]]
+    assert [r["run_id"] for r in store.find_runs(model_name="m1", reporting_date="2025-03-31")] == [ids[2], ids[0]]
+    assert store.find_runs(lei_code="LEI2")[0]["is_valid"] is None
+    assert store.latest_run("LEI1", "2025-06-30")["report"]["row_010_own_funds"] == 120.0
+    assert store.runs_citing("Article 26") == [ids[0], ids[2]]
+
+    assert store.compare_runs(ids[0], ids[1]) == {
+        "row_010_own_funds": {"a": 100.0, "b": 120.0, "change": 20.0},
+        "row_300_goodwill": {"a": -10.0, "b": -15.0, "change": -5.0},
+    }
+
+    store.delete_run(ids[0])
+    assert store.runs_citing("Article 26") == [ids[2]]
+
+
+def test_prompt_hash_is_stable():
+    assert prompt_hash("system", "user") == prompt_hash("system", "user")
+    assert prompt_hash("system", "user") != prompt_hash("system", "user v2")
+
+
+class RunGenerator:
+    async def agenerate_run(self, scenario_text):
+        report = dict(_report(100.0), row_015_tier1_capital=100.0, row_020_cet1_capital=100.0)
+        return {"report": report, "context_ids": ["Article 36"], "provider": "Mock",
+                "model_name": "gpt-4o", "prompt_hash": "abc"}
+
+
+def test_batch_results_can_be_stored():
+    results = list(BatchReportGenerator(RunGenerator()).run([
+        {"scenario_id": "S1", "lei_code": "LEI1", "reporting_date": "2025-12-31", "input_data": {"goodwill": 30}},
+    ]))
+    assert results[0]["status"] == "ok"
+
+    store = RunStore(":memory:")
+    store.save_runs(results)
+    run = store.latest_run("LEI1", "2025-12-31")
+    assert run["scenario_id"] == "S1"
+    assert run["prompt_hash"] == "abc"
+    assert run["context_ids"] == ["Article 36"]
+    assert run["validation"] == results[0]["validation"]
+    assert run["input_text"] == scenario_to_text({"input_data": {"goodwill": 30}})
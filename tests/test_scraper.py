@@ -0,0 +1,137 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import rag as rag_module
+from core.rag import RAGPipeline
+from core.scraper import RulebookCrawler, extract_paragraphs, diff_paragraphs, fetch_pra_rules, paragraph_hash
+
+PAGE = """<html><head><script>var x = 1;</script></head><body>
+<nav><p>Menu</p></nav>
+<main>
+  <h1>Article 26 Common Equity Tier 1 items</h1>
+  <p>Common Equity Tier 1 items consist of <a href="#">capital instruments</a>, share premium and retained earnings.</p>
+  <ul><li>(a) capital instruments;</li><li>(b) share premium accounts;</li></ul>
+  <p>{last}</p>
+</main></body></html>"""
+
+
+class _Pages:
+    def __init__(self):
+        self.content = {}
+        self.etags = {}
+        self.requests = []
+
+
+def _handler(pages):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            pages.requests.append((self.path, self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")))
+            if self.path not in pages.content:
+                self.send_error(404)
+                return
+            etag = pages.etags.get(self.path)
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = pages.content[self.path].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Last-Modified", "Wed, 01 Oct 2025 00:00:00 GMT")
+            self.end_headers()
+            self.wfile.write(body)
+    return Handler
+
+
+@pytest.fixture
+def site():
+    pages = _Pages()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(pages))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield pages, f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_extract_paragraphs_keeps_inline_links_and_skips_chrome():
+    paragraphs = extract_paragraphs(PAGE.format(last="Article 28 conditions apply.").encode(), selector="main")
+    assert paragraphs == [
+        "Article 26 Common Equity Tier 1 items",
+        "Common Equity Tier 1 items consist of capital instruments , share premium and retained earnings.",
+        "(a) capital instruments;",
+        "(b) share premium accounts;",
+        "Article 28 conditions apply.",
+    ]
+
+
+def test_diff_paragraphs():
+    old = [paragraph_hash("a"), paragraph_hash("b")]
+    diff = diff_paragraphs(old, ["a", "c"])
+    assert diff == {"added": ["c"], "removed": [paragraph_hash("b")], "unchanged": 1}
+
+
+def test_crawler_revalidates_and_diffs(site, tmp_path):
+    pages, base_url = site
+    pages.content["/pra"] = PAGE.format(last="Article 28 conditions apply.")
+    pages.etags["/pra"] = '"v1"'
+    pages.content["/eba"] = PAGE.format(last="EBA Q&A 2024_1234.")
+    sources = [
+        {"name": "pra", "url": base_url + "/pra", "selector": "main"},
+        {"name": "eba", "url": base_url + "/eba"},
+        {"name": "missing", "url": base_url + "/missing"},
+    ]
+    output_dir = str(tmp_path)
+
+    first = {r["name"]: r for r in RulebookCrawler(output_dir, sources=sources, max_workers=3).crawl()}
+    assert first["pra"]["status"] == "updated"
+    assert len(first["pra"]["added"]) == 5
+    assert first["missing"]["status"] == "error"
+    with open(os.path.join(output_dir, "pra.txt"), encoding="utf-8") as f:
+        assert f.read().split("\n\n")[-1] == "Article 28 conditions apply."
+    pra_mtime = os.path.getmtime(os.path.join(output_dir, "pra.txt"))
+
+    # Unchanged: ETag revalidation for /pra (304), identical paragraphs for /eba (no ETag)
+    second = {r["name"]: r for r in RulebookCrawler(output_dir, sources=sources).crawl()}
+    assert second["pra"]["status"] == "not_modified"
+    assert second["eba"]["status"] == "unchanged"
+    assert ("/pra", '"v1"', "Wed, 01 Oct 2025 00:00:00 GMT") in pages.requests
+    assert os.path.getmtime(os.path.join(output_dir, "pra.txt")) == pra_mtime
+
+    # One paragraph amended
+    pages.content["/pra"] = PAGE.format(last="Article 28 conditions, as amended, apply.")
+    pages.etags["/pra"] = '"v2"'
+    third = {r["name"]: r for r in RulebookCrawler(output_dir, sources=sources).crawl()}
+    assert third["pra"]["status"] == "updated"
+    assert third["pra"]["added"] == ["Article 28 conditions, as amended, apply."]
+    assert third["pra"]["removed"] == [paragraph_hash("Article 28 conditions apply.")]
+    assert third["pra"]["unchanged"] == 4
+
+
+def test_rag_pipeline_applies_crawl_changes(site, tmp_path, monkeypatch):
+    pages, base_url = site
+    pages.content["/pra"] = PAGE.format(last="Article 28 conditions apply.")
+    pages.content["/eba"] = PAGE.format(last="EBA Q&A 2024_1234.")
+    sources = [{"name": "pra", "url": base_url + "/pra", "selector": "main"}, {"name": "eba", "url": base_url + "/eba"}]
+    output_dir = str(tmp_path / "rules")
+    RulebookCrawler(output_dir, sources=sources).crawl()
+    rag = RAGPipeline(data_dir=output_dir, chunk_cache_dir=str(tmp_path / "chunks"))
+
+    read = []
+    chunk_file = rag_module.chunk_file
+    monkeypatch.setattr(rag_module, "chunk_file", lambda path, *args: read.append(os.path.basename(path)) or chunk_file(path, *args))
+    pages.content["/pra"] = PAGE.format(last="Article 28 conditions, as amended, apply.")
+    fetch_pra_rules(output_dir, sources=sources, rag=rag)
+
+    assert read == ["pra.txt"]
+    assert "as amended" in rag.retrieve("amended conditions")[0]["text"]
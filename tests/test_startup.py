@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.llm.generator import CorepGenerator
+from src.llm.providers import get_provider
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time itself is measured by the "import_entry_modules" benchmark (benchmarks/suite.py)
+HEAVY_MODULES = ["torch", "sentence_transformers", "chromadb", "openai", "anthropic", "google.generativeai", "pandas"]
+
+_PROBE = """
+import json, sys
+import src.llm.generator, src.llm.batch, core.llm_chain
+print(json.dumps({"loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def test_entry_modules_import_without_heavy_dependencies():
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE % HEAVY_MODULES],
+        cwd=ROOT, capture_output=True, text=True, check=True, timeout=60
+    ).stdout
+    probe = json.loads(output.strip().splitlines()[-1])
+    assert probe["loaded"] == []
+
+
+def test_mock_generator_structured_input_skips_retrieval():
+    generator = CorepGenerator(provider="Mock")
+    run = generator.generate_run(json.dumps({"paid_up_capital_instruments": 500_000_000, "goodwill": 30_000_000}))
+
+    assert run["report"]["row_040_paid_up_capital"] == 500_000_000
+    assert run["context_ids"] == []
+    assert [span["name"] for span in run["trace"]["children"]] == ["structured_mapping"]
+    assert generator._retriever is None
+
+
+def test_provider_sdk_imported_on_creation():
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError, match="OpenAI library not found"):
+            get_provider("OpenAI", "gpt-4o", api_key="test")
+    else:
+        assert get_provider("OpenAI", "gpt-4o", api_key="test").client is not None
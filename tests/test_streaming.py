@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from src.llm.providers import AsyncLLMProvider, MockProvider, iterate_sync
+from src.llm.streaming import IncrementalReportParser, MalformedStreamError
+
+REPORT = {
+    "row_010_own_funds": 150.0,
+    "row_020_cet1_capital": 150.0,
+    "audit_trail": {
+        "row_020_cet1_capital": {
+            "value": 150.0,
+            "reasoning": "Sum of {paid up} and \"retained\" earnings",
+            "source_articles": ["Article 26 CRR"],
+            "confidence": 1.0
+        }
+    }
+}
+
+def feed_in_chunks(parser, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10000])
+def test_emits_fields_and_audit_records_incrementally(chunk_size):
+    parser = IncrementalReportParser()
+    events = feed_in_chunks(parser, "```json\n" + json.dumps(REPORT, indent=2) + "\n```", chunk_size)
+    parser.close()
+
+    assert events == [
+        {"type": "field", "field": "row_010_own_funds", "value": 150.0},
+        {"type": "field", "field": "row_020_cet1_capital", "value": 150.0},
+        {"type": "audit", "field": "row_020_cet1_capital", "record": REPORT["audit_trail"]["row_020_cet1_capital"]},
+    ]
+
+def test_field_is_emitted_before_the_response_ends():
+    parser = IncrementalReportParser()
+    assert parser.feed('{"row_010_own_funds": 1.0, "row_0') == [{"type": "field", "field": "row_010_own_funds", "value": 1.0}]
+
+@pytest.mark.parametrize("text", [
+    "Here is your report: {",
+    '{"row_010_own_funds" 1.0',
+    '{"row_010_own_funds": 1.0 2.0,',
+    '{"row_010_own_funds": £150m,',
+])
+def test_malformed_prefix_fails_immediately(text):
+    with pytest.raises(MalformedStreamError):
+        IncrementalReportParser().feed(text)
+
+def test_truncated_response_fails_on_close():
+    parser = IncrementalReportParser()
+    parser.feed('{"row_010_own_funds": 1.0')
+    with pytest.raises(MalformedStreamError):
+        parser.close()
+
+def test_mock_provider_streams_full_response():
+    response = json.dumps(REPORT)
+    chunks = list(iterate_sync(MockProvider("mock", response=response).stream("sys", "user")))
+    assert len(chunks) > 1
+    assert "".join(chunks) == response
+
+def test_stopping_early_closes_provider_stream():
+    closed = []
+
+    class EndlessProvider(AsyncLLMProvider):
+        name = "Endless"
+
+        async def _stream(self, system_prompt, user_prompt):
+            try:
+                while True:
+                    yield "x"
+            finally:
+                closed.append(True)
+
+    for chunk in iterate_sync(EndlessProvider("endless").stream("sys", "user")):
+        break
+    assert closed == [True]
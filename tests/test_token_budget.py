@@ -0,0 +1,79 @@
+from src.llm.token_budget import ContextBudget, TokenCounter, split_sentences
+
+
+class WordCounter(TokenCounter):
+    """One token per word, so budgets are easy to reason about in tests."""
+    def __init__(self):
+        super().__init__("test-model")
+        self._encoding = None
+
+    def count(self, text):
+        return len(text.split())
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+def test_token_counter_estimates_without_tiktoken():
+    counter = TokenCounter("gpt-4o")
+    counter._encoding = None
+    assert counter.count("") == 0
+    assert counter.count("abcdefgh") == 2
+    assert counter.truncate("abcdefghij", 2) == "abcdefgh"
+
+
+def test_split_sentences():
+    assert split_sentences("First point. Second; third\n\nFourth") == ["First point.", "Second;", "third", "Fourth"]
+
+
+def test_small_chunks_pass_through_unchanged():
+    budget = ContextBudget(WordCounter(), budget=100, max_chunk_tokens=50)
+    chunks = [{"id": "A", "text": "Goodwill is deducted.\nSee Article 36."}, {"id": "B", "text": "AT1 instruments."}]
+    selected, stats = budget.select(chunks, "goodwill")
+    assert [c["text"] for c in selected] == [chunks[0]["text"], chunks[1]["text"]]
+    assert stats["tokens_in"] == stats["tokens_out"] == 8
+
+
+def test_overlapping_chunks_are_deduplicated():
+    budget = ContextBudget(WordCounter(), budget=100)
+    chunks = [
+        {"id": "A", "text": "Goodwill is deducted from CET1. Intangibles are deducted too."},
+        {"id": "B", "text": "Intangibles are deducted too. Deferred tax assets are deducted."},
+        {"id": "C", "text": "Goodwill is deducted from CET1."},
+    ]
+    selected, stats = budget.select(chunks)
+    assert [c["id"] for c in selected] == ["A", "B"]
+    assert selected[1]["text"] == "Deferred tax assets are deducted."
+    assert stats["duplicate_sentences"] == 2
+
+
+def test_large_chunk_keeps_query_relevant_sentences_within_budget():
+    budget = ContextBudget(WordCounter(), budget=12, max_chunk_tokens=8)
+    chunk = {"id": "A", "text": "Paid up capital counts. Filler words about nothing here. Goodwill must be deducted. More filler text."}
+    selected, stats = budget.select([chunk, {"id": "B", "text": "Second article on goodwill."}], "goodwill capital")
+    assert selected[0]["text"] == "Paid up capital counts. Goodwill must be deducted."
+    assert stats["tokens_out"] <= 12
+    # The rest of the budget went to the next chunk
+    assert selected[1]["text"] == "Second article on goodwill."
+
+
+def test_oversized_sentence_is_truncated_and_budget_stops_selection():
+    budget = ContextBudget(WordCounter(), budget=5)
+    selected, stats = budget.select([
+        {"id": "A", "text": "one two three four five six seven"},
+        {"id": "B", "text": "never included"},
+    ])
+    assert [c["text"] for c in selected] == ["one two three four five"]
+    assert stats == {"chunks_in": 2, "tokens_in": 9, "duplicate_sentences": 0, "chunks_out": 1, "tokens_out": 5}
+
+
+def test_sentence_trimmed_from_a_chunk_is_kept_in_a_later_one():
+    budget = ContextBudget(WordCounter(), budget=20, max_chunk_tokens=8)
+    selected, stats = budget.select([
+        {"id": "A", "text": "Paid up capital counts. Filler words about nothing here. Goodwill must be deducted."},
+        {"id": "B", "text": "Filler words about nothing here. Paid up capital counts."},
+    ], "goodwill capital")
+    assert selected[0]["text"] == "Paid up capital counts. Goodwill must be deducted."
+    # Only the sentence actually sent with chunk A is a duplicate
+    assert selected[1]["text"] == "Filler words about nothing here."
+    assert stats["duplicate_sentences"] == 1
@@ -0,0 +1,108 @@
+import asyncio
+
+from src.observability.tracing import Tracer, JsonlTraceExporter, activate, flatten, read_traces, record
+from src.storage.run_store import RunStore
+from src.templates.ca1_template import CA1Template
+
+
+def test_spans_nest_and_record_counters():
+    tracer = Tracer()
+    with tracer.span("generate_report", provider="Mock") as root:
+        with tracer.span("retrieve_context"):
+            with tracer.span("embed_query"):
+                record(embedding_cache_hits=1)
+        with tracer.span("llm_call") as llm:
+            llm.incr("tokens_in", 120)
+            llm.incr("tokens_out", 30)
+
+    trace = root.to_dict()
+    assert trace["attributes"] == {"provider": "Mock"}
+    assert [c["name"] for c in trace["children"]] == ["retrieve_context", "llm_call"]
+    assert trace["children"][0]["children"][0]["counters"] == {"embedding_cache_hits": 1}
+    assert trace["children"][1]["counters"] == {"tokens_in": 120, "tokens_out": 30}
+    assert trace["duration_ms"] >= trace["children"][1]["duration_ms"]
+
+    rows = flatten(trace)
+    assert [(r["span"], r["depth"]) for r in rows] == [
+        ("generate_report", 0), ("retrieve_context", 1), ("embed_query", 2), ("llm_call", 1)
+    ]
+    assert tracer.metrics.summary()["llm_call"]["count"] == 1
+
+
+def test_span_records_errors():
+    tracer = Tracer()
+    try:
+        with tracer.span("parse_json") as span:
+            raise ValueError("bad json")
+    except ValueError:
+        pass
+    assert span.attributes["error"] == "ValueError"
+    assert span.end is not None
+
+
+def test_spans_follow_to_thread_and_explicit_activation():
+    tracer = Tracer()
+
+    def blocking_stage():
+        with tracer.span("vector_store.query"):
+            pass
+
+    async def pipeline():
+        with tracer.span("generate_report") as root:
+            await asyncio.to_thread(blocking_stage)
+        detached = tracer.start_span("stream_report")
+        with activate(detached):
+            with tracer.span("parse_json"):
+                pass
+        detached.finish()
+        return root, detached
+
+    root, detached = asyncio.run(pipeline())
+    assert [c.name for c in root.children] == ["vector_store.query"]
+    assert [c.name for c in detached.children] == ["parse_json"]
+    assert detached.parent is None
+
+
+def test_prometheus_render():
+    tracer = Tracer()
+    with tracer.span("llm_call") as span:
+        span.incr("tokens_in", 10)
+    with tracer.span("llm_call") as span:
+        span.incr("tokens_in", 5)
+
+    text = tracer.metrics.render()
+    assert "# TYPE corep_span_duration_seconds histogram" in text
+    assert 'corep_span_duration_seconds_count{span="llm_call"} 2' in text
+    assert 'corep_span_duration_seconds_bucket{span="llm_call",le="+Inf"} 2' in text
+    assert 'corep_tokens_in_total{span="llm_call"} 15' in text
+
+
+def test_jsonl_exporter_writes_root_spans_only(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(exporters=[JsonlTraceExporter(path)])
+    for _ in range(2):
+        with tracer.span("generate_report"):
+            with tracer.span("validate"):
+                pass
+
+    traces = read_traces(path)
+    assert len(traces) == 2
+    assert traces[0]["name"] == "generate_report"
+    assert traces[0]["children"][0]["name"] == "validate"
+    assert traces[0]["trace_id"] != traces[1]["trace_id"]
+    assert read_traces(path, limit=1) == traces[-1:]
+
+
+def test_run_store_keeps_trace():
+    tracer = Tracer()
+    with tracer.span("generate_report") as root:
+        pass
+    store = RunStore(":memory:")
+    report = CA1Template(row_010_own_funds=0.0, row_015_tier1_capital=0.0, row_020_cet1_capital=0.0).model_dump()
+    with_trace = store.save_run(report, model_name="mock", trace=root.to_dict())
+    without_trace = store.save_run(report, model_name="mock")
+
+    assert store.get_run(with_trace)["trace"]["name"] == "generate_report"
+    assert store.get_run(without_trace)["trace"] is None
+    store.delete_run(with_trace)
+    assert store.count() == 1
@@ -27,13 +27,24 @@ def test_rule_ca1_r010_fail(valid_data):
     result = validator.validate(valid_data)
     
     assert result["is_valid"] == False
-    assert any(r["rule_id"] == "CA1_R010" and not r["passed"] for r in result["results"])
+    # Reported under the EBA rule, which supersedes the built-in CA1_R010
+    assert any(r["rule_id"] == "v0010_m" and not r["passed"] for r in result["results"])
+    assert not any(r["rule_id"] == "CA1_R010" for r in result["results"])
 
 def test_rule_ca1_r100_fail(valid_data):
-    # Deductions must be negative
-    valid_data.row_300_goodwill = 10.0 # Positive value error
+    # Deductions must be negative; the EBA file has no sign check for r370
+    valid_data.row_370_deferred_tax_assets = 10.0 # Positive value error
     validator = Validator()
     result = validator.validate(valid_data)
     
     assert result["is_valid"] == False
     assert any(r["rule_id"] == "CA1_R100" and not r["passed"] for r in result["results"])
+
+def test_eba_severity_wins_for_goodwill_sign(valid_data):
+    valid_data.row_300_goodwill = 10.0
+    result = Validator().validate(valid_data)
+
+    failed = {r["rule_id"]: r for r in result["results"] if not r["passed"]}
+    assert failed["v0300_w"]["severity"] == "WARNING"
+    assert "CA1_R100" not in failed
+    assert result["warning_count"] >= 1